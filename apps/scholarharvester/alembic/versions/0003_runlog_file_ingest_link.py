@@ -0,0 +1,24 @@
+"""Link file ingests to their run and record run parameters"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_runlog_file_ingest_link"
+down_revision = "0002_institution_directory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("runlog", sa.Column("params_jsonb", sa.JSON(), nullable=True))
+    op.add_column("file_ingest", sa.Column("runlog_id", sa.Integer(), nullable=True))
+    op.create_foreign_key("file_ingest_runlog_id_fkey", "file_ingest", "runlog", ["runlog_id"], ["id"])
+    op.create_index("ix_file_ingest_runlog_id", "file_ingest", ["runlog_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_file_ingest_runlog_id", table_name="file_ingest")
+    op.drop_constraint("file_ingest_runlog_id_fkey", "file_ingest", type_="foreignkey")
+    op.drop_column("file_ingest", "runlog_id")
+    op.drop_column("runlog", "params_jsonb")
@@ -0,0 +1,18 @@
+"""Link file ingests to their raw archive snapshot"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_file_ingest_archive_key"
+down_revision = "0003_runlog_file_ingest_link"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("file_ingest", sa.Column("archive_key", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("file_ingest", "archive_key")
@@ -0,0 +1,51 @@
+"""Store identical citations once and link them to metrics"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_shared_citation"
+down_revision = "0004_file_ingest_archive_key"
+branch_labels = None
+depends_on = None
+
+CITATION_KEY = ["title", "publisher", "year", "source_url", "interpretation_note"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "metric_citation",
+        sa.Column("metric_id", sa.Integer(), sa.ForeignKey("metric.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("citation_id", sa.Integer(), sa.ForeignKey("citation.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_metric_citation_citation_id", "metric_citation", ["citation_id"])
+    key = ", ".join(CITATION_KEY)
+    op.execute(
+        f"""
+        insert into metric_citation (metric_id, citation_id)
+        select metric_id, min(id) over (partition by {key})
+        from citation
+        where metric_id is not null
+        on conflict do nothing
+        """
+    )
+    op.execute(f"delete from citation where id not in (select min(id) from citation group by {key})")
+    op.drop_column("citation", "metric_id")
+    op.create_index("citation_dedupe_idx", "citation", CITATION_KEY, unique=True, postgresql_nulls_not_distinct=True)
+
+
+def downgrade() -> None:
+    op.drop_index("citation_dedupe_idx", table_name="citation")
+    op.add_column("citation", sa.Column("metric_id", sa.Integer(), nullable=True))
+    op.create_foreign_key("citation_metric_id_fkey", "citation", "metric", ["metric_id"], ["id"])
+    columns = ", ".join(["retrieved_at", *CITATION_KEY])
+    op.execute(
+        f"""
+        insert into citation (metric_id, {columns})
+        select l.metric_id, {", ".join(f"c.{column}" for column in ["retrieved_at", *CITATION_KEY])}
+        from metric_citation l
+        join citation c on c.id = l.citation_id
+        """
+    )
+    op.drop_table("metric_citation")
+    op.execute("delete from citation where metric_id is null")
@@ -0,0 +1,37 @@
+"""Deduplicate metrics per dataset and record delta ingest counts"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_metric_delta_ingest"
+down_revision = "0005_shared_citation"
+branch_labels = None
+depends_on = None
+
+METRIC_KEY = ["dataset_id", "campus", "major", "discipline", "source_school", "stat_name", "year", "term"]
+
+
+def upgrade() -> None:
+    op.add_column("runlog", sa.Column("updated_records", sa.Integer(), nullable=True))
+    op.add_column("runlog", sa.Column("unchanged_records", sa.Integer(), nullable=True))
+    key = ", ".join(METRIC_KEY)
+    # metric_citation rows go with their metric through its ON DELETE CASCADE foreign key.
+    op.execute(
+        f"""
+        delete from metric
+        where id in (
+            select id from (
+                select id, row_number() over (partition by {key} order by id desc) as rn from metric
+            ) ranked
+            where rn > 1
+        )
+        """
+    )
+    op.create_index("metric_dedupe_idx", "metric", METRIC_KEY, unique=True, postgresql_nulls_not_distinct=True)
+
+
+def downgrade() -> None:
+    op.drop_index("metric_dedupe_idx", table_name="metric")
+    op.drop_column("runlog", "unchanged_records")
+    op.drop_column("runlog", "updated_records")
@@ -0,0 +1,37 @@
+"""Checkpoint College Scorecard syncs so they can resume"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_scorecard_checkpoint"
+down_revision = "0006_metric_delta_ingest"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scorecard_checkpoint",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("runlog_id", sa.Integer(), sa.ForeignKey("runlog.id"), nullable=False),
+        sa.Column("state", sa.String(), nullable=True),
+        sa.Column("per_page", sa.Integer(), nullable=False),
+        sa.Column("next_page", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("imported", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("source_total", sa.Integer(), nullable=True),
+        sa.Column("params_jsonb", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "scorecard_checkpoint_key_idx",
+        "scorecard_checkpoint",
+        ["state", "per_page"],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("scorecard_checkpoint_key_idx", table_name="scorecard_checkpoint")
+    op.drop_table("scorecard_checkpoint")
@@ -0,0 +1,18 @@
+"""Store a hash of each institution's mapped Scorecard values"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_institution_content_hash"
+down_revision = "0007_scorecard_checkpoint"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("institution", sa.Column("content_hash", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("institution", "content_hash")
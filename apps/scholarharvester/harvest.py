@@ -2,61 +2,96 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import sys
 import time
 from typing import Dict
 
-import httpx
-
 SRC_PATH = Path(__file__).resolve().parent / "src"
 if str(SRC_PATH) not in sys.path:
     sys.path.insert(0, str(SRC_PATH))
 
-from scholarharvester.adapters import ADAPTERS
+from scholarharvester.adapters import ADAPTERS, SOURCES
+from scholarharvester.adapters.export_cache import fetch_export
+from scholarharvester.adapters.official import resolve_official_data_url
 from scholarharvester.adapters.utils import AdapterResult
+from scholarharvester.config import config
+from scholarharvester.delta import MetricDelta
 from scholarharvester.provenance import update_provenance
-from scholarharvester.registry import find_source, record_robot_decision
-from scholarharvester.supa_writer import supabase_conn, upsert_citation, upsert_dataset, upsert_metric
-
-
-async def _fetch_robots(base_url: str) -> str:
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(base_url.rstrip("/") + "/robots.txt")
-            return resp.text
-    except httpx.HTTPError:
-        return ""
-
-
-def run_harvest(adapter_name: str, params: Dict[str, str]) -> None:
+from scholarharvester.ratelimit import rate_limiter
+from scholarharvester.registry import find_source
+from scholarharvester.robots import robots
+from scholarharvester.services.parse_pool import parse_pool, shutdown_pools
+from scholarharvester.staging import CopyStats, DeltaStats
+from scholarharvester.supa_writer import (
+    copy_metrics,
+    load_metric_states,
+    supabase_conn,
+    upsert_dataset,
+    upsert_metric_batch,
+)
+from scholarharvester.transport import transport
+
+
+async def _resolve_allowed_export(adapter_name: str, base_url: str) -> str:
+    rules = await robots.ensure(base_url)
+    rate_limiter.tighten(base_url, rules.crawl_delay(robots.agent))
+    export_url = await asyncio.to_thread(resolve_official_data_url, SOURCES[adapter_name])
+    if not await robots.allowed(export_url):
+        raise RuntimeError(f"{adapter_name}: robots.txt disallows {export_url}")
+    return export_url
+
+
+def run_harvest(
+    adapter_name: str,
+    params: Dict[str, str],
+    parse_workers: int = 0,
+    ingest_mode: str = "insert",
+    batch_size: int | None = None,
+) -> DeltaStats | CopyStats:
     source_conf = find_source(adapter_name)
     if not source_conf:
         raise ValueError(f"Unknown adapter {adapter_name}")
 
-    robots_text = asyncio.run(_fetch_robots(source_conf.get("base_url", "")))
-    record_robot_decision(source_conf, robots_text)
-
-    time.sleep(source_conf.get("throttle_seconds", 2))
-
     adapter = ADAPTERS.get(adapter_name)
     if not adapter:
         raise ValueError(f"Adapter implementation missing for {adapter_name}")
 
-    result: AdapterResult = adapter(params)
-    inserted = 0
-    with supabase_conn() as connection:
-        dataset_id = upsert_dataset(connection, result.dataset, source_conf["name"])
-        for metric_payload in result.metrics:
-            metric_id = upsert_metric(connection, dataset_id, metric_payload)
-            for citation in metric_payload.citations or []:
-                upsert_citation(connection, metric_id, citation)
-            inserted += 1
+    export_url = transport.run(_resolve_allowed_export(adapter_name, source_conf.get("base_url", "")))
+    export = fetch_export(export_url)
+    if parse_workers:
+        result: AdapterResult = parse_pool(parse_workers).collect_sync(adapter_name, params, export)
+    else:
+        result = adapter(params, export=export)
+    try:
+        with supabase_conn() as connection:
+            dataset_id = upsert_dataset(connection, result.dataset, source_conf["name"])
+            if ingest_mode == "copy":
+                stats: DeltaStats | CopyStats = copy_metrics(connection, dataset_id, result.batches())
+            else:
+                delta = MetricDelta(load_metric_states(connection, dataset_id))
+                for batch in result.batches():
+                    fresh, changed = delta.classify(batch.rows())
+                    rows = fresh + [row for _, row in changed]
+                    metric_ids = upsert_metric_batch(connection, dataset_id, rows, batch.citations, batch_size)
+                    delta.remember(rows, metric_ids)
+                stats = delta.stats
+    finally:
+        result.close()
 
     run_id = int(datetime.utcnow().timestamp())
     update_provenance(run_id, source_conf["name"], [source_conf.get("base_url", "")], warnings=[])
-    print(f"{adapter_name}: inserted {inserted} metrics")
+    return stats
+
+
+def _timed_harvest(
+    adapter_name: str, params: Dict[str, str], parse_workers: int, ingest_mode: str, batch_size: int
+) -> tuple[DeltaStats | CopyStats, float]:
+    started = time.perf_counter()
+    stats = run_harvest(adapter_name, params, parse_workers, ingest_mode, batch_size)
+    return stats, time.perf_counter() - started
 
 
 def main() -> None:
@@ -64,6 +99,28 @@ def main() -> None:
     parser.add_argument("--adapter", action="append", help="Adapter name (defaults to all)")
     parser.add_argument("--since", type=int, help="Filter by year")
     parser.add_argument("--campus", help="Limit to a campus")
+    parser.add_argument("--chunk-size", type=int, help="Stream exports in chunks of this many rows")
+    parser.add_argument(
+        "--concurrency", type=int, default=config.run_concurrency, help="Adapters to run at the same time"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=config.parse_workers,
+        help="Parse exports in this many worker processes (0 = in-process)",
+    )
+    parser.add_argument(
+        "--ingest-mode",
+        choices=("insert", "copy"),
+        default=config.ingest_mode,
+        help="Write with batched upserts or COPY into a staging table",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.write_batch_size,
+        help="Rows per upsert transaction in insert mode",
+    )
     args = parser.parse_args()
 
     params: Dict[str, str] = {}
@@ -71,10 +128,33 @@ def main() -> None:
         params["since"] = str(args.since)
     if args.campus:
         params["campus"] = args.campus
+    if args.chunk_size:
+        params["chunk_size"] = str(args.chunk_size)
 
     targets = args.adapter or list(ADAPTERS.keys())
-    for adapter_name in targets:
-        run_harvest(adapter_name, params)
+    failed = False
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = {
+                adapter_name: pool.submit(
+                    _timed_harvest, adapter_name, params, args.parse_workers, args.ingest_mode, args.batch_size
+                )
+                for adapter_name in targets
+            }
+            for adapter_name, future in futures.items():
+                try:
+                    stats, seconds = future.result()
+                except Exception as exc:
+                    failed = True
+                    print(f"{adapter_name}: failed ({exc})")
+                else:
+                    print(f"{adapter_name}: {stats.summary()} metrics in {seconds:.1f}s")
+    finally:
+        shutdown_pools()
+
+    print(f"http pool: {transport.stats().summary()}")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,25 +1,38 @@
 from __future__ import annotations
 
-from scholarharvester.adapters.official import OfficialSourceConfig, fetch_table, make_dataset, resolve_official_data_url
-from scholarharvester.adapters.utils import AdapterResult, CitationPayload, MetricPayload
+from scholarharvester.adapters.export_cache import FetchedExport, fetch_export
+from scholarharvester.adapters.official import (
+    OfficialSourceConfig,
+    chunk_size_from,
+    iter_export,
+    make_dataset,
+    resolve_official_data_url,
+)
+from scholarharvester.adapters.utils import AdapterResult, CitationPayload, MetricBatch, MetricPayload
 
 
-def collect(params: dict[str, str]) -> AdapterResult:
+SOURCE = OfficialSourceConfig(
+    adapter_name="ccc_articulation_pdfs",
+    source_name="CCC Articulation PDFs",
+    publisher="California Community Colleges Chancellor's Office",
+    env_var="SCHOLARSTACK_CCC_ARTICULATION_CSV_URL",
+    base_url="https://www.cccco.edu",
+    discovery_keywords=("articulation", "pdf", "csv"),
+)
+
+
+def collect(params: dict[str, str], export: FetchedExport | None = None) -> AdapterResult:
     year = int(params.get("since", params.get("year", "2022")))
     campus = params.get("campus", "All CCCs")
 
-    source = OfficialSourceConfig(
-        adapter_name="ccc_articulation_pdfs",
-        source_name="CCC Articulation PDFs",
-        publisher="California Community Colleges Chancellor's Office",
-        env_var="SCHOLARSTACK_CCC_ARTICULATION_CSV_URL",
-        base_url="https://www.cccco.edu",
-        discovery_keywords=("articulation", "pdf", "csv"),
-    )
-    source_url = resolve_official_data_url(source)
-    frame = fetch_table(source_url)
-    pdf_column = next((column for column in frame.columns if "pdf" in column.lower() or "file" in column.lower()), None)
-    table_count = len(frame[pdf_column].dropna()) if pdf_column else len(frame)
+    export = export or fetch_export(resolve_official_data_url(SOURCE))
+    source_url = export.url
+    table_count = 0
+    for frame in iter_export(export, chunk_size_from(params)):
+        pdf_column = next(
+            (column for column in frame.columns if "pdf" in column.lower() or "file" in column.lower()), None
+        )
+        table_count += len(frame[pdf_column].dropna()) if pdf_column else len(frame)
 
     metrics = [
         MetricPayload(
@@ -35,7 +48,7 @@ def collect(params: dict[str, str]) -> AdapterResult:
             citations=[
                 CitationPayload(
                     title="CCC Articulation Export",
-                    publisher=source.publisher,
+                    publisher=SOURCE.publisher,
                     year=year,
                     source_url=source_url,
                     interpretation_note="Count of articulation resources from official export listing.",
@@ -51,4 +64,4 @@ def collect(params: dict[str, str]) -> AdapterResult:
         cohort="transfer",
         source_url=source_url,
     )
-    return AdapterResult(dataset=dataset, metrics=metrics)
+    return AdapterResult(dataset=dataset, metrics=MetricBatch.from_payloads(metrics), export=export)
@@ -1,35 +1,48 @@
 from __future__ import annotations
 
-from scholarharvester.adapters.official import OfficialSourceConfig, fetch_table, make_dataset, resolve_official_data_url
-from scholarharvester.adapters.utils import AdapterResult, CitationPayload, MetricPayload
+from scholarharvester.adapters.export_cache import FetchedExport, fetch_export
+from scholarharvester.adapters.official import (
+    OfficialSourceConfig,
+    chunk_size_from,
+    iter_export,
+    make_dataset,
+    resolve_official_data_url,
+)
+from scholarharvester.adapters.utils import AdapterResult, CitationPayload, MetricBatch, MetricPayload
 
 
-def collect(params: dict[str, str]) -> AdapterResult:
+SOURCE = OfficialSourceConfig(
+    adapter_name="ccc_catalog_courses",
+    source_name="CCC Catalog Courses",
+    publisher="California Community Colleges Chancellor's Office",
+    env_var="SCHOLARSTACK_CCC_CATALOG_CSV_URL",
+    base_url="https://www.cccco.edu/catalog",
+    discovery_keywords=("catalog", "course", "csv"),
+)
+
+
+def collect(params: dict[str, str], export: FetchedExport | None = None) -> AdapterResult:
     year = int(params.get("since", params.get("year", "2022")))
     campus_filter = params.get("campus")
 
-    source = OfficialSourceConfig(
-        adapter_name="ccc_catalog_courses",
-        source_name="CCC Catalog Courses",
-        publisher="California Community Colleges Chancellor's Office",
-        env_var="SCHOLARSTACK_CCC_CATALOG_CSV_URL",
-        base_url="https://www.cccco.edu/catalog",
-        discovery_keywords=("catalog", "course", "csv"),
-    )
-    source_url = resolve_official_data_url(source)
-    frame = fetch_table(source_url)
+    export = export or fetch_export(resolve_official_data_url(SOURCE))
+    source_url = export.url
 
-    campus_column = next(
-        (column for column in frame.columns if "college" in column.lower() or "campus" in column.lower()),
-        None,
-    )
-    if campus_column:
-        grouped = frame.groupby(frame[campus_column].astype(str).str.strip())
-    else:
-        grouped = [("All CCCs", frame)]
+    counts: dict[str, int] = {}
+    for frame in iter_export(export, chunk_size_from(params)):
+        campus_column = next(
+            (column for column in frame.columns if "college" in column.lower() or "campus" in column.lower()),
+            None,
+        )
+        if campus_column:
+            chunk_counts = frame[campus_column].astype(str).str.strip().value_counts(sort=False)
+        else:
+            chunk_counts = {"All CCCs": len(frame)}
+        for campus_name, count in chunk_counts.items():
+            counts[campus_name] = counts.get(campus_name, 0) + int(count)
 
     metrics: list[MetricPayload] = []
-    for campus_name, subset in grouped:
+    for campus_name, count in sorted(counts.items()):
         if not campus_name or campus_name.lower() == "nan":
             continue
         if campus_filter and campus_name.lower() != campus_filter.lower():
@@ -39,7 +52,7 @@ def collect(params: dict[str, str]) -> AdapterResult:
                 campus=campus_name,
                 cohort="transfer",
                 stat_name="course_count",
-                stat_value_numeric=float(len(subset)),
+                stat_value_numeric=float(count),
                 stat_value_text=None,
                 unit="count",
                 year=year,
@@ -48,7 +61,7 @@ def collect(params: dict[str, str]) -> AdapterResult:
                 citations=[
                     CitationPayload(
                         title="CCCCO Catalog Export",
-                        publisher=source.publisher,
+                        publisher=SOURCE.publisher,
                         year=year,
                         source_url=source_url,
                         interpretation_note="Count of catalog rows per campus in the official export.",
@@ -67,4 +80,4 @@ def collect(params: dict[str, str]) -> AdapterResult:
         cohort="transfer",
         source_url=source_url,
     )
-    return AdapterResult(dataset=dataset, metrics=metrics)
+    return AdapterResult(dataset=dataset, metrics=MetricBatch.from_payloads(metrics), export=export)
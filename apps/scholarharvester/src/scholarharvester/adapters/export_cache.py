@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+import httpx
+
+from scholarharvester.config import config
+from scholarharvester.transport import transport
+
+
+@dataclass
+class FetchedExport:
+    url: str
+    path: str
+    sha256: str
+    bytes: int
+    mime: str | None
+    http_status: int | None
+    from_cache: bool = False
+
+
+def _hash_file(path: Path) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+class HttpCache:
+    def __init__(self, root: Path, client: httpx.Client | None = None) -> None:
+        self.root = root
+        self.client = client
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def _load_index(self) -> dict[str, Any]:
+        try:
+            return json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            # A truncated index only costs a refetch; the cached objects themselves are content-addressed.
+            return {}
+
+    def _remember(self, url: str, entry: dict[str, Any]) -> None:
+        with self._lock:
+            index = self._load_index()
+            index[url] = entry
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            staging = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            staging.write_text(json.dumps(index, indent=2, sort_keys=True))
+            os.replace(staging, self.index_path)
+
+    def _store(self, response: httpx.Response) -> tuple[str, int]:
+        staging = self.root / "objects" / "tmp"
+        staging.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=staging, delete=False) as fh:
+            try:
+                for block in response.iter_bytes():
+                    digest.update(block)
+                    size += len(block)
+                    fh.write(block)
+            except BaseException:
+                fh.close()
+                os.unlink(fh.name)
+                raise
+        sha256 = digest.hexdigest()
+        target = self.object_path(sha256)
+        if target.exists():
+            os.unlink(fh.name)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(fh.name, target)
+        return sha256, size
+
+    def fetch(self, url: str) -> FetchedExport:
+        with self._lock:
+            entry = self._load_index().get(url)
+        headers: dict[str, str] = {}
+        if entry and self.object_path(entry["sha256"]).exists():
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry = None
+
+        client = self.client or transport.client
+        with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and entry:
+                return FetchedExport(
+                    url=url,
+                    path=str(self.object_path(entry["sha256"])),
+                    sha256=entry["sha256"],
+                    bytes=entry["bytes"],
+                    mime=entry.get("mime"),
+                    http_status=304,
+                    from_cache=True,
+                )
+            response.raise_for_status()
+            sha256, size = self._store(response)
+            mime = response.headers.get("content-type", "").split(";")[0].strip() or None
+            self._remember(
+                url,
+                {
+                    "sha256": sha256,
+                    "bytes": size,
+                    "mime": mime,
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                },
+            )
+            return FetchedExport(
+                url=url,
+                path=str(self.object_path(sha256)),
+                sha256=sha256,
+                bytes=size,
+                mime=mime,
+                http_status=response.status_code,
+            )
+
+
+class DiscoveryCache:
+    def __init__(self, path: Path, ttl_seconds: float) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(base_url: str, keywords: tuple[str, ...]) -> str:
+        return f"{base_url}|{','.join(keywords)}"
+
+    def _load(self) -> dict[str, Any]:
+        if self._entries is None:
+            self._entries = json.loads(self.path.read_text()) if self.path.exists() else {}
+        return self._entries
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        staging.write_text(json.dumps(self._entries, indent=2, sort_keys=True))
+        os.replace(staging, self.path)
+
+    def get(self, base_url: str, keywords: tuple[str, ...]) -> str | None:
+        with self._lock:
+            entry = self._load().get(self._key(base_url, keywords))
+        if not entry or time.time() - entry["discovered_at"] >= self.ttl_seconds:
+            return None
+        return entry["url"]
+
+    def put(self, base_url: str, keywords: tuple[str, ...], url: str) -> None:
+        with self._lock:
+            self._load()[self._key(base_url, keywords)] = {"url": url, "discovered_at": time.time()}
+            self._save()
+
+    def forget(self, base_url: str, keywords: tuple[str, ...]) -> None:
+        with self._lock:
+            if self._load().pop(self._key(base_url, keywords), None) is not None:
+                self._save()
+
+
+http_cache = HttpCache(Path(config.cache_dir) / "http")
+discovery_cache = DiscoveryCache(Path(config.cache_dir) / "discovery.json", config.discovery_ttl_seconds)
+
+
+def fetch_export(url: str) -> FetchedExport:
+    if urlparse(url).scheme in {"http", "https"}:
+        return http_cache.fetch(url)
+    sha256, size = _hash_file(Path(url))
+    return FetchedExport(
+        url=url,
+        path=url,
+        sha256=sha256,
+        bytes=size,
+        mime=mimetypes.guess_type(url)[0],
+        http_status=None,
+    )
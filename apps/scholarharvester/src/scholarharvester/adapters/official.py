@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
 import os
 import re
 from dataclasses import dataclass
+from functools import partial
+from html.parser import HTMLParser
+from typing import Any, Iterable, Iterator
 from urllib.parse import urljoin, urlparse
 
 import httpx
+import numpy as np
 import pandas as pd
-
-from scholarharvester.adapters.utils import CitationPayload, DatasetPayload, MetricPayload
+import pyarrow as pa
+
+from scholarharvester.adapters.export_cache import FetchedExport, discovery_cache, fetch_export
+from scholarharvester.adapters.utils import (
+    AdapterResult,
+    CitationPayload,
+    DatasetPayload,
+    MetricBatch,
+    repeat_value,
+    single_citation_ids,
+)
+from scholarharvester import registry
 from scholarharvester.config import config
+from scholarharvester.transport import transport
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -38,27 +58,71 @@ def _is_official_url(url: str, base_url: str) -> bool:
     )
 
 
-def discover_tabular_url(base_url: str, keywords: tuple[str, ...]) -> str | None:
-    try:
-        response = httpx.get(base_url, headers={"User-Agent": config.user_agent}, timeout=15)
+def _export_link(link: str, base_url: str, keywords: tuple[str, ...]) -> str | None:
+    absolute = urljoin(base_url, link)
+    normalized = absolute.lower()
+    if not (normalized.endswith(".csv") or normalized.endswith(".json") or "download" in normalized):
+        return None
+    if keywords and not any(keyword in normalized for keyword in keywords):
+        return None
+    if not _is_official_url(absolute, base_url):
+        return None
+    return absolute
+
+
+class _ExportLinkFinder(HTMLParser):
+    def __init__(self, base_url: str, keywords: tuple[str, ...]) -> None:
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.keywords = keywords
+        self.match: str | None = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.match:
+            return
+        for name, value in attrs:
+            if name == "href" and value:
+                self.match = _export_link(value, self.base_url, self.keywords)
+                if self.match:
+                    return
+
+
+def _scan_for_export_link(client: httpx.Client, base_url: str, keywords: tuple[str, ...]) -> str | None:
+    finder = _ExportLinkFinder(base_url, keywords)
+    with client.stream("GET", base_url, timeout=15) as response:
         response.raise_for_status()
+        for text in response.iter_text():
+            finder.feed(text)
+            if finder.match:
+                return finder.match
+    finder.close()
+    return finder.match
+
+
+def _still_served(client: httpx.Client, url: str) -> bool:
+    try:
+        response = client.head(url, timeout=15)
     except httpx.HTTPError:
-        return None
+        return False
+    return response.status_code < 400
 
-    links = re.findall(r'href=["\']([^"\']+)["\']', response.text, flags=re.IGNORECASE)
-    candidates: list[str] = []
-    for link in links:
-        absolute = urljoin(base_url, link)
-        normalized = absolute.lower()
-        if not (normalized.endswith(".csv") or normalized.endswith(".json") or "download" in normalized):
-            continue
-        if keywords and not any(keyword in normalized for keyword in keywords):
-            continue
-        if not _is_official_url(absolute, base_url):
-            continue
-        candidates.append(absolute)
 
-    return candidates[0] if candidates else None
+def discover_tabular_url(
+    base_url: str, keywords: tuple[str, ...], client: httpx.Client | None = None
+) -> str | None:
+    http = client or transport.client
+    cached = discovery_cache.get(base_url, keywords)
+    if cached and _still_served(http, cached):
+        return cached
+    try:
+        discovered = _scan_for_export_link(http, base_url, keywords)
+    except httpx.HTTPError:
+        return None
+    if discovered:
+        discovery_cache.put(base_url, keywords, discovered)
+    else:
+        discovery_cache.forget(base_url, keywords)
+    return discovered
 
 
 def resolve_official_data_url(source: OfficialSourceConfig) -> str:
@@ -88,17 +152,116 @@ def resolve_official_data_url(source: OfficialSourceConfig) -> str:
     )
 
 
-def fetch_table(url: str) -> pd.DataFrame:
+def _table_format(url: str) -> str:
     lowered = url.lower()
+    if lowered.endswith((".jsonl", ".ndjson")) or ".jsonl?" in lowered or ".ndjson?" in lowered:
+        return "jsonl"
     if lowered.endswith(".json") or ".json?" in lowered:
-        frame = pd.read_json(url)
+        return "json"
+    return "csv"
+
+
+def read_export(export: FetchedExport) -> pd.DataFrame:
+    table_format = _table_format(export.url)
+    if table_format == "json":
+        frame = pd.read_json(export.path)
+    elif table_format == "jsonl":
+        frame = pd.read_json(export.path, lines=True)
     else:
-        frame = pd.read_csv(url)
+        frame = pd.read_csv(export.path)
     if frame.empty:
-        raise RuntimeError(f"Source returned no rows: {url}")
+        raise RuntimeError(f"Source returned no rows: {export.url}")
     return frame
 
 
+def fetch_table(url: str) -> pd.DataFrame:
+    return read_export(fetch_export(url))
+
+
+def _iter_json_array(path: str, chunk_size: int, read_size: int = 1 << 16) -> Iterator[list[Any]] | None:
+    fh = open(path, encoding="utf-8")
+    buffer = fh.read(read_size).lstrip()
+    if not buffer.startswith("["):
+        fh.close()
+        return None
+
+    def records() -> Iterator[list[Any]]:
+        nonlocal buffer
+        decoder = json.JSONDecoder()
+        position, batch, eof = 1, [], False
+        with fh:
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position < len(buffer) and buffer[position] == "]":
+                    break
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    end = len(buffer)
+                # A value that runs to the end of the buffer may be cut off, so read on before trusting it.
+                if end >= len(buffer) and not eof:
+                    more = fh.read(read_size)
+                    eof = not more
+                    buffer, position = buffer[position:] + more, 0
+                    continue
+                if end >= len(buffer):
+                    raise ValueError(f"Truncated JSON array in {path}")
+                batch.append(record)
+                position = end
+                if len(batch) >= chunk_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    return records()
+
+
+def iter_table(
+    export: FetchedExport, chunk_size: int, *, usecols: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    table_format = _table_format(export.url)
+    rows = 0
+    if table_format == "csv":
+        with pd.read_csv(export.path, chunksize=chunk_size, usecols=usecols) as reader:
+            for frame in reader:
+                rows += len(frame)
+                yield frame
+    elif table_format == "jsonl":
+        with pd.read_json(export.path, lines=True, chunksize=chunk_size) as reader:
+            for frame in reader:
+                rows += len(frame)
+                yield frame[usecols] if usecols else frame
+    else:
+        records = _iter_json_array(export.path, chunk_size)
+        if records is None:
+            # Only a top-level array of records can be streamed; other layouts are parsed whole.
+            logger.info("%s is not a JSON array of records; reading it in one piece", export.url)
+            frame = pd.read_json(export.path)
+            chunks: Iterator[pd.DataFrame] = (
+                frame.iloc[start : start + chunk_size] for start in range(0, len(frame), chunk_size)
+            )
+        else:
+            chunks = (pd.DataFrame.from_records(batch) for batch in records)
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk.reindex(columns=usecols) if usecols else chunk
+    if not rows:
+        raise RuntimeError(f"Source returned no rows: {export.url}")
+
+
+def iter_export(export: FetchedExport, chunk_size: int | None) -> Iterator[pd.DataFrame]:
+    if not chunk_size:
+        yield read_export(export)
+        return
+    yield from iter_table(export, chunk_size)
+
+
+def chunk_size_from(params: dict[str, str]) -> int | None:
+    return int(params.get("chunk_size") or config.chunk_size or 0) or None
+
+
 def _normalize_column(value: str) -> str:
     return re.sub(r"[^a-z0-9]+", "_", value.strip().lower()).strip("_")
 
@@ -167,6 +330,168 @@ COMMON_STAT_COLUMNS: dict[str, tuple[str, ...]] = {
 }
 
 
+ROW_COLUMNS: dict[str, tuple[str, ...]] = {
+    "campus": ("campus", "campus_name", "institution", "university"),
+    "year": ("year", "admit_year", "report_year", "calendar_year"),
+    "term": ("term", "season", "admit_term"),
+    "major": ("major", "major_name", "program", "major_program"),
+    "discipline": ("discipline", "discipline_name", "academic_discipline", "broad_discipline"),
+    "source_school": ("source_school", "school_name", "high_school", "community_college"),
+    "school_type": ("school_type", "source_school_type", "institution_type"),
+}
+
+SCHOOL_TYPES = {"HighSchool", "CommunityCollege", "Other"}
+
+
+def header_fingerprint(columns: Iterable[object]) -> str:
+    normalized = "\x1f".join(_normalize_column(str(column)) for column in columns)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _resolve_columns(
+    frame: pd.DataFrame, adapter_name: str | None = None
+) -> tuple[dict[str, str | None], dict[str, str]]:
+    fingerprint = header_fingerprint(frame.columns) if adapter_name else ""
+    cached = registry.column_mappings.get(adapter_name, fingerprint) if adapter_name else None
+    if cached:
+        originals = {_normalize_column(str(column)): column for column in frame.columns}
+        row_columns = {name: originals.get(column) if column else None for name, column in cached["row"].items()}
+        return row_columns, {name: originals[column] for name, column in cached["stats"].items()}
+
+    row_columns = {name: _find_column(frame, aliases) for name, aliases in ROW_COLUMNS.items()}
+    stat_columns = {
+        stat_name: _find_column(frame, aliases) for stat_name, aliases in COMMON_STAT_COLUMNS.items()
+    }
+    stat_columns = {stat_name: column for stat_name, column in stat_columns.items() if column}
+
+    if adapter_name:
+        logger.warning(
+            "%s: new export header set %s (%d columns); mapped %s",
+            adapter_name,
+            fingerprint[:12],
+            len(frame.columns),
+            {**row_columns, **stat_columns},
+        )
+        registry.column_mappings.put(
+            adapter_name,
+            fingerprint,
+            {
+                "headers": [str(column) for column in frame.columns],
+                "row": {name: _normalize_column(column) if column else None for name, column in row_columns.items()},
+                "stats": {name: _normalize_column(column) for name, column in stat_columns.items()},
+            },
+        )
+    return row_columns, stat_columns
+
+
+def _normalize_series(series: pd.Series) -> pd.Series:
+    values = series.to_numpy(dtype=object)
+    text = pd.Series(np.asarray(values, dtype=str), index=series.index, dtype=object).str.strip()
+    return text.mask(values == None, "")  # noqa: E711 - elementwise identity check on object arrays
+
+
+def _constant_series(value: object, index: pd.Index) -> pd.Series:
+    return pd.Series([value] * len(index), index=index, dtype=object)
+
+
+def _parse_numbers(series: pd.Series) -> tuple[np.ndarray, np.ndarray, pd.Series]:
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+        numeric = series.to_numpy(dtype="float64")
+        return numeric, np.ones(len(series), dtype=bool), _constant_series("", series.index)
+
+    text = _normalize_series(series)
+    cleaned = text.str.replace(",", "", regex=False).str.replace("%", "", regex=False)
+    numeric = pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype="float64", copy=True)
+    has_numeric = ~np.isnan(numeric)
+
+    # to_numeric coerces anything float() rejects, but also literal "nan"/"inf" spellings
+    # float() accepts; re-check only those cells so parity with _to_number is exact.
+    retry = np.flatnonzero(~has_numeric & (text != "").to_numpy())
+    for position in retry:
+        parsed = _to_number(text.iat[position])
+        if parsed is not None:
+            numeric[position] = parsed
+            has_numeric[position] = True
+    return numeric, has_numeric, text
+
+
+def _parse_years(series: pd.Series, fallback: int) -> np.ndarray:
+    numeric, has_numeric, _ = _parse_numbers(series)
+    with np.errstate(invalid="ignore"):
+        truncated = np.trunc(numeric)
+        valid = has_numeric & np.isfinite(numeric) & (truncated >= 1900) & (truncated <= 2100)
+    return np.where(valid, truncated, fallback).astype(np.int64)
+
+
+def _classify_school_types(values: pd.Series) -> pd.Series:
+    lowered = values.str.lower()
+    classified = values.mask(~values.isin(SCHOOL_TYPES) & (values != ""), "Other")
+    classified = classified.mask(lowered.str.contains("college", regex=False), "CommunityCollege")
+    return classified.mask(lowered.str.contains("high", regex=False), "HighSchool")
+
+
+def _melt_stats(frame: pd.DataFrame, stat_columns: dict[str, str]) -> pd.DataFrame:
+    parts: list[pd.DataFrame] = []
+    for order, column in enumerate(stat_columns.values()):
+        numeric, has_numeric, text = _parse_numbers(frame[column])
+        emit = has_numeric | (text != "").to_numpy()
+        rows = np.flatnonzero(emit)
+        parts.append(
+            pd.DataFrame(
+                {
+                    "row": rows,
+                    "order": order,
+                    "numeric": numeric[rows],
+                    "has_numeric": has_numeric[rows],
+                    "text": text.to_numpy(dtype=object)[rows],
+                }
+            )
+        )
+    melted = pd.concat(parts, ignore_index=True)
+    return melted.sort_values(["row", "order"], kind="stable", ignore_index=True)
+
+
+def _text_column(
+    frame: pd.DataFrame, row_columns: dict[str, str | None], name: str, default: str | None
+) -> pd.Series:
+    column = row_columns[name]
+    return _normalize_series(frame[column]) if column else _constant_series(default or "", frame.index)
+
+
+def _select_rows(
+    frame: pd.DataFrame,
+    row_columns: dict[str, str | None],
+    *,
+    default_campus: str | None,
+    default_focus: str | None,
+    dataset_year: int,
+    campus_filter: str | None,
+    focus_filter: str | None,
+    focus_kind: str,
+) -> tuple[pd.DataFrame, pd.Series, pd.Series, np.ndarray]:
+    frame = frame.reset_index(drop=True)
+    campus = _text_column(frame, row_columns, "campus", default_campus)
+    keep = campus != ""
+    if campus_filter:
+        keep &= campus.str.lower() == campus_filter.lower()
+
+    if focus_kind in {"major", "discipline"}:
+        focus = _text_column(frame, row_columns, focus_kind, default_focus)
+    else:
+        focus = _constant_series(default_focus or "", frame.index)
+    if focus_filter:
+        keep &= (focus == "") | (focus.str.lower() == focus_filter.lower())
+
+    frame = frame[keep.to_numpy()].reset_index(drop=True)
+    campus = campus[keep].reset_index(drop=True)
+    focus = focus[keep].reset_index(drop=True)
+    if row_columns["year"]:
+        years = _parse_years(frame[row_columns["year"]], dataset_year)
+    else:
+        years = np.full(len(frame), dataset_year, dtype=np.int64)
+    return frame, campus, focus, years
+
+
 def build_metrics_from_frame(
     frame: pd.DataFrame,
     *,
@@ -180,99 +505,85 @@ def build_metrics_from_frame(
     focus_filter: str | None,
     focus_kind: str,
     source_school_kind: str | None = None,
-) -> tuple[list[MetricPayload], int]:
-    campus_col = _find_column(frame, ("campus", "campus_name", "institution", "university"))
-    year_col = _find_column(frame, ("year", "admit_year", "report_year", "calendar_year"))
-    term_col = _find_column(frame, ("term", "season", "admit_term"))
-    major_col = _find_column(frame, ("major", "major_name", "program", "major_program"))
-    discipline_col = _find_column(frame, ("discipline", "discipline_name", "academic_discipline", "broad_discipline"))
-    source_school_col = _find_column(frame, ("source_school", "school_name", "high_school", "community_college"))
-    school_type_col = _find_column(frame, ("school_type", "source_school_type", "institution_type"))
-
-    stat_columns = {
-        stat_name: _find_column(frame, aliases) for stat_name, aliases in COMMON_STAT_COLUMNS.items()
-    }
-    stat_columns = {stat_name: column for stat_name, column in stat_columns.items() if column}
+    adapter_name: str | None = None,
+    columns: tuple[dict[str, str | None], dict[str, str]] | None = None,
+) -> tuple[MetricBatch, int]:
+    row_columns, stat_columns = columns or _resolve_columns(frame, adapter_name)
     if not stat_columns:
         raise RuntimeError("No metric columns found in source export")
 
-    metrics: list[MetricPayload] = []
-    latest_year = dataset_year
-
-    for _, row in frame.iterrows():
-        campus = _normalize_value(row[campus_col]) if campus_col else (default_campus or "")
-        if not campus:
-            continue
-        if campus_filter and campus.lower() != campus_filter.lower():
-            continue
-
-        focus_value = ""
-        major: str | None = None
-        discipline: str | None = None
-        if focus_kind == "major":
-            focus_value = _normalize_value(row[major_col]) if major_col else (default_focus or "")
-            major = focus_value or None
-        elif focus_kind == "discipline":
-            focus_value = _normalize_value(row[discipline_col]) if discipline_col else (default_focus or "")
-            discipline = focus_value or None
-        else:
-            focus_value = default_focus or ""
-
-        if focus_filter and focus_value and focus_value.lower() != focus_filter.lower():
-            continue
-
-        row_year = _to_year(row[year_col], dataset_year) if year_col else dataset_year
-        latest_year = max(latest_year, row_year)
-        term = _normalize_value(row[term_col]) if term_col else "Fall"
-        if not term:
-            term = "Fall"
-
-        source_school = _normalize_value(row[source_school_col]) if source_school_col else None
-        school_type = _normalize_value(row[school_type_col]) if school_type_col else source_school_kind
-        if school_type:
-            lowered = school_type.lower()
-            if "high" in lowered:
-                school_type = "HighSchool"
-            elif "college" in lowered:
-                school_type = "CommunityCollege"
-            elif school_type not in {"HighSchool", "CommunityCollege", "Other"}:
-                school_type = "Other"
-
-        for stat_name, column in stat_columns.items():
-            raw_value = row[column]
-            numeric = _to_number(raw_value)
-            text = None if numeric is not None else _normalize_value(raw_value)
-            if numeric is None and not text:
-                continue
-            metrics.append(
-                MetricPayload(
-                    campus=campus,
-                    major=major,
-                    discipline=discipline,
-                    source_school=source_school if source_school else None,
-                    school_type=school_type if school_type else None,
-                    cohort=cohort,
-                    stat_name=stat_name,
-                    stat_value_numeric=numeric,
-                    stat_value_text=text,
-                    unit=_metric_unit(stat_name),
-                    percentile=stat_name.split("_p")[-1] if stat_name.startswith("gpa_p") else None,
-                    year=row_year,
-                    term=term,
-                    notes=f"Official-source metric extracted from {source_url}",
-                    citations=[
-                        CitationPayload(
-                            title=f"{publisher} official export",
-                            publisher=publisher,
-                            year=row_year,
-                            source_url=source_url,
-                            interpretation_note="Parsed from official export row values.",
-                        )
-                    ],
-                )
-            )
-
-    return metrics, latest_year
+    frame, campus, focus, years = _select_rows(
+        frame,
+        row_columns,
+        default_campus=default_campus,
+        default_focus=default_focus,
+        dataset_year=dataset_year,
+        campus_filter=campus_filter,
+        focus_filter=focus_filter,
+        focus_kind=focus_kind,
+    )
+    if frame.empty:
+        return MetricBatch.empty(), dataset_year
+    latest_year = max(dataset_year, int(years.max()))
+
+    def text_column(name: str, default: str | None) -> pd.Series:
+        return _text_column(frame, row_columns, name, default)
+
+    term = text_column("term", "Fall").mask(lambda values: values == "", "Fall")
+    source_school = text_column("source_school", None) if row_columns["source_school"] else None
+    school_type = _classify_school_types(text_column("school_type", source_school_kind))
+
+    melted = _melt_stats(frame, stat_columns)
+    rows = melted["row"].to_numpy()
+    row_years = years[rows]
+    focus_values = focus.to_numpy(dtype=object)[rows]
+    focus_values = np.where(focus_values == "", None, focus_values)
+    has_numeric = melted["has_numeric"].to_numpy()
+    order = melted["order"].to_numpy()
+    stat_names = np.array(list(stat_columns), dtype=object)
+
+    citation_years, citation_ids = np.unique(row_years, return_inverse=True)
+    citations = [
+        CitationPayload(
+            title=f"{publisher} official export",
+            publisher=publisher,
+            year=int(year),
+            source_url=source_url,
+            interpretation_note="Parsed from official export row values.",
+        )
+        for year in citation_years
+    ]
+
+    def nullable(values: np.ndarray) -> np.ndarray:
+        return np.where(values == "", None, values)
+
+    batch = MetricBatch.from_columns(
+        {
+            "campus": campus.to_numpy(dtype=object)[rows],
+            "major": focus_values if focus_kind == "major" else repeat_value(None, len(rows)),
+            "discipline": focus_values if focus_kind == "discipline" else repeat_value(None, len(rows)),
+            "source_school": (
+                nullable(source_school.to_numpy(dtype=object)[rows])
+                if source_school is not None
+                else repeat_value(None, len(rows))
+            ),
+            "school_type": nullable(school_type.to_numpy(dtype=object)[rows]),
+            "cohort": repeat_value(cohort, len(rows)),
+            "stat_name": stat_names[order],
+            "unit": np.array([_metric_unit(name) for name in stat_names], dtype=object)[order],
+            "percentile": np.array(
+                [name.split("_p")[-1] if name.startswith("gpa_p") else None for name in stat_names], dtype=object
+            )[order],
+            "term": term.to_numpy(dtype=object)[rows],
+            "notes": repeat_value(f"Official-source metric extracted from {source_url}", len(rows)),
+            "stat_value_numeric": pa.array(melted["numeric"].to_numpy(), mask=~has_numeric),
+            "stat_value_text": pa.array(melted["text"].to_numpy(dtype=object), type=pa.string(), mask=has_numeric),
+            "year": row_years,
+            "citation_ids": single_citation_ids(citation_ids),
+        },
+        citations,
+    )
+    return batch, latest_year
 
 
 def make_dataset(title: str, year: int, term: str, cohort: str, source_url: str) -> DatasetPayload:
@@ -283,3 +594,81 @@ def make_dataset(title: str, year: int, term: str, cohort: str, source_url: str)
         cohort=cohort,
         notes=f"Official-source harvest from {source_url}",
     )
+
+
+def collect_official_metrics(
+    source: OfficialSourceConfig,
+    *,
+    export: FetchedExport | None = None,
+    title: str,
+    term: str,
+    cohort: str,
+    requested_year: int,
+    chunk_size: int | None,
+    default_campus: str | None,
+    default_focus: str | None,
+    campus_filter: str | None,
+    focus_filter: str | None,
+    focus_kind: str,
+    source_school_kind: str | None = None,
+) -> AdapterResult:
+    export = export or fetch_export(resolve_official_data_url(source))
+    source_url = export.url
+    filters = {
+        "default_campus": default_campus,
+        "default_focus": default_focus,
+        "campus_filter": campus_filter,
+        "focus_filter": focus_filter,
+        "focus_kind": focus_kind,
+    }
+    build = partial(
+        build_metrics_from_frame,
+        cohort=cohort,
+        source_url=source_url,
+        publisher=source.publisher,
+        dataset_year=requested_year,
+        source_school_kind=source_school_kind,
+        adapter_name=source.adapter_name,
+        **filters,
+    )
+    empty_message = (
+        f"{source.adapter_name}: no metrics extracted from {source_url}. "
+        "Verify column names or refine the export URL."
+    )
+
+    if not chunk_size:
+        metrics, latest_year = build(read_export(export))
+        if not metrics:
+            raise RuntimeError(empty_message)
+        dataset = make_dataset(title=title, year=latest_year, term=term, cohort=cohort, source_url=source_url)
+        return AdapterResult(dataset=dataset, metrics=metrics, export=export)
+
+    # Resolve the header once from the first row; every chunk of the export shares it.
+    header = iter_table(export, 1)
+    columns = _resolve_columns(next(header), source.adapter_name)
+    header.close()
+    row_columns = columns[0]
+
+    # The dataset row is written before any metric, so find the latest year with a cheap
+    # first pass over just the filter and year columns.
+    latest_year = requested_year
+    if row_columns["year"]:
+        scan_columns = list(dict.fromkeys(column for column in row_columns.values() if column))
+        for frame in iter_table(export, chunk_size, usecols=scan_columns):
+            _, _, _, years = _select_rows(frame, row_columns, dataset_year=requested_year, **filters)
+            if len(years):
+                latest_year = max(latest_year, int(years.max()))
+
+    def batches() -> Iterator[MetricBatch]:
+        emitted = 0
+        for frame in iter_table(export, chunk_size):
+            metrics, _ = build(frame, columns=columns)
+            if len(metrics):
+                emitted += len(metrics)
+                yield metrics
+        if not emitted:
+            raise RuntimeError(empty_message)
+
+    dataset = make_dataset(title=title, year=latest_year, term=term, cohort=cohort, source_url=source_url)
+    return AdapterResult(dataset=dataset, metrics=MetricBatch.empty(), chunks=batches(), export=export)
+
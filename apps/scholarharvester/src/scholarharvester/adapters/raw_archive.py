@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterator
+
+import pyarrow as pa
+
+from scholarharvester.adapters.export_cache import FetchedExport
+from scholarharvester.config import config
+
+CODEC = "zstd"
+
+
+class RawArchive:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def key_for(self, sha256: str) -> str:
+        return f"{sha256[:2]}/{sha256}.{CODEC}"
+
+    def save(self, export: FetchedExport) -> str:
+        key = self.key_for(export.sha256)
+        target = self.root / key
+        if target.exists():
+            return key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=target.parent, delete=False) as staging:
+            pass
+        try:
+            with open(export.path, "rb") as source, pa.CompressedOutputStream(staging.name, CODEC) as sink:
+                shutil.copyfileobj(source, sink, 1 << 20)
+            os.replace(staging.name, target)
+        finally:
+            if os.path.exists(staging.name):
+                os.unlink(staging.name)
+        return key
+
+    @contextmanager
+    def restore(self, key: str, export: FetchedExport) -> Iterator[FetchedExport]:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "export"
+            with pa.CompressedInputStream(str(self.root / key), CODEC) as source, path.open("wb") as sink:
+                shutil.copyfileobj(source, sink, 1 << 20)
+            yield replace(export, path=str(path), from_cache=True)
+
+
+raw_archive = RawArchive(Path(config.archive_dir))
@@ -1,53 +1,37 @@
 from __future__ import annotations
 
-from scholarharvester.adapters.official import (
-    OfficialSourceConfig,
-    build_metrics_from_frame,
-    fetch_table,
-    make_dataset,
-    resolve_official_data_url,
-)
+from scholarharvester.adapters.export_cache import FetchedExport
+from scholarharvester.adapters.official import OfficialSourceConfig, chunk_size_from, collect_official_metrics
 from scholarharvester.adapters.utils import AdapterResult
 
 
-def collect(params: dict[str, str]) -> AdapterResult:
+SOURCE = OfficialSourceConfig(
+    adapter_name="uc_info_center_transfers_major",
+    source_name="UC Info Center Transfers",
+    publisher="University of California",
+    env_var="SCHOLARSTACK_UC_TRANSFERS_CSV_URL",
+    base_url="https://www.universityofcalifornia.edu/infocenter",
+    discovery_keywords=("transfer", "major", "csv"),
+)
+
+
+def collect(params: dict[str, str], export: FetchedExport | None = None) -> AdapterResult:
     requested_year = int(params.get("since", params.get("year", "2022")))
     campus = params.get("campus")
     major = params.get("major")
 
-    source = OfficialSourceConfig(
-        adapter_name="uc_info_center_transfers_major",
-        source_name="UC Info Center Transfers",
-        publisher="University of California",
-        env_var="SCHOLARSTACK_UC_TRANSFERS_CSV_URL",
-        base_url="https://www.universityofcalifornia.edu/infocenter",
-        discovery_keywords=("transfer", "major", "csv"),
-    )
-    source_url = resolve_official_data_url(source)
-    frame = fetch_table(source_url)
-    metrics, latest_year = build_metrics_from_frame(
-        frame,
+    return collect_official_metrics(
+        SOURCE,
+        export=export,
+        title="UC Info Center Transfer Admissions by Major",
+        term="Fall",
         cohort="transfer",
+        requested_year=requested_year,
+        chunk_size=chunk_size_from(params),
         default_campus=campus,
         default_focus=major,
-        source_url=source_url,
-        publisher=source.publisher,
-        dataset_year=requested_year,
         campus_filter=campus,
         focus_filter=major,
         focus_kind="major",
         source_school_kind="CommunityCollege",
     )
-    if not metrics:
-        raise RuntimeError(
-            f"uc_info_center_transfers_major: no metrics extracted from {source_url}. "
-            "Verify column names or refine the export URL."
-        )
-    dataset = make_dataset(
-        title="UC Info Center Transfer Admissions by Major",
-        year=latest_year,
-        term="Fall",
-        cohort="transfer",
-        source_url=source_url,
-    )
-    return AdapterResult(dataset=dataset, metrics=metrics)
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List
+from dataclasses import astuple, dataclass
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Sequence
+
+import numpy as np
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    from scholarharvester.adapters.export_cache import FetchedExport
 
 @dataclass
 class CitationPayload:
@@ -41,7 +47,131 @@ class DatasetPayload:
     cohort: str
     notes: str | None = None
 
+METRIC_TEXT_FIELDS = (
+    "campus",
+    "major",
+    "discipline",
+    "source_school",
+    "school_type",
+    "cohort",
+    "stat_name",
+    "unit",
+    "percentile",
+    "term",
+    "notes",
+)
+
+METRIC_SCHEMA = pa.schema(
+    [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in METRIC_TEXT_FIELDS]
+    + [
+        pa.field("stat_value_numeric", pa.float64()),
+        pa.field("stat_value_text", pa.string()),
+        pa.field("year", pa.int32()),
+        pa.field("citation_ids", pa.list_(pa.int32())),
+    ]
+)
+
+
+def repeat_value(value: Any, length: int) -> pa.DictionaryArray:
+    if value is None:
+        return pa.DictionaryArray.from_arrays(pa.nulls(length, pa.int32()), pa.array([], pa.string()))
+    return pa.DictionaryArray.from_arrays(pa.array(np.zeros(length, dtype=np.int32)), pa.array([value], pa.string()))
+
+
+def single_citation_ids(indices: Any) -> pa.ListArray:
+    values = pa.array(np.asarray(indices, dtype=np.int32))
+    return pa.ListArray.from_arrays(pa.array(np.arange(len(values) + 1, dtype=np.int32)), values)
+
+
+@dataclass(frozen=True)
+class MetricBatch:
+    table: pa.Table
+    citations: tuple[CitationPayload, ...] = ()
+
+    @classmethod
+    def empty(cls) -> MetricBatch:
+        return cls(METRIC_SCHEMA.empty_table())
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, Any], citations: Sequence[CitationPayload]) -> MetricBatch:
+        arrays = []
+        for field in METRIC_SCHEMA:
+            column = columns[field.name]
+            if not isinstance(column, (pa.Array, pa.ChunkedArray)):
+                column = pa.array(column, type=field.type.value_type if pa.types.is_dictionary(field.type) else None)
+            if pa.types.is_dictionary(field.type) and not pa.types.is_dictionary(column.type):
+                column = column.dictionary_encode()
+            arrays.append(column.cast(field.type) if column.type != field.type else column)
+        return cls(pa.Table.from_arrays(arrays, schema=METRIC_SCHEMA), tuple(citations))
+
+    @classmethod
+    def from_payloads(cls, payloads: Iterable[MetricPayload]) -> MetricBatch:
+        citation_index: dict[tuple[Any, ...], int] = {}
+        citations: list[CitationPayload] = []
+        columns: dict[str, list[Any]] = {field.name: [] for field in METRIC_SCHEMA}
+        for payload in payloads:
+            for name in METRIC_TEXT_FIELDS + ("stat_value_numeric", "stat_value_text", "year"):
+                columns[name].append(getattr(payload, name))
+            ids = []
+            for citation in payload.citations or []:
+                key = astuple(citation)
+                if key not in citation_index:
+                    citation_index[key] = len(citations)
+                    citations.append(citation)
+                ids.append(citation_index[key])
+            columns["citation_ids"].append(ids)
+        return cls.from_columns(columns, citations)
+
+    @classmethod
+    def concat(cls, batches: Iterable[MetricBatch]) -> MetricBatch:
+        tables: list[pa.Table] = []
+        citation_index: dict[tuple[Any, ...], int] = {}
+        citations: list[CitationPayload] = []
+        for batch in batches:
+            remap = []
+            for citation in batch.citations:
+                key = astuple(citation)
+                if key not in citation_index:
+                    citation_index[key] = len(citations)
+                    citations.append(citation)
+                remap.append(citation_index[key])
+            ids = batch.table.column("citation_ids").combine_chunks()
+            offsets, values = ids.offsets, ids.values.to_numpy(zero_copy_only=False)
+            remapped = pa.ListArray.from_arrays(offsets, pa.array(np.asarray(remap, dtype=np.int32)[values]))
+            tables.append(batch.table.set_column(batch.table.schema.get_field_index("citation_ids"), "citation_ids", remapped))
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return cls(tables[0], tuple(citations))
+        return cls(pa.concat_tables(tables).unify_dictionaries(), tuple(citations))
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def rows(self, chunk_size: int = 10_000) -> Iterator[dict[str, Any]]:
+        for record_batch in self.table.to_batches(max_chunksize=chunk_size):
+            yield from record_batch.to_pylist()
+
+    def __iter__(self) -> Iterator[MetricPayload]:
+        for row in self.rows():
+            citation_ids = row.pop("citation_ids")
+            yield MetricPayload(**row, citations=[self.citations[index] for index in citation_ids])
+
+
 @dataclass
 class AdapterResult:
     dataset: DatasetPayload
-    metrics: List[MetricPayload]
+    metrics: MetricBatch
+    chunks: Iterator[MetricBatch] | None = None
+    export: FetchedExport | None = None
+
+    def batches(self) -> Iterator[MetricBatch]:
+        if self.chunks is None:
+            yield self.metrics
+        else:
+            yield from self.chunks
+
+    def close(self) -> None:
+        close = getattr(self.chunks, "close", None)
+        if close is not None:
+            close()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+from pathlib import Path
 from typing import Optional
 
 import typer
@@ -9,8 +10,16 @@ from sqlalchemy import func, select
 from scholarharvester.config import config
 from scholarharvester.database import get_session
 from scholarharvester.models import Citation, Dataset, Institution, Metric
-from scholarharvester.services.college_scorecard import sync_college_scorecard
-from scholarharvester.services.runner import list_adapters, run_adapter
+from scholarharvester.services.college_scorecard import import_scorecard_bulk, sync_college_scorecard
+from scholarharvester.services.runner import (
+    INGEST_MODES,
+    IngestMode,
+    list_adapters,
+    replay_dataset,
+    run_adapter,
+    run_all,
+)
+from scholarharvester.transport import transport
 
 app = typer.Typer(help="ScholarHarvester CLI")
 
@@ -27,21 +36,91 @@ def _list_adapters() -> None:
 def _ensure_models_loaded() -> None:
     pass
 
+def _ingest_mode(ingest_mode: Optional[IngestMode]) -> str:
+    if ingest_mode is not None:
+        return ingest_mode.value
+    if config.ingest_mode not in INGEST_MODES:
+        raise typer.BadParameter(
+            f"SCHOLARHARVESTER_INGEST_MODE must be one of {', '.join(INGEST_MODES)}, got {config.ingest_mode!r}",
+            param_hint="--ingest-mode",
+        )
+    return config.ingest_mode
+
 @data_app.command("run")
 def run(
     adapter: str = typer.Argument(...),
     since: Optional[int] = typer.Option(None, help="Filter by year"),
     campus: Optional[str] = typer.Option(None, help="Limit campus"),
-    save_raw: bool = typer.Option(False, help="Save raw file records"),
+    save_raw: bool = typer.Option(False, help="Archive the fetched export for offline replay"),
+    chunk_size: Optional[int] = typer.Option(None, help="Stream the export in chunks of this many rows"),
+    force: bool = typer.Option(False, help="Rebuild even if the export matches the last completed run"),
+    parse_workers: int = typer.Option(config.parse_workers, help="Parse in this many worker processes (0 = in-process)"),
+    ingest_mode: Optional[IngestMode] = typer.Option(
+        None, help="Write with 'insert' statements or 'copy' into staging (defaults to SCHOLARHARVESTER_INGEST_MODE)"
+    ),
 ) -> None:
+    mode = _ingest_mode(ingest_mode)
     params = {}
     if since:
         params["since"] = str(since)
     if campus:
         params["campus"] = campus
+    if chunk_size:
+        params["chunk_size"] = str(chunk_size)
     typer.echo(f"Running {adapter} with {params}")
-    runlog = asyncio.run(run_adapter(adapter, params, save_raw))
-    typer.echo(f"Run completed: {runlog.id} with {runlog.new_records} metrics")
+    runlog = transport.run(
+        run_adapter(adapter, params, save_raw, force=force, parse_workers=parse_workers, ingest_mode=mode)
+    )
+    typer.echo(
+        f"Run {runlog.status}: {runlog.id} with {runlog.new_records} new, {runlog.updated_records} updated "
+        f"and {runlog.unchanged_records} unchanged metrics"
+    )
+    typer.echo(f"HTTP pool: {transport.stats().summary()}")
+
+@data_app.command("run-all")
+def run_all_adapters(
+    adapter: Optional[list[str]] = typer.Option(None, help="Adapter to run (repeatable, defaults to all)"),
+    since: Optional[int] = typer.Option(None, help="Filter by year"),
+    campus: Optional[str] = typer.Option(None, help="Limit campus"),
+    save_raw: bool = typer.Option(False, help="Archive the fetched exports for offline replay"),
+    chunk_size: Optional[int] = typer.Option(None, help="Stream exports in chunks of this many rows"),
+    force: bool = typer.Option(False, help="Rebuild even if an export matches the last completed run"),
+    concurrency: int = typer.Option(config.run_concurrency, help="Adapters to run at the same time"),
+    parse_workers: int = typer.Option(config.parse_workers, help="Parse in this many worker processes (0 = in-process)"),
+    ingest_mode: Optional[IngestMode] = typer.Option(
+        None, help="Write with 'insert' statements or 'copy' into staging (defaults to SCHOLARHARVESTER_INGEST_MODE)"
+    ),
+) -> None:
+    mode = _ingest_mode(ingest_mode)
+    params = {}
+    if since:
+        params["since"] = str(since)
+    if campus:
+        params["campus"] = campus
+    if chunk_size:
+        params["chunk_size"] = str(chunk_size)
+    targets = adapter or list_adapters()
+    typer.echo(f"Running {len(targets)} adapters ({concurrency} at a time) with {params}")
+    summaries = transport.run(
+        run_all(
+            targets,
+            params,
+            save_raw,
+            force=force,
+            concurrency=concurrency,
+            parse_workers=parse_workers,
+            ingest_mode=mode,
+        )
+    )
+    for summary in summaries:
+        detail = summary.error or (
+            f"run {summary.runlog_id} with {summary.metrics} new, {summary.updated} updated "
+            f"and {summary.unchanged} unchanged metrics"
+        )
+        typer.echo(f"{summary.adapter}: {summary.status} in {summary.seconds:.1f}s ({detail})")
+    typer.echo(f"HTTP pool: {transport.stats().summary()}")
+    if any(summary.status == "failed" for summary in summaries):
+        raise typer.Exit(code=1)
 
 @data_app.command("provenance")
 def provenance(
@@ -50,7 +129,7 @@ def provenance(
 ) -> None:
     async def _inner() -> None:
         async with get_session() as session:
-            query = select(Dataset, Metric, Citation).join(Metric).join(Citation)
+            query = select(Dataset, Metric, Citation).join(Metric).join(Metric.citations)
             if year:
                 query = query.where(Dataset.year == year)
             if campus:
@@ -65,19 +144,15 @@ def provenance(
 
 @data_app.command("replay")
 def replay(dataset_id: int) -> None:
-    async def _inner() -> None:
-        async with get_session() as session:
-            dataset = await session.get(Dataset, dataset_id)
-            if not dataset:
-                typer.echo("Dataset not found")
-                raise typer.Exit(code=1)
-            adapter_name = dataset.source.adapter
-            if not adapter_name:
-                typer.echo("No adapter link found")
-                raise typer.Exit(code=1)
-            typer.echo(f"Replaying adapter {adapter_name} for dataset {dataset.id}")
-            await run_adapter(adapter_name, {"campus": dataset.metrics[0].campus}, False)
-    asyncio.run(_inner())
+    try:
+        runlog = asyncio.run(replay_dataset(dataset_id))
+    except ValueError as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"Replayed dataset {dataset_id} from archive: run {runlog.id} with {runlog.new_records} new, "
+        f"{runlog.updated_records} updated and {runlog.unchanged_records} unchanged metrics"
+    )
 
 
 @institutions_app.command("sync-scorecard")
@@ -85,24 +160,51 @@ def sync_scorecard(
     max_records: Optional[int] = typer.Option(None, help="Optional max number of institutions to import"),
     per_page: int = typer.Option(100, min=1, max=100, help="API page size"),
     state: Optional[str] = typer.Option(None, help="Optional two-letter state filter"),
+    concurrency: int = typer.Option(
+        config.scorecard_concurrency, min=1, help="Pages to fetch from the Scorecard API at the same time"
+    ),
+    commit_pages: int = typer.Option(
+        config.scorecard_commit_pages, min=1, help="Pages to write per database commit"
+    ),
+    resume: bool = typer.Option(
+        False, "--resume", help="Continue the last unfinished sync for this state and page size"
+    ),
 ) -> None:
     api_key = config.college_scorecard_api_key
     if not api_key:
         typer.echo("COLLEGE_SCORECARD_API_KEY is required")
         raise typer.Exit(code=1)
 
-    summary = asyncio.run(
+    summary = transport.run(
         sync_college_scorecard(
             api_key=api_key,
             per_page=per_page,
             max_records=max_records,
             state=state,
+            concurrency=concurrency,
+            commit_pages=commit_pages,
+            resume=resume,
         )
     )
+    if summary["start_page"]:
+        typer.echo(f"Resumed run {summary['run_id']} at page {summary['start_page']}")
     typer.echo(
-        f"Imported {summary['imported']} institutions across {summary['pages']} pages"
+        f"Imported {summary['imported']} institutions across {summary['pages']} pages in {summary['commits']} commits"
         + (f" (source total: {summary['source_total']})" if summary["source_total"] is not None else "")
     )
+    typer.echo(f"{summary['inserted']} new, {summary['updated']} updated, {summary['unchanged']} unchanged")
+
+
+@institutions_app.command("import-bulk")
+def import_bulk(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="Most Recent Cohorts institution CSV"),
+    state: Optional[str] = typer.Option(None, help="Optional two-letter state filter"),
+) -> None:
+    summary = asyncio.run(import_scorecard_bulk(path, state=state))
+    typer.echo(
+        f"Imported {summary['imported']} institutions from {summary['scanned']} rows in {path.name}: "
+        f"{summary['inserted']} new, {summary['updated']} updated, {summary['unchanged']} unchanged"
+    )
 
 
 @institutions_app.command("count")
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from pathlib import Path
 
 from dotenv import load_dotenv
 
@@ -18,6 +19,29 @@ class Config:
         "SCHOLAR_HARVESTER_USER_AGENT", "ScholarHarvester/1.0 (+contact@scholarstack.org)"
     )
     college_scorecard_api_key: str = os.environ.get("COLLEGE_SCORECARD_API_KEY", "")
+    scorecard_concurrency: int = int(os.environ.get("SCHOLARHARVESTER_SCORECARD_CONCURRENCY", "4"))
+    scorecard_max_attempts: int = int(os.environ.get("SCHOLARHARVESTER_SCORECARD_MAX_ATTEMPTS", "5"))
+    scorecard_queue_pages: int = int(os.environ.get("SCHOLARHARVESTER_SCORECARD_QUEUE_PAGES", "8"))
+    scorecard_commit_pages: int = int(os.environ.get("SCHOLARHARVESTER_SCORECARD_COMMIT_PAGES", "20"))
+    run_concurrency: int = int(os.environ.get("SCHOLARHARVESTER_CONCURRENCY", "4"))
+    parse_workers: int = int(os.environ.get("SCHOLARHARVESTER_PARSE_WORKERS", "0"))
+    write_batch_size: int = int(os.environ.get("SCHOLARHARVESTER_WRITE_BATCH_SIZE", "1000"))
+    bulk_write_threshold: int = int(os.environ.get("SCHOLARHARVESTER_BULK_WRITE_THRESHOLD", "500"))
+    ingest_mode: str = os.environ.get("SCHOLARHARVESTER_INGEST_MODE", "insert")
+    chunk_size: int = int(os.environ.get("SCHOLARHARVESTER_CHUNK_SIZE", "0"))
+    cache_dir: str = os.environ.get(
+        "SCHOLARHARVESTER_CACHE_DIR", str(Path(__file__).resolve().parents[2] / ".cache")
+    )
+    http_max_connections: int = int(os.environ.get("SCHOLARHARVESTER_HTTP_MAX_CONNECTIONS", "20"))
+    http_max_keepalive: int = int(os.environ.get("SCHOLARHARVESTER_HTTP_MAX_KEEPALIVE", "10"))
+    http2: bool = os.environ.get("SCHOLARHARVESTER_HTTP2") == "1"
+    http_timeout_seconds: float = float(os.environ.get("SCHOLARHARVESTER_HTTP_TIMEOUT", "60"))
+    robots_ttl_seconds: float = float(os.environ.get("SCHOLARHARVESTER_ROBOTS_TTL", "86400"))
+    discovery_ttl_seconds: float = float(os.environ.get("SCHOLARHARVESTER_DISCOVERY_TTL", "86400"))
+    registry_cache: bool = os.environ.get("SCHOLARHARVESTER_REGISTRY_CACHE", "1") == "1"
+    archive_dir: str = os.environ.get(
+        "SCHOLARHARVESTER_ARCHIVE_DIR", str(Path(__file__).resolve().parents[2] / "raw_archive")
+    )
     legal_notes_path: str = "LEGAL_NOTES.md"
     provenance_path: str = "DATA_PROVENANCE.md"
 
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import enum
+from decimal import Decimal
+from typing import Any, Iterable, Mapping
+
+from scholarharvester.staging import METRIC_DEDUPE_KEY, METRIC_VALUE_COLUMNS, DeltaStats
+
+METRIC_KEY_COLUMNS = METRIC_DEDUPE_KEY[1:]
+
+MetricKey = tuple[Any, ...]
+MetricState = tuple[Any, ...]
+
+
+def _comparable(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def metric_key(row: Mapping[str, Any]) -> MetricKey:
+    return tuple(_comparable(row[column]) for column in METRIC_KEY_COLUMNS)
+
+
+def metric_state(row: Mapping[str, Any]) -> MetricState:
+    return tuple(_comparable(row[column]) for column in METRIC_VALUE_COLUMNS)
+
+
+class MetricDelta:
+    def __init__(self, existing: dict[MetricKey, tuple[int | None, MetricState]]) -> None:
+        self.known = existing
+        self.new = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    def classify(
+        self, rows: Iterable[dict[str, Any]]
+    ) -> tuple[list[dict[str, Any]], list[tuple[int | None, dict[str, Any]]]]:
+        fresh: dict[MetricKey, dict[str, Any]] = {}
+        changed: dict[MetricKey, tuple[int | None, dict[str, Any]]] = {}
+        for row in rows:
+            key = metric_key(row)
+            if key in fresh:
+                fresh[key] = row
+            elif key in changed:
+                changed[key] = (changed[key][0], row)
+            elif key not in self.known:
+                fresh[key] = row
+            elif self.known[key][1] != metric_state(row):
+                changed[key] = (self.known[key][0], row)
+            else:
+                self.unchanged += 1
+        for key, row in fresh.items():
+            self.known[key] = (None, metric_state(row))
+        for key, (metric_id, row) in changed.items():
+            self.known[key] = (metric_id, metric_state(row))
+        self.new += len(fresh)
+        self.updated += len(changed)
+        return list(fresh.values()), list(changed.values())
+
+    def remember(self, rows: Iterable[Mapping[str, Any]], metric_ids: Iterable[int | None]) -> None:
+        for row, metric_id in zip(rows, metric_ids):
+            if metric_id is not None:
+                self.known[metric_key(row)] = (metric_id, metric_state(row))
+
+    @property
+    def stats(self) -> DeltaStats:
+        return DeltaStats(self.new, self.updated, self.unchanged)
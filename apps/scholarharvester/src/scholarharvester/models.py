@@ -69,6 +69,7 @@ class FileIngest(Base):
 
     id = Column(Integer, primary_key=True)
     dataset_id = Column(Integer, ForeignKey("dataset.id"), nullable=False)
+    runlog_id = Column(Integer, ForeignKey("runlog.id"), nullable=True, index=True)
     url = Column(String, nullable=False)
     fetched_at = Column(DateTime, default=datetime.utcnow)
     mime = Column(String, nullable=True)
@@ -76,6 +77,7 @@ class FileIngest(Base):
     sha256 = Column(String, nullable=True)
     http_status = Column(Integer, nullable=True)
     robots_rule = Column(String, nullable=True)
+    archive_key = Column(String, nullable=True)
     status = Column(String, nullable=False, default="needs_review")
 
     dataset = relationship("Dataset", back_populates="file_ingests")
@@ -114,18 +116,30 @@ class Metric(Base):
     notes = Column(Text, nullable=True)
 
     dataset = relationship("Dataset", back_populates="metrics")
-    citations = relationship("Citation", back_populates="metric")
+    citations = relationship("Citation", secondary="metric_citation", back_populates="metrics")
 
     __table_args__ = (
         Index("ix_metric_year_campus_major", "year", "campus", "major"),
         Index("ix_metric_year_source_school", "year", "source_school"),
+        Index(
+            "metric_dedupe_idx",
+            "dataset_id",
+            "campus",
+            "major",
+            "discipline",
+            "source_school",
+            "stat_name",
+            "year",
+            "term",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
     )
 
 class Citation(Base):
     __tablename__ = "citation"
 
     id = Column(Integer, primary_key=True)
-    metric_id = Column(Integer, ForeignKey("metric.id"), nullable=False)
     title = Column(String, nullable=False)
     publisher = Column(String, nullable=False)
     year = Column(Integer, nullable=False)
@@ -133,7 +147,26 @@ class Citation(Base):
     retrieved_at = Column(DateTime, default=datetime.utcnow)
     interpretation_note = Column(Text, nullable=True)
 
-    metric = relationship("Metric", back_populates="citations")
+    metrics = relationship("Metric", secondary="metric_citation", back_populates="citations")
+
+    __table_args__ = (
+        Index(
+            "citation_dedupe_idx",
+            "title",
+            "publisher",
+            "year",
+            "source_url",
+            "interpretation_note",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+class MetricCitation(Base):
+    __tablename__ = "metric_citation"
+
+    metric_id = Column(Integer, ForeignKey("metric.id", ondelete="CASCADE"), primary_key=True)
+    citation_id = Column(Integer, ForeignKey("citation.id", ondelete="CASCADE"), primary_key=True, index=True)
 
 class Campus(Base):
     __tablename__ = "campus"
@@ -191,6 +224,7 @@ class Institution(Base):
     median_earnings_10yr = Column(Integer, nullable=True)
     latitude = Column(Numeric, nullable=True)
     longitude = Column(Numeric, nullable=True)
+    content_hash = Column(String, nullable=True)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
 class Runlog(Base):
@@ -202,4 +236,31 @@ class Runlog(Base):
     finished_at = Column(DateTime, nullable=True)
     status = Column(String, nullable=False, default="running")
     new_records = Column(Integer, default=0)
+    updated_records = Column(Integer, default=0)
+    unchanged_records = Column(Integer, default=0)
+    params_jsonb = Column(JSON, nullable=True)
     warnings_jsonb = Column(JSON, nullable=True)
+
+
+class ScorecardCheckpoint(Base):
+    __tablename__ = "scorecard_checkpoint"
+
+    id = Column(Integer, primary_key=True)
+    runlog_id = Column(Integer, ForeignKey("runlog.id"), nullable=False)
+    state = Column(String, nullable=True)
+    per_page = Column(Integer, nullable=False)
+    next_page = Column(Integer, nullable=False, default=0)
+    imported = Column(Integer, nullable=False, default=0)
+    source_total = Column(Integer, nullable=True)
+    params_jsonb = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "scorecard_checkpoint_key_idx",
+            "state",
+            "per_page",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
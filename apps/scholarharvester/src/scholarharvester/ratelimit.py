@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlparse
+
+from scholarharvester.registry import load_sources
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or url).lower()
+
+
+class TokenBucket:
+    def __init__(self, interval: float, capacity: float = 1.0) -> None:
+        self.interval = interval
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        if self.interval <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens * self.interval)
+
+
+class HostRateLimiter:
+    def __init__(self, intervals: Callable[[], dict[str, float]] | None = None) -> None:
+        self._load_intervals = intervals
+        self._intervals: dict[str, float] | None = None
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if self._intervals is None:
+            self._intervals = self._load_intervals() if self._load_intervals else {}
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self._intervals.get(host, 0.0))
+        return bucket
+
+    def interval(self, url: str) -> float:
+        with self._lock:
+            return self._bucket(_host(url)).interval
+
+    def tighten(self, url: str, interval: float | None) -> None:
+        if not interval:
+            return
+        with self._lock:
+            bucket = self._bucket(_host(url))
+            bucket.interval = max(bucket.interval, interval)
+
+    def reserve(self, url: str) -> float:
+        with self._lock:
+            return self._bucket(_host(url)).reserve(time.monotonic())
+
+    def acquire(self, url: str) -> None:
+        wait = self.reserve(url)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str) -> None:
+        wait = self.reserve(url)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+def _source_intervals() -> dict[str, float]:
+    intervals: dict[str, float] = {}
+    for source in load_sources():
+        if source.get("base_url"):
+            host = _host(source["base_url"])
+            intervals[host] = max(intervals.get(host, 0.0), float(source.get("throttle_seconds", 2)))
+    return intervals
+
+
+rate_limiter = HostRateLimiter(_source_intervals)
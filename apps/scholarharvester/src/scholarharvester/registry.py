@@ -1,37 +1,157 @@
 from __future__ import annotations
 
+import contextlib
+import fcntl
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Any, Mapping
 
 import yaml
 
+from scholarharvester.config import config
+
 REGISTRY_PATH = Path(__file__).resolve().parents[2] / "SOURCE_REGISTRY.yaml"
 
-class SourceConfig(Dict):
-    pass
+SourceConfig = Mapping[str, Any]
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class SourceRegistry:
+    def __init__(self, path: Path, compiled_path: Path | None = None) -> None:
+        self.path = path
+        self.compiled_path = compiled_path
+        self._stamp: tuple[int, int] | None = None
+        self._sources: tuple[SourceConfig, ...] = ()
+        self._by_adapter: Mapping[str, SourceConfig] = MappingProxyType({})
+        self._by_name: Mapping[str, SourceConfig] = MappingProxyType({})
+        self._lock = threading.Lock()
+
+    def _read_compiled(self, stamp: tuple[int, int]) -> list[dict[str, Any]] | None:
+        if self.compiled_path is None or not self.compiled_path.exists():
+            return None
+        try:
+            compiled = json.loads(self.compiled_path.read_text())
+        except ValueError:
+            return None
+        if compiled.get("path") != str(self.path) or compiled.get("stamp") != list(stamp):
+            return None
+        return compiled["sources"]
+
+    def _write_compiled(self, stamp: tuple[int, int], sources: list[dict[str, Any]]) -> None:
+        if self.compiled_path is None:
+            return
+        staging = self.compiled_path.with_name(f"{self.compiled_path.name}.{os.getpid()}.tmp")
+        try:
+            self.compiled_path.parent.mkdir(parents=True, exist_ok=True)
+            staging.write_text(json.dumps({"path": str(self.path), "stamp": list(stamp), "sources": sources}))
+            os.replace(staging, self.compiled_path)
+        except (OSError, TypeError, ValueError):
+            # The compiled copy only speeds up startup; a read-only cache dir or a YAML value JSON
+            # cannot hold (such as a date) falls back to parsing YAML.
+            with contextlib.suppress(OSError):
+                staging.unlink(missing_ok=True)
+
+    def _refresh(self) -> None:
+        stat = self.path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            sources = self._read_compiled(stamp)
+            if sources is None:
+                with self.path.open("r", encoding="utf-8") as fh:
+                    sources = (yaml.load(fh, Loader=_Loader) or {}).get("sources", [])
+                self._write_compiled(stamp, sources)
+            frozen = _freeze(sources)
+            by_adapter: dict[str, SourceConfig] = {}
+            by_name: dict[str, SourceConfig] = {}
+            for source in frozen:
+                # Keep the first entry per key, matching the linear scan this index replaced.
+                if source.get("adapter"):
+                    by_adapter.setdefault(source["adapter"], source)
+                if source.get("name"):
+                    by_name.setdefault(source["name"], source)
+            self._sources = frozen
+            self._by_adapter = MappingProxyType(by_adapter)
+            self._by_name = MappingProxyType(by_name)
+            self._stamp = stamp
+
+    def sources(self) -> tuple[SourceConfig, ...]:
+        self._refresh()
+        return self._sources
+
+    def by_adapter(self, adapter_name: str) -> SourceConfig | None:
+        self._refresh()
+        return self._by_adapter.get(adapter_name)
+
+    def by_name(self, name: str) -> SourceConfig | None:
+        self._refresh()
+        return self._by_name.get(name)
 
 
-def load_sources() -> List[SourceConfig]:
-    with REGISTRY_PATH.open("r", encoding="utf-8") as fh:
-        doc = yaml.safe_load(fh)
-    return doc.get("sources", [])
+source_registry = SourceRegistry(
+    REGISTRY_PATH, Path(config.cache_dir) / "source_registry.json" if config.registry_cache else None
+)
+
+
+def load_sources() -> tuple[SourceConfig, ...]:
+    return source_registry.sources()
 
 
 def find_source(adapter_name: str) -> SourceConfig | None:
-    for src in load_sources():
-        if src.get("adapter") == adapter_name:
-            return src
-    return None
-
-
-def record_robot_decision(config: SourceConfig, rules: str) -> None:
-    cache_path = REGISTRY_PATH.with_suffix(".robots.json")
-    existing = {}
-    if cache_path.exists():
-        existing = json.loads(cache_path.read_text())
-    existing[config["adapter"]] = {
-        "rules": rules,
-        "base_url": config.get("base_url"),
-    }
-    cache_path.write_text(json.dumps(existing, indent=2))
+    return source_registry.by_adapter(adapter_name)
+
+
+def find_source_by_name(name: str) -> SourceConfig | None:
+    return source_registry.by_name(name)
+
+
+class ColumnMappingCache:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, Any]:
+        return json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def _load(self) -> dict[str, Any]:
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def get(self, adapter_name: str, fingerprint: str) -> dict[str, Any] | None:
+        key = f"{adapter_name}:{fingerprint}"
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                # Another worker or harvest process may have mapped this header set since we loaded.
+                self._entries = self._read()
+                entry = self._entries.get(key)
+            return entry
+
+    def put(self, adapter_name: str, fingerprint: str, entry: dict[str, Any]) -> None:
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        with self._lock, lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._read()
+            entries[f"{adapter_name}:{fingerprint}"] = entry
+            staging = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            staging.write_text(json.dumps(entries, indent=2, sort_keys=True))
+            os.replace(staging, self.path)
+            self._entries = entries
+
+
+column_mappings = ColumnMappingCache(REGISTRY_PATH.with_suffix(".columns.json"))
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from scholarharvester.config import config
+from scholarharvester.registry import REGISTRY_PATH
+from scholarharvester.transport import transport
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+@dataclass
+class RobotsRules:
+    origin: str
+    text: str
+    fetched_at: float
+    parser: RobotFileParser = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.parser = RobotFileParser(f"{self.origin}/robots.txt")
+        self.parser.parse(self.text.splitlines())
+
+    def can_fetch(self, url: str, agent: str) -> bool:
+        return self.parser.can_fetch(agent, url)
+
+    def crawl_delay(self, agent: str) -> float | None:
+        delay = self.parser.crawl_delay(agent)
+        return float(delay) if delay is not None else None
+
+
+class RobotsCache:
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: float,
+        user_agent: str,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.agent = user_agent.split("/")[0]
+        self.client = client
+        self._rules: dict[str, RobotsRules] | None = None
+        self._inflight: dict[str, asyncio.Task[RobotsRules]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, RobotsRules]:
+        stored: dict[str, Any] = json.loads(self.path.read_text()) if self.path.exists() else {}
+        return {
+            origin: RobotsRules(origin, entry["text"], entry["fetched_at"])
+            for origin, entry in stored.items()
+            if "fetched_at" in entry
+        }
+
+    def _load(self) -> dict[str, RobotsRules]:
+        if self._rules is None:
+            self._rules = self._read()
+        return self._rules
+
+    def _save(self, rules: RobotsRules) -> None:
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        with lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Other harvest processes share this file, so keep whichever copy of each origin is freshest.
+            merged = self._read()
+            for origin, known in self._load().items():
+                if origin not in merged or merged[origin].fetched_at < known.fetched_at:
+                    merged[origin] = known
+            merged[rules.origin] = rules
+            stored = {
+                origin: {"text": entry.text, "fetched_at": entry.fetched_at} for origin, entry in sorted(merged.items())
+            }
+            staging = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            staging.write_text(json.dumps(stored, indent=2))
+            os.replace(staging, self.path)
+            self._rules = merged
+
+    def cached(self, url: str) -> RobotsRules | None:
+        with self._lock:
+            return self._load().get(_origin(url))
+
+    def can_fetch(self, url: str) -> bool:
+        rules = self.cached(url)
+        return rules is None or rules.can_fetch(url, self.agent)
+
+    async def _refresh(self, origin: str, stale: RobotsRules | None) -> RobotsRules:
+        client = self.client or transport.async_client()
+        try:
+            response = await client.get(f"{origin}/robots.txt", timeout=10)
+        except httpx.HTTPError:
+            response = None
+        if response is None or response.status_code >= 500:
+            return stale or RobotsRules(origin, "", 0.0)
+        text = response.text if response.status_code < 400 else ""
+        rules = RobotsRules(origin, text, time.time())
+        with self._lock:
+            self._save(rules)
+        return rules
+
+    def _finished(self, origin: str, task: asyncio.Task[RobotsRules]) -> None:
+        if self._inflight.get(origin) is task:
+            del self._inflight[origin]
+
+    async def ensure(self, url: str) -> RobotsRules:
+        origin = _origin(url)
+        rules = self.cached(url)
+        if rules and time.time() - rules.fetched_at < self.ttl_seconds:
+            return rules
+        task = self._inflight.get(origin)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._refresh(origin, rules))
+            self._inflight[origin] = task
+            task.add_done_callback(partial(self._finished, origin))
+        return await task
+
+    async def allowed(self, url: str) -> bool:
+        if urlparse(url).scheme not in {"http", "https"}:
+            return True
+        return (await self.ensure(url)).can_fetch(url, self.agent)
+
+
+robots = RobotsCache(REGISTRY_PATH.with_suffix(".robots.json"), config.robots_ttl_seconds, config.user_agent)
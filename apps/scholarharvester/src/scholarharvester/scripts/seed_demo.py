@@ -65,6 +65,14 @@ async def main() -> None:
             ("UC Irvine", "Mathematics", 3.25),
             ("UC Irvine", "Mathematics", 3.6),
         ]
+        citation = Citation(
+            title="UC Irvine transfer Mathematics median",
+            publisher="UC Info Center",
+            year=2024,
+            source_url="https://www.universityofcalifornia.edu/infocenter",
+            interpretation_note="Seeded demo value; verify with official report.",
+        )
+        session.add(citation)
         for idx, (campus, major, value) in enumerate(metric_values, start=25):
             metric = Metric(
                 dataset_id=dataset.id,
@@ -75,18 +83,10 @@ async def main() -> None:
                 stat_value_numeric=value,
                 year=2024,
                 term="Fall",
+                citations=[citation],
             )
             session.add(metric)
             await session.flush()
-            citation = Citation(
-                metric_id=metric.id,
-                title=f"UC Irvine transfer {major} median",
-                publisher="UC Info Center",
-                year=2024,
-                source_url="https://www.universityofcalifornia.edu/infocenter",
-                interpretation_note="Seeded demo value; verify with official report.",
-            )
-            session.add(citation)
 
         await session.commit()
 
@@ -1,44 +1,35 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import hashlib
+import json
+import logging
+import math
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Mapping
 
 import httpx
-from sqlalchemy import func
+import pandas as pd
+from sqlalchemy import func, literal_column, or_, select, update
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from scholarharvester.config import config
 from scholarharvester.database import get_session
-from scholarharvester.models import Institution
+from scholarharvester.models import Institution, Runlog, ScorecardCheckpoint
+from scholarharvester.ratelimit import rate_limiter
+from scholarharvester.transport import transport
+
+logger = logging.getLogger(__name__)
 
 SCORECARD_URL = "https://api.data.gov/ed/collegescorecard/v1/schools"
-SCORECARD_FIELDS = [
-    "id",
-    "school.name",
-    "school.city",
-    "school.state",
-    "school.zip",
-    "school.school_url",
-    "school.price_calculator_url",
-    "school.locale",
-    "school.locale_id",
-    "school.ownership",
-    "school.carnegie_basic",
-    "school.degrees_awarded.predominant",
-    "school.main_campus",
-    "school.operating",
-    "latest.student.size",
-    "latest.admissions.admission_rate.overall",
-    "latest.admissions.sat_scores.average.overall",
-    "latest.admissions.act_scores.midpoint.cumulative",
-    "latest.cost.avg_net_price.overall",
-    "latest.cost.tuition.in_state",
-    "latest.cost.tuition.out_of_state",
-    "latest.aid.percent_receiving_federal_student_aid",
-    "latest.completion.rate",
-    "latest.student.retention_rate.four_year.full_time",
-    "latest.earnings.10_yrs_after_entry.median",
-    "location.lat",
-    "location.lon",
-]
+SCORECARD_SOURCE = "College Scorecard"
 
 OWNERSHIP_LABELS = {
     1: "Public",
@@ -53,6 +44,11 @@ DEGREE_LABELS = {
     4: "Graduate",
 }
 
+RETRY_STATUSES = {429, 502, 503, 504}
+# api.data.gov quotas are hourly; once few requests remain, spread the rest over the window.
+QUOTA_WINDOW_SECONDS = 3600
+QUOTA_LOW_WATERMARK = 0.1
+
 LOCALE_LABELS = {
     11: "City: Large",
     12: "City: Midsize",
@@ -103,56 +99,175 @@ def _normalize_website(value: Any) -> str | None:
     return f"https://{website}"
 
 
-def _map_row(result: dict[str, Any]) -> dict[str, Any] | None:
-    school = result.get("school") or {}
-    latest = result.get("latest") or {}
-    admissions = latest.get("admissions") or {}
-    cost = latest.get("cost") or {}
-    aid = latest.get("aid") or {}
-    student = latest.get("student") or {}
-    earnings = latest.get("earnings") or {}
-    location = result.get("location") or {}
-
-    if school.get("operating") == 0 or school.get("main_campus") == 0:
-        return None
-
-    external_id = _as_str(result.get("id"))
-    name = _as_str(school.get("name"))
-    if not external_id or not name:
-        return None
-
-    ownership_code = _as_int(school.get("ownership"))
-    degree_code = _as_int(school.get("degrees_awarded", {}).get("predominant"))
-    locale_code = _as_int(school.get("locale_id"))
-
-    return {
-        "external_id": external_id,
-        "source": "College Scorecard",
-        "name": name,
-        "city": _as_str(school.get("city")),
-        "state": _as_str(school.get("state")),
-        "zip": _as_str(school.get("zip")),
-        "control": OWNERSHIP_LABELS.get(ownership_code),
-        "locale": LOCALE_LABELS.get(locale_code) or _as_str(school.get("locale")),
-        "locale_code": locale_code,
-        "carnegie_basic": _as_str(school.get("carnegie_basic")),
-        "highest_degree": DEGREE_LABELS.get(degree_code),
-        "website": _normalize_website(school.get("school_url")),
-        "price_calculator_url": _normalize_website(school.get("price_calculator_url")),
-        "student_size": _as_int(student.get("size")),
-        "admission_rate": _as_float(admissions.get("admission_rate", {}).get("overall")),
-        "sat_average": _as_int(admissions.get("sat_scores", {}).get("average", {}).get("overall")),
-        "act_midpoint": _as_float(admissions.get("act_scores", {}).get("midpoint", {}).get("cumulative")),
-        "avg_net_price": _as_int(cost.get("avg_net_price", {}).get("overall")),
-        "tuition_in_state": _as_int(cost.get("tuition", {}).get("in_state")),
-        "tuition_out_of_state": _as_int(cost.get("tuition", {}).get("out_of_state")),
-        "federal_aid_rate": _as_float(aid.get("percent_receiving_federal_student_aid")),
-        "completion_rate": _as_float((latest.get("completion") or {}).get("rate")),
-        "retention_rate": _as_float((student.get("retention_rate") or {}).get("four_year", {}).get("full_time")),
-        "median_earnings_10yr": _as_int((earnings.get("10_yrs_after_entry") or {}).get("median")),
-        "latitude": _as_float(location.get("lat")),
-        "longitude": _as_float(location.get("lon")),
-    }
+@dataclass(frozen=True)
+class ScorecardField:
+    column: str
+    path: str
+    convert: Callable[[Any], Any]
+    labels: Mapping[int, str] | None = None
+    fallback: str | None = None
+    required: bool = False
+
+
+SCORECARD_MAP = (
+    ScorecardField("external_id", "id", _as_str, required=True),
+    ScorecardField("name", "school.name", _as_str, required=True),
+    ScorecardField("city", "school.city", _as_str),
+    ScorecardField("state", "school.state", _as_str),
+    ScorecardField("zip", "school.zip", _as_str),
+    ScorecardField("control", "school.ownership", _as_int, OWNERSHIP_LABELS),
+    ScorecardField("locale", "school.locale_id", _as_int, LOCALE_LABELS, fallback="school.locale"),
+    ScorecardField("locale_code", "school.locale_id", _as_int),
+    ScorecardField("carnegie_basic", "school.carnegie_basic", _as_str),
+    ScorecardField("highest_degree", "school.degrees_awarded.predominant", _as_int, DEGREE_LABELS),
+    ScorecardField("website", "school.school_url", _normalize_website),
+    ScorecardField("price_calculator_url", "school.price_calculator_url", _normalize_website),
+    ScorecardField("student_size", "latest.student.size", _as_int),
+    ScorecardField("admission_rate", "latest.admissions.admission_rate.overall", _as_float),
+    ScorecardField("sat_average", "latest.admissions.sat_scores.average.overall", _as_int),
+    ScorecardField("act_midpoint", "latest.admissions.act_scores.midpoint.cumulative", _as_float),
+    ScorecardField("avg_net_price", "latest.cost.avg_net_price.overall", _as_int),
+    ScorecardField("tuition_in_state", "latest.cost.tuition.in_state", _as_int),
+    ScorecardField("tuition_out_of_state", "latest.cost.tuition.out_of_state", _as_int),
+    ScorecardField("federal_aid_rate", "latest.aid.percent_receiving_federal_student_aid", _as_float),
+    ScorecardField("completion_rate", "latest.completion.rate", _as_float),
+    ScorecardField("retention_rate", "latest.student.retention_rate.four_year.full_time", _as_float),
+    ScorecardField("median_earnings_10yr", "latest.earnings.10_yrs_after_entry.median", _as_int),
+    ScorecardField("latitude", "location.lat", _as_float),
+    ScorecardField("longitude", "location.lon", _as_float),
+)
+# Rows where either flag is 0 are closed schools or branch campuses and are skipped.
+SCORECARD_FILTERS = ("school.operating", "school.main_campus")
+SCORECARD_FIELDS = list(
+    dict.fromkeys(
+        [
+            *(field.path for field in SCORECARD_MAP),
+            *(field.fallback for field in SCORECARD_MAP if field.fallback),
+            *SCORECARD_FILTERS,
+        ]
+    )
+)
+
+# Column names in the "Most Recent Cohorts" institution CSV for each API field. A tuple takes the first
+# non-empty column, e.g. net price is published separately for public and private schools.
+BULK_COLUMNS: dict[str, str | tuple[str, ...]] = {
+    "id": "UNITID",
+    "school.name": "INSTNM",
+    "school.city": "CITY",
+    "school.state": "STABBR",
+    "school.zip": "ZIP",
+    "school.school_url": "INSTURL",
+    "school.price_calculator_url": "NPCURL",
+    "school.locale": "LOCALE",
+    "school.locale_id": "LOCALE",
+    "school.ownership": "CONTROL",
+    "school.carnegie_basic": "CCBASIC",
+    "school.degrees_awarded.predominant": "PREDDEG",
+    "school.main_campus": "MAIN",
+    "school.operating": "CURROPER",
+    "latest.student.size": "UGDS",
+    "latest.admissions.admission_rate.overall": "ADM_RATE",
+    "latest.admissions.sat_scores.average.overall": "SAT_AVG",
+    "latest.admissions.act_scores.midpoint.cumulative": "ACTCMMID",
+    "latest.cost.avg_net_price.overall": ("NPT4_PUB", "NPT4_PRIV"),
+    "latest.cost.tuition.in_state": "TUITIONFEE_IN",
+    "latest.cost.tuition.out_of_state": "TUITIONFEE_OUT",
+    "latest.completion.rate": ("C150_4", "C150_L4"),
+    "latest.student.retention_rate.four_year.full_time": "RET_FT4",
+    "latest.earnings.10_yrs_after_entry.median": "MD_EARN_WNE_P10",
+    "location.lat": "LATITUDE",
+    "location.lon": "LONGITUDE",
+}
+BULK_NULLS = ["NULL", "PrivacySuppressed"]
+# Institution columns whose API field has no bulk equivalent; a bulk import leaves them as the API last set them.
+BULK_SKIPPED_COLUMNS = ("federal_aid_rate",)
+
+# JSON already decodes most values to the target type; the converter only runs for anything else.
+_NATIVE_TYPES: dict[Callable[[Any], Any], type] = {_as_int: int, _as_float: float, _as_str: str}
+
+
+def _compile_extractor(
+    fields: Iterable[ScorecardField] = SCORECARD_MAP, *, exclude: Iterable[str] = ()
+) -> Callable[[Mapping[str, Any]], dict[str, Any] | None]:
+    # Flatten the field table once so mapping a dotted-path record is one dict lookup and at most
+    # one converter call per field.
+    exclude = set(exclude)
+    steps = [
+        (
+            field.column,
+            field.path,
+            _NATIVE_TYPES.get(field.convert),
+            field.convert,
+            field.labels,
+            field.fallback,
+            field.required,
+        )
+        for field in fields
+        if field.column not in exclude
+    ]
+
+    def extract(record: Mapping[str, Any]) -> dict[str, Any] | None:
+        for path in SCORECARD_FILTERS:
+            if _as_int(record.get(path)) == 0:
+                return None
+        row: dict[str, Any] = {}
+        for column, path, native, convert, labels, fallback, required in steps:
+            value = record.get(path)
+            if value.__class__ is not native:
+                value = convert(value)
+            elif native is str:
+                value = value.strip() or None
+            if labels is not None:
+                value = labels.get(value)
+            if fallback is not None and not value:
+                value = _as_str(record.get(fallback))
+            if required and not value:
+                return None
+            row[column] = value
+            if column == "external_id":
+                row["source"] = SCORECARD_SOURCE
+        return row
+
+    return extract
+
+
+_map_row = _compile_extractor()
+
+
+def _bulk_columns(field: str) -> tuple[str, ...]:
+    columns = BULK_COLUMNS[field]
+    return (columns,) if isinstance(columns, str) else columns
+
+
+def _bulk_records(frame: pd.DataFrame) -> list[dict[str, Any]]:
+    fields = [field for field in SCORECARD_FIELDS if field in BULK_COLUMNS]
+    columns = []
+    for field in fields:
+        values = pd.Series(None, index=frame.index, dtype=object)
+        for column in _bulk_columns(field):
+            if column in frame:
+                values = values.fillna(frame[column].astype(object))
+        columns.append(values.where(values.notna(), None).tolist())
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+def _retry_after(response: httpx.Response, attempt: int) -> float:
+    value = response.headers.get("Retry-After")
+    if value:
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    return float(2**attempt)
+
+
+def _note_quota(response: httpx.Response) -> None:
+    limit = _as_int(response.headers.get("X-RateLimit-Limit"))
+    remaining = _as_int(response.headers.get("X-RateLimit-Remaining"))
+    if limit and remaining is not None and remaining < limit * QUOTA_LOW_WATERMARK:
+        rate_limiter.tighten(SCORECARD_URL, QUOTA_WINDOW_SECONDS / limit)
 
 
 async def _fetch_page(
@@ -166,7 +281,7 @@ async def _fetch_page(
     params = {
         "api_key": api_key,
         "fields": ",".join(SCORECARD_FIELDS),
-        "keys_nested": "true",
+        "keys_nested": "false",
         "per_page": per_page,
         "page": page,
         "school.operating": 1,
@@ -176,68 +291,356 @@ async def _fetch_page(
     if state:
         params["school.state"] = state.upper()
 
-    response = await client.get(SCORECARD_URL, params=params)
-    response.raise_for_status()
-    return response.json()
+    for attempt in range(config.scorecard_max_attempts):
+        response = await client.get(SCORECARD_URL, params=params)
+        if response.status_code in RETRY_STATUSES and attempt + 1 < config.scorecard_max_attempts:
+            delay = _retry_after(response, attempt)
+            logger.warning("Scorecard page %d returned %d; retrying in %.0fs", page, response.status_code, delay)
+            await asyncio.sleep(delay)
+            continue
+        response.raise_for_status()
+        _note_quota(response)
+        return response.json()
+    raise RuntimeError(f"Scorecard page {page} failed after {config.scorecard_max_attempts} attempts")
 
 
-async def sync_college_scorecard(
-    *,
-    api_key: str,
-    per_page: int = 100,
-    max_records: int | None = None,
-    state: str | None = None,
-) -> dict[str, int | None]:
-    page = 0
-    imported = 0
-    source_total: int | None = None
+def _map_page(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    # Pages are requested with keys_nested=false, so each result is already a flat {"school.name": ...} record.
+    return [row for result in payload.get("results") or [] if (row := _map_row(result))]
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        while True:
-            payload = await _fetch_page(client, api_key=api_key, page=page, per_page=per_page, state=state)
-            if source_total is None:
-                source_total = _as_int((payload.get("metadata") or {}).get("total"))
 
-            raw_results = payload.get("results") or []
-            rows = []
-            for result in raw_results:
-                mapped = _map_row(result)
-                if mapped:
-                    rows.append(mapped)
+def _page_count(source_total: int | None, per_page: int, max_records: int | None) -> int | None:
+    if source_total is None:
+        return None
+    pages = math.ceil(source_total / per_page)
+    if max_records is not None:
+        pages = min(pages, math.ceil(max_records / per_page))
+    return pages
 
-            if not rows:
-                break
 
-            if max_records is not None:
-                remaining = max_records - imported
-                if remaining <= 0:
-                    break
-                rows = rows[:remaining]
-
-            async with get_session() as session:
-                statement = insert(Institution).values(rows)
-                update_columns = {
-                    key: getattr(statement.excluded, key)
-                    for key in rows[0].keys()
-                    if key not in {"external_id"}
-                }
-                update_columns["updated_at"] = func.now()
+async def _ordered_pages(
+    fetch: Callable[[int], Awaitable[dict[str, Any]]],
+    first: dict[str, Any],
+    start_page: int,
+    page_count: int | None,
+    per_page: int,
+    window: int,
+) -> AsyncIterator[dict[str, Any]]:
+    yield first
+    if page_count is None:
+        page, payload = start_page + 1, first
+        while len(payload.get("results") or []) >= per_page:
+            payload = await fetch(page)
+            yield payload
+            page += 1
+        return
+    # Page k + window is only requested once page k has been taken, so a slow writer stalls the fetches
+    # and a failed page wastes at most `window` requests.
+    pages = iter(range(start_page + 1, page_count))
+    pending = deque(asyncio.ensure_future(fetch(page)) for page in islice(pages, window))
+    try:
+        while pending:
+            payload = await pending[0]
+            pending.popleft()
+            yield payload
+            page = next(pages, None)
+            if page is not None:
+                pending.append(asyncio.ensure_future(fetch(page)))
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+@dataclass
+class SyncCheckpoint:
+    runlog_id: int
+    state: str | None
+    per_page: int
+    next_page: int = 0
+    imported: int = 0
+    source_total: int | None = None
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+async def _start_run(
+    *, state: str | None, per_page: int, max_records: int | None, resume: bool
+) -> SyncCheckpoint:
+    async with get_session() as session:
+        if resume:
+            row = (
                 await session.execute(
-                    statement.on_conflict_do_update(
-                        index_elements=[Institution.external_id],
-                        set_=update_columns,
+                    select(ScorecardCheckpoint, Runlog)
+                    .join(Runlog, ScorecardCheckpoint.runlog_id == Runlog.id)
+                    .where(
+                        ScorecardCheckpoint.state.is_not_distinct_from(state),
+                        ScorecardCheckpoint.per_page == per_page,
+                        Runlog.status == "running",
                     )
                 )
+            ).one_or_none()
+            if row is not None:
+                saved, runlog = row
+                return SyncCheckpoint(
+                    runlog_id=saved.runlog_id,
+                    state=state,
+                    per_page=per_page,
+                    next_page=saved.next_page,
+                    imported=saved.imported,
+                    source_total=saved.source_total,
+                    inserted=runlog.new_records or 0,
+                    updated=runlog.updated_records or 0,
+                    unchanged=runlog.unchanged_records or 0,
+                )
+        runlog = Runlog(
+            adapter="college_scorecard",
+            status="running",
+            started_at=datetime.utcnow(),
+            params_jsonb={"state": state, "per_page": per_page, "max_records": max_records},
+        )
+        session.add(runlog)
+        await session.commit()
+        return SyncCheckpoint(runlog_id=runlog.id, state=state, per_page=per_page)
+
+
+async def _save_checkpoint(session: AsyncSession, checkpoint: SyncCheckpoint) -> None:
+    values = {
+        "runlog_id": checkpoint.runlog_id,
+        "state": checkpoint.state,
+        "per_page": checkpoint.per_page,
+        "next_page": checkpoint.next_page,
+        "imported": checkpoint.imported,
+        "source_total": checkpoint.source_total,
+        "params_jsonb": {"state": checkpoint.state, "per_page": checkpoint.per_page},
+    }
+    statement = insert(ScorecardCheckpoint).values(values)
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ScorecardCheckpoint.state, ScorecardCheckpoint.per_page],
+            set_={**{key: getattr(statement.excluded, key) for key in values}, "updated_at": func.now()},
+        )
+    )
+    await session.execute(
+        update(Runlog)
+        .where(Runlog.id == checkpoint.runlog_id)
+        .values(
+            new_records=checkpoint.inserted,
+            updated_records=checkpoint.updated,
+            unchanged_records=checkpoint.unchanged,
+        )
+    )
+
+
+async def _finish_run(checkpoint: SyncCheckpoint) -> None:
+    async with get_session() as session:
+        await session.execute(
+            update(Runlog)
+            .where(Runlog.id == checkpoint.runlog_id)
+            .values(status="completed", finished_at=datetime.utcnow())
+        )
+        await session.commit()
+
+
+def _content_hash(row: dict[str, Any]) -> str:
+    # Hash only what both the API and the bulk file provide, so alternating the two does not churn rows.
+    shared = {key: value for key, value in row.items() if key not in BULK_SKIPPED_COLUMNS}
+    return hashlib.md5(json.dumps(shared, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def _upsert_institutions(session: AsyncSession, rows: list[dict[str, Any]]) -> tuple[int, int]:
+    rows = [{**row, "content_hash": _content_hash(row)} for row in rows]
+    # Executing with a parameter list lets SQLAlchemy reuse one compiled statement and batch it via insertmanyvalues.
+    statement = insert(Institution)
+    update_columns = {
+        key: getattr(statement.excluded, key)
+        for key in rows[0].keys()
+        if key not in {"external_id"}
+    }
+    update_columns["updated_at"] = func.now()
+    # Rows whose mapped values hash the same are left alone, so unchanged schools cost no row rewrite.
+    # Columns outside the hash are compared directly when this path writes them.
+    changed = or_(
+        Institution.content_hash.is_distinct_from(statement.excluded.content_hash),
+        *(
+            getattr(Institution, column).is_distinct_from(getattr(statement.excluded, column))
+            for column in BULK_SKIPPED_COLUMNS
+            if column in rows[0]
+        ),
+    )
+    result = await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[Institution.external_id],
+            set_=update_columns,
+            where=changed,
+        ).returning(literal_column("xmax = 0")),
+        rows,
+    )
+    written = result.scalars().all()
+    inserted = sum(1 for was_inserted in written if was_inserted)
+    return inserted, len(written) - inserted
+
+
+async def _produce_pages(
+    payloads: AsyncIterator[dict[str, Any]],
+    queue: asyncio.Queue[list[dict[str, Any]] | None],
+    max_records: int | None,
+    imported: int = 0,
+) -> tuple[int, int]:
+    pages = 0
+    try:
+        async for payload in payloads:
+            pages += 1
+            rows = _map_page(payload)
+            if max_records is not None:
+                rows = rows[: max_records - imported]
+            await queue.put(rows)
+            imported += len(rows)
+            if max_records is not None and imported >= max_records:
+                break
+    except Exception:
+        # Let the consumer commit and checkpoint the pages already queued before the error surfaces.
+        await queue.put(None)
+        raise
+    await queue.put(None)
+    return imported, pages
+
+
+async def _consume_pages(
+    queue: asyncio.Queue[list[dict[str, Any]] | None],
+    checkpoint: SyncCheckpoint,
+    *,
+    batch_size: int,
+    commit_pages: int,
+) -> int:
+    commits = 0
+    uncommitted = 0
+    # One statement cannot touch the same row twice, so a school repeated across pages keeps its last values.
+    pending: dict[str, dict[str, Any]] = {}
+    async with get_session() as session:
+
+        async def flush() -> None:
+            if pending:
+                inserted, updated = await _upsert_institutions(session, list(pending.values()))
+                checkpoint.inserted += inserted
+                checkpoint.updated += updated
+                checkpoint.unchanged += len(pending) - inserted - updated
+                pending.clear()
+
+        while (rows := await queue.get()) is not None:
+            pending.update((row["external_id"], row) for row in rows)
+            checkpoint.next_page += 1
+            checkpoint.imported += len(rows)
+            uncommitted += 1
+            if len(pending) >= batch_size:
+                await flush()
+            if uncommitted >= commit_pages:
+                await flush()
+                await _save_checkpoint(session, checkpoint)
                 await session.commit()
+                commits += 1
+                uncommitted = 0
+        await flush()
+        if uncommitted:
+            await _save_checkpoint(session, checkpoint)
+            await session.commit()
+            commits += 1
+    return commits
 
-            imported += len(rows)
 
-            if len(raw_results) < per_page or (max_records is not None and imported >= max_records):
-                break
-            page += 1
+async def sync_college_scorecard(
+    *,
+    api_key: str,
+    per_page: int = 100,
+    max_records: int | None = None,
+    state: str | None = None,
+    concurrency: int | None = None,
+    commit_pages: int | None = None,
+    resume: bool = False,
+) -> dict[str, int | None]:
+    state = state.upper() if state else None
+    checkpoint = await _start_run(state=state, per_page=per_page, max_records=max_records, resume=resume)
+    start_page = checkpoint.next_page
+    client = transport.async_client()
+    concurrency = concurrency or config.scorecard_concurrency
+    limit = asyncio.Semaphore(concurrency)
+
+    async def fetch(page: int) -> dict[str, Any]:
+        async with limit:
+            return await _fetch_page(client, api_key=api_key, page=page, per_page=per_page, state=state)
+
+    first = await fetch(start_page)
+    source_total = _as_int((first.get("metadata") or {}).get("total"))
+    checkpoint.source_total = source_total
+    page_count = _page_count(source_total, per_page, max_records)
+
+    queue: asyncio.Queue[list[dict[str, Any]] | None] = asyncio.Queue(maxsize=config.scorecard_queue_pages)
+    window = concurrency + config.scorecard_queue_pages
+    async with aclosing(_ordered_pages(fetch, first, start_page, page_count, per_page, window)) as payloads:
+        producer = asyncio.ensure_future(_produce_pages(payloads, queue, max_records, checkpoint.imported))
+        try:
+            commits = await _consume_pages(
+                queue,
+                checkpoint,
+                batch_size=config.write_batch_size,
+                commit_pages=commit_pages or config.scorecard_commit_pages,
+            )
+        except BaseException:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            raise
+        imported, pages = await producer
+    await _finish_run(checkpoint)
 
     return {
+        "run_id": checkpoint.runlog_id,
+        "start_page": start_page,
         "imported": imported,
-        "pages": page + 1 if imported else 0,
+        "inserted": checkpoint.inserted,
+        "updated": checkpoint.updated,
+        "unchanged": checkpoint.unchanged,
+        "pages": pages if imported else 0,
+        "commits": commits,
         "source_total": source_total,
     }
+
+
+async def import_scorecard_bulk(path: Path, *, state: str | None = None) -> dict[str, int]:
+    map_bulk_row = _compile_extractor(exclude=BULK_SKIPPED_COLUMNS)
+    wanted = {column for field in SCORECARD_FIELDS if field in BULK_COLUMNS for column in _bulk_columns(field)}
+    state = state.upper() if state else None
+    scanned = 0
+    imported = 0
+    inserted = 0
+    updated = 0
+    async with get_session() as session:
+        with pd.read_csv(
+            path,
+            usecols=lambda column: column in wanted,
+            dtype=str,
+            keep_default_na=False,
+            na_values=BULK_NULLS,
+            encoding="utf-8-sig",
+            chunksize=config.write_batch_size,
+        ) as reader:
+            for frame in reader:
+                scanned += len(frame)
+                rows = {
+                    row["external_id"]: row
+                    for record in _bulk_records(frame)
+                    if (row := map_bulk_row(record)) and (not state or row["state"] == state)
+                }
+                if rows:
+                    batch_inserted, batch_updated = await _upsert_institutions(session, list(rows.values()))
+                    imported += len(rows)
+                    inserted += batch_inserted
+                    updated += batch_updated
+        await session.commit()
+    return {
+        "scanned": scanned,
+        "imported": imported,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": imported - inserted - updated,
+    }
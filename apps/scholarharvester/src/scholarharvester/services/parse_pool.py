@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import pyarrow as pa
+
+from scholarharvester.adapters.export_cache import FetchedExport
+from scholarharvester.adapters.utils import (
+    METRIC_SCHEMA,
+    AdapterResult,
+    CitationPayload,
+    DatasetPayload,
+    MetricBatch,
+)
+from scholarharvester.config import config
+
+
+@dataclass(frozen=True)
+class ParsedExport:
+    dataset: DatasetPayload
+    path: str
+    layout: tuple[tuple[int, tuple[CitationPayload, ...]], ...]
+
+
+def _parse_to_ipc(adapter_name: str, params: dict[str, str], export: FetchedExport, directory: str) -> ParsedExport:
+    from scholarharvester.adapters import ADAPTERS
+
+    result = ADAPTERS[adapter_name](params, export=export)
+    layout: list[tuple[int, tuple[CitationPayload, ...]]] = []
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".arrows", delete=False) as fh:
+        path = fh.name
+    try:
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, METRIC_SCHEMA) as writer:
+            for batch in result.batches():
+                record_batches = batch.table.to_batches()
+                for record_batch in record_batches:
+                    writer.write_batch(record_batch)
+                layout.append((len(record_batches), batch.citations))
+    except BaseException:
+        os.unlink(path)
+        raise
+    return ParsedExport(result.dataset, path, tuple(layout))
+
+
+class IpcBatches:
+    def __init__(self, parsed: ParsedExport) -> None:
+        self.parsed = parsed
+        self._batches = self._read()
+
+    def __iter__(self) -> Iterator[MetricBatch]:
+        return self
+
+    def __next__(self) -> MetricBatch:
+        return next(self._batches)
+
+    def _read(self) -> Iterator[MetricBatch]:
+        try:
+            with pa.memory_map(self.parsed.path) as source:
+                reader = pa.ipc.open_stream(source)
+                for count, citations in self.parsed.layout:
+                    record_batches = [reader.read_next_batch() for _ in range(count)]
+                    yield MetricBatch(pa.Table.from_batches(record_batches, schema=METRIC_SCHEMA), citations)
+        finally:
+            Path(self.parsed.path).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        # Closing a generator that never started skips its finally, so remove the file here too.
+        self._batches.close()
+        Path(self.parsed.path).unlink(missing_ok=True)
+
+
+class ParsePool:
+    def __init__(self, workers: int, directory: Path) -> None:
+        self.workers = workers
+        self.directory = directory
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _submit(self, adapter_name: str, params: dict[str, str], export: FetchedExport) -> Future[ParsedExport]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.executor.submit(_parse_to_ipc, adapter_name, params, export, str(self.directory))
+
+    def collect_sync(self, adapter_name: str, params: dict[str, str], export: FetchedExport) -> AdapterResult:
+        parsed = self._submit(adapter_name, params, export).result()
+        return AdapterResult(parsed.dataset, metrics=MetricBatch.empty(), chunks=IpcBatches(parsed), export=export)
+
+    async def collect(self, adapter_name: str, params: dict[str, str], export: FetchedExport) -> AdapterResult:
+        parsed = await asyncio.wrap_future(self._submit(adapter_name, params, export))
+        return AdapterResult(parsed.dataset, metrics=MetricBatch.empty(), chunks=IpcBatches(parsed), export=export)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+_pools: dict[int, ParsePool] = {}
+_pools_lock = threading.Lock()
+
+
+def parse_pool(workers: int) -> ParsePool:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ParsePool(workers, Path(config.cache_dir) / "ipc")
+        return pool
+
+
+def shutdown_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_pools)
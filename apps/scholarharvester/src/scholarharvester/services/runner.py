@@ -1,136 +1,504 @@
 from __future__ import annotations
 
 import asyncio
+import enum
+import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
-import httpx
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from scholarharvester.adapters import ADAPTERS
-from scholarharvester.adapters.utils import AdapterResult
+from scholarharvester.adapters import ADAPTERS, SOURCES
+from scholarharvester.adapters.export_cache import FetchedExport, fetch_export
+from scholarharvester.adapters.official import resolve_official_data_url
+from scholarharvester.adapters.raw_archive import raw_archive
+from scholarharvester.adapters.utils import AdapterResult, CitationPayload, DatasetPayload, MetricBatch
 from scholarharvester.config import config
 from scholarharvester.database import get_session
+from scholarharvester.delta import METRIC_KEY_COLUMNS, MetricDelta, MetricKey, MetricState, metric_key, metric_state
 from scholarharvester.models import (
     Citation,
     Cohort,
     FileIngest,
     Metric,
+    MetricCitation,
     Runlog,
     SchoolType,
     Source,
     Dataset,
 )
 from scholarharvester.provenance import update_provenance
-from scholarharvester.registry import find_source, record_robot_decision
+from scholarharvester.ratelimit import rate_limiter
+from scholarharvester.registry import SourceConfig, find_source
+from scholarharvester.robots import robots
+from scholarharvester.services.parse_pool import parse_pool, shutdown_pools
+from scholarharvester.staging import (
+    CITATION_DEDUPE_KEY,
+    CITATION_STAGE,
+    CITATION_STAGE_COLUMNS,
+    LINK_STAGE,
+    LINK_STAGE_COLUMNS,
+    METRIC_STAGE,
+    METRIC_STAGE_COLUMNS,
+    METRIC_VALUE_COLUMNS,
+    CopyStats,
+    DeltaStats,
+    merge_with_dedupe_sql,
+    stage_records,
+    staging_ddl,
+)
 
+logger = logging.getLogger(__name__)
+
+
+class IngestMode(str, enum.Enum):
+    insert = "insert"
+    copy = "copy"
+
+
+INGEST_MODES = tuple(mode.value for mode in IngestMode)
+
+
+async def _last_completed_ingest(session: Any, adapter_name: str, params: dict[str, str]) -> Any | None:
+    row = (
+        await session.execute(
+            select(FileIngest.id, FileIngest.sha256, FileIngest.archive_key, Runlog.params_jsonb)
+            .join(Runlog, FileIngest.runlog_id == Runlog.id)
+            .where(Runlog.adapter == adapter_name, Runlog.status == "completed")
+            .order_by(Runlog.finished_at.desc())
+            .limit(1)
+        )
+    ).first()
+    if not row or (row.params_jsonb or {}) != params:
+        return None
+    return row
+
+
+async def _ensure_source(session: Any, adapter_name: str, source_conf: SourceConfig) -> Source:
+    source = (await session.execute(select(Source).where(Source.name == source_conf["name"]))).scalar_one_or_none()
+    if not source:
+        source = Source(
+            name=source_conf["name"],
+            publisher=source_conf.get("publisher", "ScholarStack"),
+            base_url=source_conf.get("base_url", ""),
+            terms_url=source_conf.get("terms_url"),
+            default_throttle=source_conf.get("throttle_seconds", 2),
+            adapter=adapter_name,
+        )
+        session.add(source)
+    else:
+        source.adapter = adapter_name
+    return source
+
+
+def _metric_values(dataset_id: int, row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "dataset_id": dataset_id,
+        "campus": row["campus"],
+        "major": row["major"],
+        "discipline": row["discipline"],
+        "source_school": row["source_school"],
+        "school_type": SchoolType[row["school_type"]] if row["school_type"] else None,
+        "cohort": Cohort[row["cohort"]],
+        "stat_name": row["stat_name"],
+        "stat_value_numeric": row["stat_value_numeric"],
+        "stat_value_text": row["stat_value_text"],
+        "unit": row["unit"],
+        "percentile": row["percentile"],
+        "year": row["year"],
+        "term": row["term"],
+        "notes": row["notes"],
+    }
+
+
+def _citation_values(citation: CitationPayload) -> dict[str, Any]:
+    return {
+        "title": citation.title,
+        "publisher": citation.publisher,
+        "year": citation.year,
+        "source_url": citation.source_url,
+        "interpretation_note": citation.interpretation_note,
+    }
+
+
+async def _citation_ids(session: Any, citations: tuple[CitationPayload, ...]) -> list[int]:
+    if not citations:
+        return []
+    statement = pg_insert(Citation)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(CITATION_DEDUPE_KEY), set_={"title": statement.excluded.title}
+    ).returning(Citation.id, sort_by_parameter_order=True)
+    return list((await session.scalars(statement, [_citation_values(citation) for citation in citations])).all())
+
+
+async def _existing_metrics(session: Any, dataset_id: int) -> dict[MetricKey, tuple[int | None, MetricState]]:
+    columns = [getattr(Metric, column) for column in METRIC_KEY_COLUMNS + METRIC_VALUE_COLUMNS]
+    result = await session.execute(select(Metric.id, *columns).where(Metric.dataset_id == dataset_id))
+    return {metric_key(row): (row["id"], metric_state(row)) for row in result.mappings()}
 
-async def _fetch_robots(base_url: str) -> str:
-    try:
-        async with httpx.AsyncClient(headers={"User-Agent": config.user_agent}, timeout=10) as client:
-            resp = await client.get(base_url.rstrip("/") + "/robots.txt")
-            return resp.text
-    except httpx.HTTPError:
-        return ""
 
+async def _write_metrics_orm(
+    session: Any, dataset_id: int, rows: list[dict[str, Any]], citation_ids: list[int]
+) -> list[int]:
+    metric_ids = []
+    for row in rows:
+        metric = Metric(**_metric_values(dataset_id, row))
+        session.add(metric)
+        await session.flush()
+        for index in row["citation_ids"]:
+            session.add(MetricCitation(metric_id=metric.id, citation_id=citation_ids[index]))
+        metric_ids.append(metric.id)
+    # Rows are linked by id rather than relationship so flushed chunks can be released.
+    await session.flush()
+    return metric_ids
+
+
+async def _write_metrics_bulk(
+    session: Any, dataset_id: int, rows: list[dict[str, Any]], citation_ids: list[int], adapter_name: str
+) -> list[int]:
+    metric_ids: list[int] = []
+    statement = insert(Metric).returning(Metric.id, sort_by_parameter_order=True)
+    for offset in range(0, len(rows), config.write_batch_size):
+        started = time.perf_counter()
+        chunk = rows[offset : offset + config.write_batch_size]
+        chunk_ids = (await session.scalars(statement, [_metric_values(dataset_id, row) for row in chunk])).all()
+        link_values = [
+            {"metric_id": metric_id, "citation_id": citation_ids[index]}
+            for metric_id, row in zip(chunk_ids, chunk)
+            for index in row["citation_ids"]
+        ]
+        if link_values:
+            await session.execute(insert(MetricCitation), link_values)
+        metric_ids.extend(chunk_ids)
+        logger.info(
+            "%s: wrote %d metrics and %d citations in %.1f ms",
+            adapter_name,
+            len(chunk),
+            len(link_values),
+            (time.perf_counter() - started) * 1000,
+        )
+    return metric_ids
+
+
+async def _update_metrics(
+    session: Any, dataset_id: int, changed: list[tuple[int | None, dict[str, Any]]], citation_ids: list[int]
+) -> None:
+    if not changed:
+        return
+    await session.execute(
+        update(Metric), [{"id": metric_id, **_metric_values(dataset_id, row)} for metric_id, row in changed]
+    )
+    await session.execute(
+        delete(MetricCitation).where(MetricCitation.metric_id.in_([metric_id for metric_id, _ in changed]))
+    )
+    link_values = [
+        {"metric_id": metric_id, "citation_id": citation_ids[index]}
+        for metric_id, row in changed
+        for index in row["citation_ids"]
+    ]
+    if link_values:
+        await session.execute(insert(MetricCitation), link_values)
+
+
+async def _copy_metrics(session: Any, dataset_id: int, batches: Iterator[MetricBatch]) -> CopyStats:
+    connection = await session.connection()
+    if connection.dialect.name != "postgresql":
+        raise RuntimeError("COPY ingestion requires a PostgreSQL database")
+    driver = (await connection.get_raw_connection()).driver_connection
+    started = time.perf_counter()
+    for statement in staging_ddl():
+        await connection.exec_driver_sql(statement)
+
+    metrics = citations = 0
+    staged = stage_records(dataset_id, batches)
+    while (records := await asyncio.to_thread(next, staged, None)) is not None:
+        metric_records, citation_records, link_records = records
+        await driver.copy_records_to_table(METRIC_STAGE, records=metric_records, columns=METRIC_STAGE_COLUMNS)
+        if citation_records:
+            await driver.copy_records_to_table(
+                CITATION_STAGE, records=citation_records, columns=CITATION_STAGE_COLUMNS
+            )
+        if link_records:
+            await driver.copy_records_to_table(LINK_STAGE, records=link_records, columns=LINK_STAGE_COLUMNS)
+        metrics += len(metric_records)
+        citations += len(link_records)
+
+    merge = merge_with_dedupe_sql(
+        cohort_type=Metric.__table__.c.cohort.type.name,
+        school_type_type=Metric.__table__.c.school_type.type.name,
+        retrieved_at="now() at time zone 'utc'",
+    )
+    delta = DeltaStats(*(await connection.exec_driver_sql(merge)).one())
+    return CopyStats(metrics, citations, time.perf_counter() - started, delta)
+
+
+async def _ensure_dataset(session: Any, source: Source, runlog: Runlog, payload: DatasetPayload) -> Dataset:
+    cohort = Cohort[payload.cohort]
+    dataset = (
+        await session.execute(
+            select(Dataset)
+            .where(
+                Dataset.source_id == source.id,
+                Dataset.title == payload.title,
+                Dataset.year == payload.year,
+                Dataset.term == payload.term,
+                Dataset.cohort == cohort,
+            )
+            .order_by(Dataset.id.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    notes = f"{payload.notes or ''} runlog:{runlog.id}"
+    if dataset is None:
+        dataset = Dataset(
+            source=source, title=payload.title, year=payload.year, term=payload.term, cohort=cohort, notes=notes
+        )
+        session.add(dataset)
+        await session.flush()
+    else:
+        dataset.notes = notes
+    return dataset
 
-async def run_adapter(adapter_name: str, params: dict[str, str], save_raw: bool) -> Runlog:
+
+async def _write_result(
+    session: Any,
+    *,
+    source: Source,
+    runlog: Runlog,
+    result: AdapterResult,
+    export: FetchedExport,
+    archive_key: str | None,
+    ingest_mode: str,
+) -> FileIngest:
+    dataset = await _ensure_dataset(session, source, runlog, result.dataset)
+
+    file_ingest = FileIngest(
+        dataset=dataset,
+        runlog_id=runlog.id,
+        url=export.url,
+        fetched_at=datetime.utcnow(),
+        mime=export.mime,
+        bytes=export.bytes,
+        sha256=export.sha256,
+        http_status=export.http_status,
+        archive_key=archive_key,
+        status="ok",
+    )
+    session.add(file_ingest)
+
+    batches = result.batches()
+    if ingest_mode == "copy":
+        stats = await _copy_metrics(session, dataset.id, batches)
+        logger.info("%s: %s", runlog.adapter, stats.summary())
+        delta_stats = stats.delta
+    else:
+        delta = MetricDelta(await _existing_metrics(session, dataset.id))
+        while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+            fresh, changed = await asyncio.to_thread(delta.classify, batch.rows())
+            if not fresh and not changed:
+                continue
+            citation_ids = await _citation_ids(session, batch.citations)
+            if len(fresh) < config.bulk_write_threshold:
+                metric_ids = await _write_metrics_orm(session, dataset.id, fresh, citation_ids)
+            else:
+                metric_ids = await _write_metrics_bulk(session, dataset.id, fresh, citation_ids, runlog.adapter)
+            delta.remember(fresh, metric_ids)
+            await _update_metrics(session, dataset.id, changed, citation_ids)
+        delta_stats = delta.stats
+        logger.info("%s: %s", runlog.adapter, delta_stats.summary())
+
+    runlog.status = "completed"
+    runlog.finished_at = datetime.utcnow()
+    runlog.new_records = delta_stats.new
+    runlog.updated_records = delta_stats.updated
+    runlog.unchanged_records = delta_stats.unchanged
+    await session.commit()
+    return file_ingest
+
+
+async def run_adapter(
+    adapter_name: str,
+    params: dict[str, str],
+    save_raw: bool,
+    force: bool = False,
+    parse_workers: int | None = None,
+    ingest_mode: str | None = None,
+) -> Runlog:
+    ingest_mode = ingest_mode or config.ingest_mode
+    if ingest_mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode: {ingest_mode}")
     source_conf = find_source(adapter_name)
     if not source_conf:
         raise ValueError(f"Unknown adapter: {adapter_name}")
 
     async with get_session() as session:
-        source = (await session.execute(select(Source).where(Source.name == source_conf["name"]))).scalar_one_or_none()
-        if not source:
-            source = Source(
-                name=source_conf["name"],
-                publisher=source_conf.get("publisher", "ScholarStack"),
-                base_url=source_conf.get("base_url", ""),
-                terms_url=source_conf.get("terms_url"),
-                default_throttle=source_conf.get("throttle_seconds", 2),
-                adapter=adapter_name,
-            )
-            session.add(source)
-        else:
-            source.adapter = adapter_name
+        source = await _ensure_source(session, adapter_name, source_conf)
 
-        runlog = Runlog(adapter=adapter_name, status="running", started_at=datetime.utcnow())
+        run_params = {key: value for key, value in params.items() if key != "chunk_size"}
+        runlog = Runlog(adapter=adapter_name, status="running", started_at=datetime.utcnow(), params_jsonb=run_params)
         session.add(runlog)
         await session.flush()
 
-        robots_text = await _fetch_robots(source.base_url)
-        record_robot_decision(source_conf, robots_text)
-        source.robots_cache_json = {"checked_at": datetime.utcnow().isoformat(), "text": robots_text}
-
-        await asyncio.sleep(source_conf.get("throttle_seconds", 2))
+        rules = await robots.ensure(source.base_url)
+        if (source.robots_cache_json or {}).get("text") != rules.text:
+            source.robots_cache_json = {"checked_at": datetime.utcnow().isoformat(), "text": rules.text}
+        rate_limiter.tighten(source.base_url, rules.crawl_delay(robots.agent))
 
         adapter = ADAPTERS.get(adapter_name)
         if not adapter:
             raise ValueError("Adapter implementation missing")
-        result: AdapterResult = adapter(params)
+        export_url = await asyncio.to_thread(resolve_official_data_url, SOURCES[adapter_name])
+        if not await robots.allowed(export_url):
+            raise RuntimeError(f"{adapter_name}: robots.txt disallows {export_url}")
+        export = await asyncio.to_thread(fetch_export, export_url)
+        previous = None if force else await _last_completed_ingest(session, adapter_name, run_params)
+        if previous is not None and previous.sha256 == export.sha256:
+            if save_raw and previous.archive_key is None:
+                # Archive the unchanged export too, so --save-raw can make an earlier run replayable.
+                archive_key = await asyncio.to_thread(raw_archive.save, export)
+                await session.execute(
+                    update(FileIngest).where(FileIngest.id == previous.id).values(archive_key=archive_key)
+                )
+            runlog.status = "unchanged"
+            runlog.finished_at = datetime.utcnow()
+            runlog.new_records = runlog.updated_records = runlog.unchanged_records = 0
+            await session.commit()
+            return runlog
 
-        dataset = Dataset(
-            source=source,
-            title=result.dataset.title,
-            year=result.dataset.year,
-            term=result.dataset.term,
-            cohort=Cohort[result.dataset.cohort],
-            notes=f"{result.dataset.notes or ''} runlog:{runlog.id}",
-        )
-        session.add(dataset)
+        archive_key = await asyncio.to_thread(raw_archive.save, export) if save_raw else None
+        workers = config.parse_workers if parse_workers is None else parse_workers
+        if workers:
+            result: AdapterResult = await parse_pool(workers).collect(adapter_name, params, export)
+        else:
+            result = await asyncio.to_thread(adapter, params, export=export)
+        try:
+            file_ingest = await _write_result(
+                session,
+                source=source,
+                runlog=runlog,
+                result=result,
+                export=export,
+                archive_key=archive_key,
+                ingest_mode=ingest_mode,
+            )
+        finally:
+            result.close()
+
+        update_provenance(runlog.id, source.name, [file_ingest.url], warnings=[])
+        return runlog
+
+
+async def replay_dataset(dataset_id: int) -> Runlog:
+    async with get_session() as session:
+        dataset = await session.get(Dataset, dataset_id)
+        if not dataset:
+            raise ValueError(f"Dataset {dataset_id} not found")
+        source = await session.get(Source, dataset.source_id)
+        adapter = ADAPTERS.get(source.adapter) if source else None
+        if not source or not adapter:
+            raise ValueError(f"Dataset {dataset_id} has no adapter link")
+
+        row = (
+            await session.execute(
+                select(FileIngest, Runlog.params_jsonb)
+                .outerjoin(Runlog, FileIngest.runlog_id == Runlog.id)
+                .where(FileIngest.dataset_id == dataset_id, FileIngest.archive_key.is_not(None))
+                .order_by(FileIngest.fetched_at.desc())
+                .limit(1)
+            )
+        ).first()
+        if not row:
+            raise ValueError(f"Dataset {dataset_id} has no archived export; rerun it with --save-raw")
+        ingest, params = row.FileIngest, row.params_jsonb or {}
+
+        runlog = Runlog(adapter=source.adapter, status="running", started_at=datetime.utcnow(), params_jsonb=params)
+        session.add(runlog)
         await session.flush()
 
-        file_ingest = FileIngest(
-            dataset=dataset,
-            url=f"{source.base_url}/harvest/{adapter_name}",
-            fetched_at=datetime.utcnow(),
-            mime=source_conf.get("allowed_mime", ["text/csv"])[0],
-            http_status=200,
-            status="ok",
+        archived = FetchedExport(
+            url=ingest.url,
+            path="",
+            sha256=ingest.sha256,
+            bytes=ingest.bytes,
+            mime=ingest.mime,
+            http_status=ingest.http_status,
         )
-        session.add(file_ingest)
-
-        inserted_metrics = 0
-        for metric_payload in result.metrics:
-            metric = Metric(
-                dataset=dataset,
-                campus=metric_payload.campus,
-                major=metric_payload.major,
-                discipline=metric_payload.discipline,
-                source_school=metric_payload.source_school,
-                school_type=SchoolType[metric_payload.school_type] if metric_payload.school_type else None,
-                cohort=Cohort[metric_payload.cohort],
-                stat_name=metric_payload.stat_name,
-                stat_value_numeric=metric_payload.stat_value_numeric,
-                stat_value_text=metric_payload.stat_value_text,
-                unit=metric_payload.unit,
-                percentile=metric_payload.percentile,
-                year=metric_payload.year,
-                term=metric_payload.term,
-                notes=metric_payload.notes,
-            )
-            session.add(metric)
-            await session.flush()
-            for cite in metric_payload.citations:
-                citation = Citation(
-                    metric=metric,
-                    title=cite.title,
-                    publisher=cite.publisher,
-                    year=cite.year,
-                    source_url=cite.source_url,
-                    interpretation_note=cite.interpretation_note,
+        with raw_archive.restore(ingest.archive_key, archived) as export:
+            result: AdapterResult = await asyncio.to_thread(adapter, params, export=export)
+            try:
+                await _write_result(
+                    session,
+                    source=source,
+                    runlog=runlog,
+                    result=result,
+                    export=export,
+                    archive_key=ingest.archive_key,
+                    ingest_mode=config.ingest_mode,
                 )
-                session.add(citation)
-            inserted_metrics += 1
-
-        runlog.status = "completed"
-        runlog.finished_at = datetime.utcnow()
-        runlog.new_records = inserted_metrics
-        await session.commit()
+            finally:
+                result.close()
 
-        update_provenance(runlog.id, source.name, [file_ingest.url], warnings=[])
+        update_provenance(runlog.id, source.name, [f"{ingest.url} (replayed from {ingest.archive_key})"], warnings=[])
         return runlog
 
 
+@dataclass
+class AdapterRunSummary:
+    adapter: str
+    status: str
+    runlog_id: int | None = None
+    metrics: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+    updated: int = 0
+    unchanged: int = 0
+
+
+async def run_all(
+    adapter_names: Iterable[str],
+    params: dict[str, str],
+    save_raw: bool,
+    force: bool = False,
+    concurrency: int | None = None,
+    parse_workers: int | None = None,
+    ingest_mode: str | None = None,
+) -> list[AdapterRunSummary]:
+    limit = asyncio.Semaphore(concurrency or config.run_concurrency)
+
+    async def run_one(adapter_name: str) -> AdapterRunSummary:
+        async with limit:
+            started = time.perf_counter()
+            try:
+                runlog = await run_adapter(
+                    adapter_name,
+                    params,
+                    save_raw,
+                    force=force,
+                    parse_workers=parse_workers,
+                    ingest_mode=ingest_mode,
+                )
+            except Exception as exc:
+                return AdapterRunSummary(
+                    adapter_name, "failed", seconds=time.perf_counter() - started, error=str(exc)
+                )
+            return AdapterRunSummary(
+                adapter_name,
+                runlog.status,
+                runlog.id,
+                runlog.new_records or 0,
+                time.perf_counter() - started,
+                updated=runlog.updated_records or 0,
+                unchanged=runlog.unchanged_records or 0,
+            )
+
+    try:
+        return list(await asyncio.gather(*(run_one(name) for name in adapter_names)))
+    finally:
+        shutdown_pools()
+
+
 def list_adapters() -> list[str]:
     return list(ADAPTERS.keys())
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from dataclasses import astuple, dataclass
+from typing import Any, Iterable, Iterator
+
+from scholarharvester.adapters.utils import MetricBatch
+from scholarharvester.config import config
+
+METRIC_COLUMNS = (
+    "dataset_id",
+    "campus",
+    "major",
+    "discipline",
+    "source_school",
+    "school_type",
+    "cohort",
+    "year",
+    "term",
+    "stat_name",
+    "stat_value_numeric",
+    "stat_value_text",
+    "unit",
+    "percentile",
+    "notes",
+)
+CITATION_COLUMNS = ("title", "publisher", "year", "source_url", "interpretation_note")
+METRIC_DEDUPE_KEY = ("dataset_id", "campus", "major", "discipline", "source_school", "stat_name", "year", "term")
+METRIC_VALUE_COLUMNS = tuple(column for column in METRIC_COLUMNS if column not in METRIC_DEDUPE_KEY)
+CITATION_DEDUPE_KEY = CITATION_COLUMNS
+
+METRIC_STAGE = "metric_stage"
+CITATION_STAGE = "citation_stage"
+LINK_STAGE = "metric_citation_stage"
+METRIC_STAGE_COLUMNS = ("row_no",) + METRIC_COLUMNS
+CITATION_STAGE_COLUMNS = ("citation_no",) + CITATION_COLUMNS
+LINK_STAGE_COLUMNS = ("row_no", "citation_no")
+
+_STAGE_TYPES = {
+    "row_no": "bigint",
+    "citation_no": "bigint",
+    "dataset_id": "bigint",
+    "year": "int",
+    "stat_value_numeric": "double precision",
+}
+
+
+@dataclass(frozen=True)
+class DeltaStats:
+    new: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def summary(self) -> str:
+        return f"{self.new} new, {self.updated} updated, {self.unchanged} unchanged"
+
+
+@dataclass(frozen=True)
+class CopyStats:
+    metrics: int
+    citations: int
+    seconds: float
+    delta: DeltaStats = DeltaStats()
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.metrics + self.citations) / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"copied {self.metrics} metrics and {self.citations} citations in {self.seconds:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/s); {self.delta.summary()}"
+        )
+
+
+def _stage_table(name: str, columns: tuple[str, ...]) -> str:
+    definitions = ", ".join(f"{column} {_STAGE_TYPES.get(column, 'text')}" for column in columns)
+    # Temporary tables are never WAL-logged and vanish with the transaction.
+    return f"create temp table {name} ({definitions}) on commit drop"
+
+
+def staging_ddl() -> list[str]:
+    return [
+        _stage_table(METRIC_STAGE, METRIC_STAGE_COLUMNS),
+        _stage_table(CITATION_STAGE, CITATION_STAGE_COLUMNS),
+        _stage_table(LINK_STAGE, LINK_STAGE_COLUMNS),
+    ]
+
+
+def metric_changed_sql(target: str, incoming: str) -> str:
+    # Compare numerics as doubles so a float stored in a numeric column matches its staged value.
+    def values(alias: str) -> str:
+        return ", ".join(
+            f"{alias}.{column}::double precision" if column == "stat_value_numeric" else f"{alias}.{column}"
+            for column in METRIC_VALUE_COLUMNS
+        )
+
+    return f"({values(target)}) is distinct from ({values(incoming)})"
+
+
+def _metric_select(cohort_type: str, school_type_type: str) -> str:
+    casts = {"cohort": f"cohort::{cohort_type}", "school_type": f"school_type::{school_type_type}"}
+    return ", ".join(casts.get(column, column) for column in METRIC_COLUMNS)
+
+
+def merge_with_dedupe_sql(*, cohort_type: str, school_type_type: str, retrieved_at: str = "") -> str:
+    key = ", ".join(METRIC_DEDUPE_KEY)
+    citation_columns = ", ".join(CITATION_COLUMNS)
+    staged = " and ".join(f"s.{column} is not distinct from merged.{column}" for column in METRIC_DEDUPE_KEY)
+    cited_match = " and ".join(f"c.{column} is not distinct from cited.{column}" for column in CITATION_DEDUPE_KEY)
+    # The last staged row for a key wins, values and citations alike. Rows whose values already
+    # match are neither rewritten nor returned, so only new and changed metrics are relinked.
+    return f"""
+        with winners as (
+            select distinct on ({key}) *
+            from {METRIC_STAGE}
+            order by {key}, row_no desc
+        ),
+        merged as (
+            insert into metric ({", ".join(METRIC_COLUMNS)})
+            select {_metric_select(cohort_type, school_type_type)}
+            from winners
+            on conflict ({key}) do update
+            set {", ".join(f"{column} = excluded.{column}" for column in METRIC_VALUE_COLUMNS)}
+            where {metric_changed_sql("metric", "excluded")}
+            returning id, {key}, xmax = 0 as inserted
+        ),
+        cited as (
+            insert into citation ({citation_columns}{", retrieved_at" if retrieved_at else ""})
+            select distinct {citation_columns}{f", {retrieved_at}" if retrieved_at else ""}
+            from {CITATION_STAGE}
+            on conflict ({", ".join(CITATION_DEDUPE_KEY)}) do update set title = excluded.title
+            returning id, {citation_columns}
+        ),
+        linked as (
+            select distinct merged.id as metric_id, cited.id as citation_id
+            from merged
+            join winners s on {staged}
+            join {LINK_STAGE} l on l.row_no = s.row_no
+            join {CITATION_STAGE} c on c.citation_no = l.citation_no
+            join cited on {cited_match}
+        ),
+        pruned as (
+            delete from metric_citation mc
+            using merged
+            where mc.metric_id = merged.id
+              and not merged.inserted
+              and (mc.metric_id, mc.citation_id) not in (select metric_id, citation_id from linked)
+        ),
+        attached as (
+            insert into metric_citation (metric_id, citation_id)
+            select metric_id, citation_id from linked
+            on conflict do nothing
+        )
+        select
+            count(*) filter (where inserted),
+            count(*) filter (where not inserted),
+            (select count(*) from winners) - count(*)
+        from merged
+    """
+
+
+def stage_records(
+    dataset_id: int, batches: Iterable[MetricBatch]
+) -> Iterator[tuple[list[tuple[Any, ...]], list[tuple[Any, ...]], list[tuple[int, int]]]]:
+    row_no = citation_no = 0
+    for batch in batches:
+        citations = [(citation_no + index, *astuple(citation)) for index, citation in enumerate(batch.citations)]
+        for record_batch in batch.table.to_batches(max_chunksize=config.write_batch_size):
+            columns = {name: record_batch.column(name).to_pylist() for name in record_batch.schema.names}
+            columns["dataset_id"] = [dataset_id] * record_batch.num_rows
+            metrics: list[tuple[Any, ...]] = []
+            links: list[tuple[int, int]] = []
+            for index, values in enumerate(zip(*(columns[column] for column in METRIC_COLUMNS))):
+                metrics.append((row_no, *values))
+                links.extend((row_no, citation_no + offset) for offset in columns["citation_ids"][index])
+                row_no += 1
+            yield metrics, citations, links
+            citations = []
+        citation_no += len(batch.citations)
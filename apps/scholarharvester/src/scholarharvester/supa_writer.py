@@ -1,11 +1,35 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
+from dataclasses import asdict, astuple
 from decimal import Decimal
+from itertools import islice
 import os
-from typing import Any
+import time
+from typing import Any, Iterable, Iterator, Mapping
 
-from scholarharvester.adapters.utils import CitationPayload, DatasetPayload, MetricPayload
+from scholarharvester.adapters.utils import CitationPayload, DatasetPayload, MetricBatch, MetricPayload
+from scholarharvester.config import config
+from scholarharvester.delta import METRIC_KEY_COLUMNS, MetricKey, MetricState, metric_key, metric_state
+from scholarharvester.staging import (
+    CITATION_COLUMNS,
+    CITATION_DEDUPE_KEY,
+    CITATION_STAGE,
+    CITATION_STAGE_COLUMNS,
+    LINK_STAGE,
+    LINK_STAGE_COLUMNS,
+    METRIC_COLUMNS,
+    METRIC_DEDUPE_KEY,
+    METRIC_STAGE,
+    METRIC_STAGE_COLUMNS,
+    METRIC_VALUE_COLUMNS,
+    CopyStats,
+    DeltaStats,
+    merge_with_dedupe_sql,
+    metric_changed_sql,
+    stage_records,
+    staging_ddl,
+)
 
 
 @contextmanager
@@ -58,73 +82,148 @@ def upsert_dataset(connection: Any, payload: DatasetPayload, source_name: str) -
         return row[0]
 
 
-def upsert_metric(connection: Any, dataset_id: int, payload: MetricPayload) -> int:
-    cols = [
-        "dataset_id",
-        "campus",
-        "major",
-        "discipline",
-        "source_school",
-        "school_type",
-        "cohort",
-        "year",
-        "term",
-        "stat_name",
-        "stat_value_numeric",
-        "stat_value_text",
-        "unit",
-        "percentile",
-        "notes",
-    ]
-    values = [
-        dataset_id,
-        payload.campus,
-        payload.major,
-        payload.discipline,
-        payload.source_school,
-        payload.school_type,
-        payload.cohort,
-        payload.year,
-        payload.term,
-        payload.stat_name,
-        _as_number(payload.stat_value_numeric),
-        payload.stat_value_text,
-        payload.unit,
-        payload.percentile,
-        payload.notes,
+_METRIC_UPSERT = f"""
+    insert into metric ({", ".join(METRIC_COLUMNS)})
+    values ({", ".join(["%s"] * len(METRIC_COLUMNS))})
+    on conflict ({", ".join(METRIC_DEDUPE_KEY)})
+    do update set {", ".join(f"{column} = excluded.{column}" for column in METRIC_VALUE_COLUMNS)}
+    where {metric_changed_sql("metric", "excluded")}
+    returning id
+"""
+
+_CITATION_UPSERT = f"""
+    insert into citation ({", ".join(CITATION_COLUMNS)})
+    values ({", ".join(["%s"] * len(CITATION_COLUMNS))})
+    on conflict ({", ".join(CITATION_DEDUPE_KEY)})
+    do update set title = excluded.title
+    returning id
+"""
+
+_CITATION_LINK = """
+    insert into metric_citation (metric_id, citation_id)
+    values (%s, %s)
+    on conflict do nothing
+"""
+
+
+def _metric_values(dataset_id: int, payload: MetricPayload | Mapping[str, Any]) -> list[Any]:
+    row = asdict(payload) if isinstance(payload, MetricPayload) else payload
+    return [dataset_id] + [
+        _as_number(row["stat_value_numeric"]) if col == "stat_value_numeric" else row[col] for col in METRIC_COLUMNS[1:]
     ]
-    placeholders = ", ".join(["%s"] * len(cols))
+
+
+def _returned_ids(cur: Any) -> Iterator[int | None]:
+    while True:
+        row = cur.fetchone()
+        yield row[0] if row else None
+        if not cur.nextset():
+            break
+
+
+def _batches(items: Iterable[Any], batch_size: int | None) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size or config.write_batch_size)):
+        yield batch
+
+
+def load_metric_states(connection: Any, dataset_id: int) -> dict[MetricKey, tuple[int | None, MetricState]]:
+    from psycopg.rows import dict_row
+
+    columns = METRIC_KEY_COLUMNS + METRIC_VALUE_COLUMNS
+    casts = {"cohort": "cohort::text", "school_type": "school_type::text"}
+    selected = ", ".join(casts.get(column, column) for column in columns)
+    with connection.cursor(row_factory=dict_row) as cur:
+        cur.execute(f"select id, {selected} from metric where dataset_id = %s", (dataset_id,))
+        return {metric_key(row): (row["id"], metric_state(row)) for row in cur}
+
+
+def upsert_metric(connection: Any, dataset_id: int, payload: MetricPayload | Mapping[str, Any]) -> int | None:
     with connection.cursor() as cur:
-        cur.execute(
-            f"""
-            insert into metric ({", ".join(cols)})
-            values ({placeholders})
-            on conflict on constraint metric_dedupe_idx
-            do update set notes = excluded.notes
-            returning id
-            """,
-            values,
+        cur.execute(_METRIC_UPSERT, _metric_values(dataset_id, payload))
+        row = cur.fetchone()
+        # No row comes back when the stored metric already has identical values.
+        return row[0] if row else None
+
+
+def upsert_metrics(
+    connection: Any, dataset_id: int, payloads: Iterable[MetricPayload | Mapping[str, Any]]
+) -> list[int | None]:
+    with connection.cursor() as cur:
+        cur.executemany(
+            _METRIC_UPSERT, [_metric_values(dataset_id, payload) for payload in payloads], returning=True
         )
+        return list(_returned_ids(cur))
+
+
+def upsert_citation(connection: Any, metric_id: int, citation: CitationPayload) -> None:
+    with connection.cursor() as cur:
+        cur.execute(_CITATION_UPSERT, astuple(citation))
         row = cur.fetchone()
         if not row:
-            raise RuntimeError("Failed to insert metric")
-        return row[0]
+            raise RuntimeError("Failed to insert citation")
+        cur.execute(_CITATION_LINK, (metric_id, row[0]))
 
 
-def upsert_citation(connection: Any, metric_id: int, citation: CitationPayload) -> None:
+def upsert_citations(connection: Any, citations: Iterable[tuple[int, CitationPayload]]) -> None:
+    links = [(metric_id, astuple(citation)) for metric_id, citation in citations]
+    if not links:
+        return
+    distinct = list(dict.fromkeys(citation for _, citation in links))
     with connection.cursor() as cur:
-        cur.execute(
-            """
-            insert into citation (metric_id, title, publisher, year, source_url, interpretation_note)
-            values (%s, %s, %s, %s, %s, %s)
-            on conflict on constraint citation_unique_idx do nothing
-            """,
-            (
-                metric_id,
-                citation.title,
-                citation.publisher,
-                citation.year,
-                citation.source_url,
-                citation.interpretation_note,
-            ),
-        )
+        cur.executemany(_CITATION_UPSERT, distinct, returning=True)
+        citation_ids = dict(zip(distinct, _returned_ids(cur)))
+        cur.executemany(_CITATION_LINK, [(metric_id, citation_ids[citation]) for metric_id, citation in links])
+
+
+def unlink_citations(connection: Any, metric_ids: Iterable[int]) -> None:
+    metric_ids = list(metric_ids)
+    if metric_ids:
+        with connection.cursor() as cur:
+            cur.execute("delete from metric_citation where metric_id = any(%s)", (metric_ids,))
+
+
+def upsert_metric_batch(
+    connection: Any,
+    dataset_id: int,
+    rows: list[dict[str, Any]],
+    citations: tuple[CitationPayload, ...],
+    batch_size: int | None = None,
+) -> list[int | None]:
+    metric_ids: list[int | None] = []
+    for batch in _batches(rows, batch_size):
+        # A metric and its citation links change together, or a retry would see the row as unchanged.
+        # Every cursor opened on the connection inside this block shares the one transaction.
+        with connection.transaction():
+            batch_ids = upsert_metrics(connection, dataset_id, batch)
+            written = [(metric_id, row) for metric_id, row in zip(batch_ids, batch) if metric_id is not None]
+            unlink_citations(connection, [metric_id for metric_id, _ in written])
+            upsert_citations(
+                connection,
+                ((metric_id, citations[index]) for metric_id, row in written for index in row["citation_ids"]),
+            )
+        metric_ids.extend(batch_ids)
+    return metric_ids
+
+
+def copy_metrics(connection: Any, dataset_id: int, batches: Iterable[MetricBatch]) -> CopyStats:
+    started = time.perf_counter()
+    metrics = citations = 0
+    with connection.transaction(), connection.cursor() as cur:
+        for statement in staging_ddl():
+            cur.execute(statement)
+        for metric_records, citation_records, link_records in stage_records(dataset_id, batches):
+            with cur.copy(f"copy {METRIC_STAGE} ({', '.join(METRIC_STAGE_COLUMNS)}) from stdin") as copy:
+                for record in metric_records:
+                    copy.write_row(record)
+            with cur.copy(f"copy {CITATION_STAGE} ({', '.join(CITATION_STAGE_COLUMNS)}) from stdin") as copy:
+                for record in citation_records:
+                    copy.write_row(record)
+            with cur.copy(f"copy {LINK_STAGE} ({', '.join(LINK_STAGE_COLUMNS)}) from stdin") as copy:
+                for record in link_records:
+                    copy.write_row(record)
+            metrics += len(metric_records)
+            citations += len(link_records)
+        cur.execute(merge_with_dedupe_sql(cohort_type="cohort", school_type_type="school_type"))
+        delta = DeltaStats(*cur.fetchone())
+    return CopyStats(metrics, citations, time.perf_counter() - started, delta)
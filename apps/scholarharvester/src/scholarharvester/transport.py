@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, TypeVar
+
+import httpx
+
+from scholarharvester.config import config
+from scholarharvester.ratelimit import HostRateLimiter, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    requests: int
+    connections_opened: int
+    open_connections: int
+
+    @property
+    def reuse_ratio(self) -> float:
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections_opened / self.requests)
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests, {self.connections_opened} connections opened, "
+            f"{self.open_connections} open, reuse ratio {self.reuse_ratio:.2f}"
+        )
+
+
+class Transport:
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_keepalive: int,
+        http2: bool,
+        timeout: float,
+        user_agent: str,
+        limiter: HostRateLimiter | None = None,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.http2 = http2
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.limiter = limiter
+        self._client: httpx.Client | None = None
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._requests = 0
+        self._connections_opened = 0
+        self._streams: weakref.WeakSet[Any] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def _count_connection(self, event: str, info: dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections_opened += 1
+                self._streams.add(info["return_value"])
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self._streams.add(info["return_value"])
+
+    def _options(self) -> dict[str, Any]:
+        return {
+            "limits": self.limits,
+            "http2": self.http2,
+            "timeout": self.timeout,
+            "follow_redirects": True,
+            "headers": {"User-Agent": self.user_agent},
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+
+                def trace(event: str, info: dict[str, Any]) -> None:
+                    self._count_connection(event, info)
+
+                def on_request(request: httpx.Request) -> None:
+                    if self.limiter:
+                        self.limiter.acquire(str(request.url))
+                    self._count_request()
+                    request.extensions["trace"] = trace
+
+                self._client = httpx.Client(event_hooks={"request": [on_request]}, **self._options())
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+
+                async def trace(event: str, info: dict[str, Any]) -> None:
+                    self._count_connection(event, info)
+
+                async def on_request(request: httpx.Request) -> None:
+                    if self.limiter:
+                        await self.limiter.acquire_async(str(request.url))
+                    self._count_request()
+                    request.extensions["trace"] = trace
+
+                client = httpx.AsyncClient(event_hooks={"request": [on_request]}, **self._options())
+                self._async_clients[loop] = client
+            return client
+
+    def _open_sockets(self) -> set[Any]:
+        # A TLS stream wraps its TCP stream's socket, so count sockets rather than streams.
+        sockets = (stream.get_extra_info("socket") for stream in list(self._streams))
+        return {sock for sock in sockets if sock is not None and sock.fileno() != -1}
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(self._requests, self._connections_opened, len(self._open_sockets()))
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def run(self, main: Awaitable[T]) -> T:
+        async def _main() -> T:
+            try:
+                return await main
+            finally:
+                await self.aclose()
+
+        return asyncio.run(_main())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+transport = Transport(
+    max_connections=config.http_max_connections,
+    max_keepalive=config.http_max_keepalive,
+    http2=config.http2,
+    timeout=config.http_timeout_seconds,
+    user_agent=config.user_agent,
+    limiter=rate_limiter,
+)
@@ -1 +1,9 @@
-from scholarharvester.supa_writer import supabase_conn, upsert_citation, upsert_dataset, upsert_metric
+from scholarharvester.supa_writer import (
+    supabase_conn,
+    upsert_citation,
+    upsert_citations,
+    upsert_dataset,
+    upsert_metric,
+    upsert_metric_batch,
+    upsert_metrics,
+)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from scholarharvester import registry
+from scholarharvester.adapters import official
+from scholarharvester.adapters.export_cache import DiscoveryCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_column_mappings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(registry, "column_mappings", registry.ColumnMappingCache(tmp_path / "columns.json"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_discovery_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(official, "discovery_cache", DiscoveryCache(tmp_path / "discovery.json", ttl_seconds=3600))
@@ -5,6 +5,12 @@ from pathlib import Path
 import pytest
 
 from scholarharvester.adapters import ADAPTERS
+from scholarharvester.adapters.export_cache import fetch_export
+from scholarharvester.adapters.utils import AdapterResult, CitationPayload, MetricBatch, MetricPayload
+from scholarharvester.delta import MetricDelta, metric_key, metric_state
+from scholarharvester.services import parse_pool as parse_pool_module
+from scholarharvester.services.parse_pool import IpcBatches, _parse_to_ipc
+from scholarharvester.staging import DeltaStats, stage_records
 
 FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
 ADAPTER_FIXTURE_ENV = {
@@ -30,3 +36,113 @@ def test_adapter_returns_metrics(name: str, adapter: callable, monkeypatch: pyte
     assert result.dataset.title
     for metric in result.metrics:
         assert metric.citations, f"{name} metric missing citation"
+
+
+@pytest.mark.parametrize("name, adapter", ADAPTERS.items())
+def test_chunked_collect_matches_whole_export(name: str, adapter: callable, monkeypatch: pytest.MonkeyPatch) -> None:
+    env_var, fixture_name = ADAPTER_FIXTURE_ENV[name]
+    monkeypatch.setenv("SCHOLARHARVESTER_ALLOW_LOCAL_FIXTURES", "1")
+    monkeypatch.setenv(env_var, str(FIXTURE_DIR / fixture_name))
+
+    whole = adapter({})
+    chunked = adapter({"chunk_size": "1"})
+    assert chunked.dataset == whole.dataset
+    assert list(MetricBatch.concat(chunked.batches())) == list(whole.metrics)
+
+
+def test_metric_batch_round_trips_payloads() -> None:
+    citation = CitationPayload(
+        title="Export", publisher="UC", year=2024, source_url="https://example.edu", interpretation_note="note"
+    )
+    payloads = [
+        MetricPayload(campus="UCLA", major="Math", stat_name="applicants", stat_value_numeric=10.0, citations=[citation]),
+        MetricPayload(campus="UCLA", stat_name="admit_rate", stat_value_text="n/a", citations=[citation]),
+    ]
+
+    batch = MetricBatch.from_payloads(payloads)
+    assert len(batch.citations) == 1
+    assert list(batch) == payloads
+    assert list(MetricBatch.concat([batch, batch])) == payloads + payloads
+
+
+@pytest.mark.parametrize("name", ["uc_info_center_transfers_major", "ccc_catalog_courses"])
+@pytest.mark.parametrize("params", [{}, {"chunk_size": "2"}])
+def test_ipc_hand_off_preserves_batches(
+    name: str, params: dict[str, str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    env_var, fixture_name = ADAPTER_FIXTURE_ENV[name]
+    monkeypatch.setenv("SCHOLARHARVESTER_ALLOW_LOCAL_FIXTURES", "1")
+    monkeypatch.setenv(env_var, str(FIXTURE_DIR / fixture_name))
+    export = fetch_export(str(FIXTURE_DIR / fixture_name))
+
+    expected = ADAPTERS[name](params, export=export)
+    parsed = _parse_to_ipc(name, params, export, str(tmp_path))
+    batches = list(IpcBatches(parsed))
+
+    assert parsed.dataset == expected.dataset
+    assert list(MetricBatch.concat(batches)) == list(MetricBatch.concat(expected.batches()))
+    assert not Path(parsed.path).exists()
+
+
+def test_closing_an_unread_result_removes_its_ipc_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    env_var, fixture_name = ADAPTER_FIXTURE_ENV["uc_info_center_transfers_major"]
+    monkeypatch.setenv("SCHOLARHARVESTER_ALLOW_LOCAL_FIXTURES", "1")
+    monkeypatch.setenv(env_var, str(FIXTURE_DIR / fixture_name))
+    export = fetch_export(str(FIXTURE_DIR / fixture_name))
+
+    for consumed in (0, 1):
+        parsed = _parse_to_ipc("uc_info_center_transfers_major", {"chunk_size": "2"}, export, str(tmp_path))
+        result = AdapterResult(parsed.dataset, metrics=MetricBatch.empty(), chunks=IpcBatches(parsed), export=export)
+        batches = result.batches()
+        for _ in range(consumed):
+            next(batches)
+        result.close()
+        result.close()
+        assert not Path(parsed.path).exists()
+
+
+def test_stage_records_link_shared_citations() -> None:
+    citation = CitationPayload(
+        title="Export", publisher="UC", year=2024, source_url="https://example.edu", interpretation_note="note"
+    )
+    batch = MetricBatch.from_payloads(
+        [MetricPayload(campus="UCLA", stat_name=name, stat_value_numeric=1.0, citations=[citation]) for name in "abc"]
+    )
+
+    staged = list(stage_records(7, [batch, batch]))
+
+    assert [len(metrics) for metrics, _, _ in staged] == [3, 3]
+    assert [citations for _, citations, _ in staged] == [
+        [(0, "Export", "UC", 2024, "https://example.edu", "note")],
+        [(1, "Export", "UC", 2024, "https://example.edu", "note")],
+    ]
+    assert [links for _, _, links in staged] == [[(0, 0), (1, 0), (2, 0)], [(3, 1), (4, 1), (5, 1)]]
+
+
+def test_metric_delta_classifies_rows() -> None:
+    batch = MetricBatch.from_payloads(
+        [MetricPayload(campus="UCLA", stat_name=name, stat_value_numeric=1.0) for name in ("a", "b", "c")]
+    )
+    rows = list(batch.rows())
+    delta = MetricDelta({metric_key(row): (index, metric_state(row)) for index, row in enumerate(rows[:2])})
+    rows[1] = {**rows[1], "stat_value_numeric": 2.0}
+
+    fresh, changed = delta.classify(rows + [{**rows[2], "notes": "latest"}])
+
+    assert fresh == [{**rows[2], "notes": "latest"}]
+    assert changed == [(1, rows[1])]
+    assert delta.stats == DeltaStats(new=1, updated=1, unchanged=1)
+    assert delta.classify(rows[:2]) == ([], [])
+
+
+def test_shutdown_pools_stops_idle_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(parse_pool_module, "_pools", {})
+    pool = parse_pool_module.parse_pool(1)
+    executor = pool.executor
+    assert executor.submit(abs, -3).result() == 3
+
+    parse_pool_module.shutdown_pools()
+
+    assert pool._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(abs, -3)
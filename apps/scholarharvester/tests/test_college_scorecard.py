@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+from scholarharvester.services import college_scorecard
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.commits = 0
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def execute(self, _statement: object) -> None:
+        return None
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+def _patch_run(
+    monkeypatch: pytest.MonkeyPatch, session: _Session, checkpoint: college_scorecard.SyncCheckpoint
+) -> list[tuple[int, int]]:
+    saved: list[tuple[int, int]] = []
+
+    async def start_run(**_kwargs: object) -> college_scorecard.SyncCheckpoint:
+        return checkpoint
+
+    async def save_checkpoint(_session: _Session, current: college_scorecard.SyncCheckpoint) -> None:
+        saved.append((current.next_page, current.imported))
+
+    monkeypatch.setattr(college_scorecard, "_start_run", start_run)
+    monkeypatch.setattr(college_scorecard, "_save_checkpoint", save_checkpoint)
+    monkeypatch.setattr(college_scorecard, "get_session", lambda: session)
+    return saved
+
+
+def _school(index: int) -> dict[str, Any]:
+    return {"id": index, "school.name": f"School {index:03d}", "school.state": "CA", "school.operating": 1}
+
+
+def test_concurrent_sync_writes_pages_in_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    total, per_page = 23, 5
+    throttled: set[int] = set()
+    sleeps: list[float] = []
+    written: list[list[str]] = []
+    session = _Session()
+    real_sleep = asyncio.sleep
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        if page == 2 and page not in throttled:
+            throttled.add(page)
+            return httpx.Response(429, headers={"Retry-After": "7"})
+        # Later pages answer first so the writer has to restore page order.
+        await real_sleep(0.01 * (5 - page))
+        start = page * per_page
+        results = [_school(index) for index in range(start, min(start + per_page, total))]
+        return httpx.Response(200, json={"metadata": {"total": total}, "results": results})
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    async def record(_session: _Session, rows: list[dict[str, Any]]) -> tuple[int, int]:
+        written.append([row["external_id"] for row in rows])
+        return len(rows), 0
+
+    async def run() -> dict[str, int | None]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(college_scorecard.transport, "async_client", lambda: client)
+            monkeypatch.setattr(college_scorecard.asyncio, "sleep", fake_sleep)
+            return await college_scorecard.sync_college_scorecard(
+                api_key="key", per_page=per_page, concurrency=3, commit_pages=2
+            )
+
+    monkeypatch.setattr(college_scorecard, "_upsert_institutions", record)
+    checkpoint = college_scorecard.SyncCheckpoint(runlog_id=1, state=None, per_page=per_page)
+    saved = _patch_run(monkeypatch, session, checkpoint)
+    summary = asyncio.run(run())
+
+    assert summary == {
+        "run_id": 1,
+        "start_page": 0,
+        "imported": total,
+        "inserted": total,
+        "updated": 0,
+        "unchanged": 0,
+        "pages": 5,
+        "commits": 3,
+        "source_total": total,
+    }
+    assert saved == [(2, 10), (4, 20), (5, total)]
+    assert session.commits == 4
+    assert [external_id for rows in written for external_id in rows] == [str(index) for index in range(total)]
+    assert sleeps == [7.0]
+
+
+def test_resumed_sync_starts_at_checkpoint(monkeypatch: pytest.MonkeyPatch) -> None:
+    total, per_page = 23, 5
+    requested: list[int] = []
+    session = _Session()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        requested.append(page)
+        start = page * per_page
+        results = [_school(index) for index in range(start, min(start + per_page, total))]
+        return httpx.Response(200, json={"metadata": {"total": total}, "results": results})
+
+    async def record(_session: _Session, rows: list[dict[str, Any]]) -> tuple[int, int]:
+        # Every resumed page was already stored once, so one school changed and the rest are skipped.
+        return 0, 1
+
+    async def run() -> dict[str, int | None]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(college_scorecard.transport, "async_client", lambda: client)
+            return await college_scorecard.sync_college_scorecard(
+                api_key="key", per_page=per_page, state="ca", resume=True
+            )
+
+    checkpoint = college_scorecard.SyncCheckpoint(runlog_id=7, state="CA", per_page=per_page, next_page=3, imported=15)
+    monkeypatch.setattr(college_scorecard, "_upsert_institutions", record)
+    saved = _patch_run(monkeypatch, session, checkpoint)
+    summary = asyncio.run(run())
+
+    assert sorted(requested) == [3, 4]
+    assert saved == [(5, total)]
+    assert summary["run_id"] == 7
+    assert summary["start_page"] == 3
+    assert summary["imported"] == total
+    assert (summary["inserted"], summary["updated"], summary["unchanged"]) == (0, 1, 7)
+
+
+def test_bulk_import_maps_like_the_api(monkeypatch: pytest.MonkeyPatch) -> None:
+    written: list[dict[str, Any]] = []
+    session = _Session()
+
+    async def record(_session: _Session, rows: list[dict[str, Any]]) -> tuple[int, int]:
+        written.extend(rows)
+        return len(rows), 0
+
+    monkeypatch.setattr(college_scorecard, "_upsert_institutions", record)
+    monkeypatch.setattr(college_scorecard, "get_session", lambda: session)
+    path = Path(__file__).parent / "fixtures" / "scorecard_bulk.csv"
+    summary = asyncio.run(college_scorecard.import_scorecard_bulk(path, state="ca"))
+
+    assert summary == {"scanned": 5, "imported": 2, "inserted": 2, "updated": 0, "unchanged": 0}
+    assert session.commits == 1
+    berkeley, davis = written
+    assert berkeley["external_id"] == "110635"
+    assert berkeley["control"] == "Public"
+    assert berkeley["locale"] == "City: Midsize"
+    assert berkeley["website"] == "https://www.berkeley.edu/"
+    assert berkeley["avg_net_price"] == 15174
+    assert berkeley["sat_average"] == 1422
+    assert "federal_aid_rate" not in berkeley
+    assert davis["act_midpoint"] is None
+    assert davis["price_calculator_url"] is None
+    api_row = college_scorecard._map_row({"id": 110635, "school.name": "University of California-Berkeley"})
+    assert api_row is not None and set(berkeley) == set(api_row) - set(college_scorecard.BULK_SKIPPED_COLUMNS)
+
+
+def test_map_row_applies_field_table() -> None:
+    row = college_scorecard._map_row(
+        {
+            "id": 110635,
+            "school.name": " University of California-Berkeley ",
+            "school.ownership": 1,
+            "school.locale_id": None,
+            "school.locale": 12,
+            "school.degrees_awarded.predominant": "3",
+            "school.school_url": "www.berkeley.edu/",
+            "school.carnegie_basic": 15,
+            "latest.student.size": "32143.0",
+            "latest.admissions.admission_rate.overall": 0.1137,
+            "latest.cost.avg_net_price.overall": "",
+        }
+    )
+
+    assert row is not None
+    assert row["external_id"] == "110635"
+    assert row["source"] == "College Scorecard"
+    assert row["name"] == "University of California-Berkeley"
+    assert row["control"] == "Public"
+    assert row["locale"] == "12"
+    assert row["locale_code"] is None
+    assert row["highest_degree"] == "Bachelor's"
+    assert row["website"] == "https://www.berkeley.edu/"
+    assert row["carnegie_basic"] == "15"
+    assert row["student_size"] == 32143
+    assert row["admission_rate"] == 0.1137
+    assert row["avg_net_price"] is None
+    assert set(row) == {field.column for field in college_scorecard.SCORECARD_MAP} | {"source"}
+    assert college_scorecard._map_row({"id": 1, "school.name": "Closed", "school.operating": 0}) is None
+    assert college_scorecard._map_row({"id": 2, "school.name": "Branch", "school.main_campus": "0"}) is None
+    assert college_scorecard._map_row({"id": 3, "school.name": "  "}) is None
+
+
+def test_ordered_pages_keeps_a_sliding_window() -> None:
+    started: list[int] = []
+
+    async def fetch(page: int) -> dict[str, Any]:
+        started.append(page)
+        await asyncio.sleep(0)
+        if page == 4:
+            raise httpx.HTTPStatusError("boom", request=httpx.Request("GET", "https://x"), response=httpx.Response(500))
+        return {"page": page}
+
+    async def run() -> list[int]:
+        seen: list[int] = []
+        pages = college_scorecard._ordered_pages(fetch, {"page": 0}, 0, 20, 5, window=3)
+        with pytest.raises(httpx.HTTPStatusError):
+            async for payload in pages:
+                seen.append(payload["page"])
+                await asyncio.sleep(0.01)
+                if payload["page"] == 1:
+                    assert sorted(started) == [1, 2, 3]
+        await pages.aclose()
+        return seen
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+    # Page 4 failed after page 3 was taken, so nothing beyond page 3 + window was requested.
+    assert set(started) <= set(range(1, 7)) and 4 in started
+
+
+class _UpsertResult:
+    def __init__(self, flags: list[bool]) -> None:
+        self.flags = flags
+
+    def scalars(self) -> "_UpsertResult":
+        return self
+
+    def all(self) -> list[bool]:
+        return self.flags
+
+
+def test_upsert_guards_on_content_hash(monkeypatch: pytest.MonkeyPatch) -> None:
+    from sqlalchemy.dialects import postgresql
+
+    executed: list[tuple[Any, list[dict[str, Any]]]] = []
+
+    class Session:
+        async def execute(self, statement: Any, rows: list[dict[str, Any]]) -> _UpsertResult:
+            executed.append((statement, rows))
+            # RETURNING xmax = 0 is true for inserted rows and false for updated ones.
+            return _UpsertResult([True, False])
+
+    api_row = college_scorecard._map_row(
+        {
+            "id": 110635,
+            "school.name": "University of California-Berkeley",
+            "latest.aid.percent_receiving_federal_student_aid": 0.2,
+        }
+    )
+    assert api_row is not None and api_row["federal_aid_rate"] == 0.2
+    bulk_row = {key: value for key, value in api_row.items() if key not in college_scorecard.BULK_SKIPPED_COLUMNS}
+
+    assert asyncio.run(college_scorecard._upsert_institutions(Session(), [api_row, api_row])) == (1, 1)
+    assert asyncio.run(college_scorecard._upsert_institutions(Session(), [bulk_row, bulk_row])) == (1, 1)
+
+    (api_statement, api_params), (bulk_statement, bulk_params) = executed
+    assert api_params[0]["content_hash"] == bulk_params[0]["content_hash"]
+    api_sql = str(api_statement.compile(dialect=postgresql.dialect()))
+    bulk_sql = str(bulk_statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (external_id) DO UPDATE SET" in api_sql
+    assert (
+        "WHERE institution.content_hash IS DISTINCT FROM excluded.content_hash "
+        "OR institution.federal_aid_rate IS DISTINCT FROM excluded.federal_aid_rate RETURNING xmax = 0"
+    ) in api_sql
+    assert "WHERE institution.content_hash IS DISTINCT FROM excluded.content_hash RETURNING xmax = 0" in bulk_sql
+    assert "federal_aid_rate" not in bulk_sql.split("DO UPDATE SET")[1]
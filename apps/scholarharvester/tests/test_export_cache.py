@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import httpx
+import pytest
+
+from scholarharvester.adapters.export_cache import HttpCache, fetch_export
+from scholarharvester.adapters.official import discover_tabular_url
+from scholarharvester.adapters.raw_archive import RawArchive
+
+BODY = b"campus,year,applicants\nUCLA,2024,10\n"
+
+
+def test_conditional_get_serves_not_modified_from_disk(tmp_path: Path) -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=BODY, headers={"ETag": '"v1"', "Content-Type": "text/csv; charset=utf-8"})
+
+    cache = HttpCache(tmp_path, client=httpx.Client(transport=httpx.MockTransport(handler)))
+    url = "https://www.universityofcalifornia.edu/infocenter/export.csv"
+
+    first = cache.fetch(url)
+    second = cache.fetch(url)
+
+    assert first.http_status == 200 and not first.from_cache
+    assert first.mime == "text/csv" and first.bytes == len(BODY)
+    assert second.http_status == 304 and second.from_cache
+    assert second.sha256 == first.sha256 and second.path == first.path
+    assert Path(second.path).read_bytes() == BODY
+    assert "if-none-match" not in seen[0].headers
+    assert seen[1].headers["if-none-match"] == '"v1"'
+
+
+def test_raw_archive_round_trips_and_dedupes(tmp_path: Path) -> None:
+    source = tmp_path / "export.csv"
+    source.write_bytes(b"campus,year\nUCLA,2024\n" * 500)
+    export = fetch_export(str(source))
+    archive = RawArchive(tmp_path / "archive")
+
+    key = archive.save(export)
+    assert archive.save(export) == key
+    assert (tmp_path / "archive" / key).stat().st_size < export.bytes
+
+    with archive.restore(key, export) as restored:
+        assert restored.from_cache
+        assert Path(restored.path).read_bytes() == source.read_bytes()
+    assert not Path(restored.path).exists()
+
+
+def test_discovery_is_cached_and_revalidated_with_head(tmp_path: Path) -> None:
+    base_url = "https://www.universityofcalifornia.edu/infocenter"
+    export_url = "https://www.universityofcalifornia.edu/infocenter/transfers-by-major.csv"
+    seen: list[tuple[str, str]] = []
+    export_live = True
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, str(request.url)))
+        if request.method == "HEAD":
+            return httpx.Response(200 if export_live else 404)
+        page = '<a href="/about">About</a><a href="/infocenter/transfers-by-major.csv">CSV</a>'
+        return httpx.Response(200, text=page + "<a href='/infocenter/other.csv'>" * 1000)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    keywords = ("transfer",)
+
+    assert discover_tabular_url(base_url, keywords, client=client) == export_url
+    assert discover_tabular_url(base_url, keywords, client=client) == export_url
+    assert seen == [("GET", base_url), ("HEAD", export_url)]
+    assert [path.name for path in tmp_path.iterdir()] == ["discovery.json"]
+
+    export_live = False
+    assert discover_tabular_url(base_url, keywords, client=client) == export_url
+    assert seen[-2:] == [("HEAD", export_url), ("GET", base_url)]
+
+
+def test_truncated_index_is_treated_as_empty(tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=BODY, headers={"ETag": '"v1"'})
+
+    cache = HttpCache(tmp_path, client=httpx.Client(transport=httpx.MockTransport(handler)))
+    url = "https://www.universityofcalifornia.edu/infocenter/export.csv"
+    cache.index_path.write_text('{"https://www.universityofcalifornia.edu/infocenter/export.csv": {"sha')
+
+    fetched = cache.fetch(url)
+
+    assert fetched.http_status == 200 and Path(fetched.path).read_bytes() == BODY
+    assert cache._load_index()[url]["etag"] == '"v1"'
+    assert [path.name for path in tmp_path.iterdir() if path.is_file()] == ["index.json"]
+
+
+def test_failed_download_leaves_no_staging_file(tmp_path: Path) -> None:
+    class Broken(httpx.SyncByteStream):
+        def __iter__(self):
+            yield BODY[:10]
+            raise httpx.ReadError("connection reset")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=Broken())
+
+    cache = HttpCache(tmp_path, client=httpx.Client(transport=httpx.MockTransport(handler)))
+
+    with pytest.raises(httpx.ReadError):
+        cache.fetch("https://www.universityofcalifornia.edu/infocenter/export.csv")
+    assert list((tmp_path / "objects" / "tmp").iterdir()) == []
+    assert not cache.index_path.exists()
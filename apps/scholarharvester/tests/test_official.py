@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import math
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from scholarharvester.adapters import official
+from scholarharvester.adapters.export_cache import FetchedExport
+from scholarharvester.adapters.official import (
+    COMMON_STAT_COLUMNS,
+    _find_column,
+    _metric_unit,
+    _normalize_value,
+    _to_number,
+    _to_year,
+    build_metrics_from_frame,
+)
+from scholarharvester.adapters.utils import CitationPayload, MetricPayload
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def _build_metrics_by_row(
+    frame: pd.DataFrame,
+    *,
+    cohort: str,
+    default_campus: str | None,
+    default_focus: str | None,
+    source_url: str,
+    publisher: str,
+    dataset_year: int,
+    campus_filter: str | None,
+    focus_filter: str | None,
+    focus_kind: str,
+    source_school_kind: str | None = None,
+) -> tuple[list[MetricPayload], int]:
+    """Reference row-at-a-time implementation the vectorized engine must match."""
+    campus_col = _find_column(frame, ("campus", "campus_name", "institution", "university"))
+    year_col = _find_column(frame, ("year", "admit_year", "report_year", "calendar_year"))
+    term_col = _find_column(frame, ("term", "season", "admit_term"))
+    major_col = _find_column(frame, ("major", "major_name", "program", "major_program"))
+    discipline_col = _find_column(frame, ("discipline", "discipline_name", "academic_discipline", "broad_discipline"))
+    source_school_col = _find_column(frame, ("source_school", "school_name", "high_school", "community_college"))
+    school_type_col = _find_column(frame, ("school_type", "source_school_type", "institution_type"))
+
+    stat_columns = {
+        stat_name: _find_column(frame, aliases) for stat_name, aliases in COMMON_STAT_COLUMNS.items()
+    }
+    stat_columns = {stat_name: column for stat_name, column in stat_columns.items() if column}
+
+    metrics: list[MetricPayload] = []
+    latest_year = dataset_year
+
+    for _, row in frame.iterrows():
+        campus = _normalize_value(row[campus_col]) if campus_col else (default_campus or "")
+        if not campus:
+            continue
+        if campus_filter and campus.lower() != campus_filter.lower():
+            continue
+
+        major: str | None = None
+        discipline: str | None = None
+        if focus_kind == "major":
+            focus_value = _normalize_value(row[major_col]) if major_col else (default_focus or "")
+            major = focus_value or None
+        elif focus_kind == "discipline":
+            focus_value = _normalize_value(row[discipline_col]) if discipline_col else (default_focus or "")
+            discipline = focus_value or None
+        else:
+            focus_value = default_focus or ""
+
+        if focus_filter and focus_value and focus_value.lower() != focus_filter.lower():
+            continue
+
+        row_year = _to_year(row[year_col], dataset_year) if year_col else dataset_year
+        latest_year = max(latest_year, row_year)
+        term = _normalize_value(row[term_col]) if term_col else "Fall"
+        if not term:
+            term = "Fall"
+
+        source_school = _normalize_value(row[source_school_col]) if source_school_col else None
+        school_type = _normalize_value(row[school_type_col]) if school_type_col else source_school_kind
+        if school_type:
+            lowered = school_type.lower()
+            if "high" in lowered:
+                school_type = "HighSchool"
+            elif "college" in lowered:
+                school_type = "CommunityCollege"
+            elif school_type not in {"HighSchool", "CommunityCollege", "Other"}:
+                school_type = "Other"
+
+        for stat_name, column in stat_columns.items():
+            raw_value = row[column]
+            numeric = _to_number(raw_value)
+            text = None if numeric is not None else _normalize_value(raw_value)
+            if numeric is None and not text:
+                continue
+            metrics.append(
+                MetricPayload(
+                    campus=campus,
+                    major=major,
+                    discipline=discipline,
+                    source_school=source_school if source_school else None,
+                    school_type=school_type if school_type else None,
+                    cohort=cohort,
+                    stat_name=stat_name,
+                    stat_value_numeric=numeric,
+                    stat_value_text=text,
+                    unit=_metric_unit(stat_name),
+                    percentile=stat_name.split("_p")[-1] if stat_name.startswith("gpa_p") else None,
+                    year=row_year,
+                    term=term,
+                    notes=f"Official-source metric extracted from {source_url}",
+                    citations=[
+                        CitationPayload(
+                            title=f"{publisher} official export",
+                            publisher=publisher,
+                            year=row_year,
+                            source_url=source_url,
+                            interpretation_note="Parsed from official export row values.",
+                        )
+                    ],
+                )
+            )
+
+    return metrics, latest_year
+
+
+def _comparable(metric: MetricPayload) -> MetricPayload:
+    if metric.stat_value_numeric is not None and math.isnan(metric.stat_value_numeric):
+        metric.stat_value_numeric = -1.0
+    return metric
+
+
+def _assert_parity(frame: pd.DataFrame, **kwargs: object) -> None:
+    expected, expected_year = _build_metrics_by_row(frame, **kwargs)
+    actual, actual_year = build_metrics_from_frame(frame, **kwargs)
+    assert actual_year == expected_year
+    assert [_comparable(metric) for metric in actual] == [_comparable(metric) for metric in expected]
+
+
+PARITY_CASES = [
+    ("uc_transfers.csv", "transfer", "major", None),
+    ("uc_freshman.csv", "freshman", "discipline", None),
+    ("uc_source_school.csv", "freshman", "major", "HighSchool"),
+    ("csu_transfer.csv", "transfer", "major", None),
+    ("csu_freshman.csv", "freshman", "discipline", None),
+    ("cccco_transfers.csv", "transfer", "none", "CommunityCollege"),
+]
+
+
+@pytest.mark.parametrize("fixture_name, cohort, focus_kind, source_school_kind", PARITY_CASES)
+@pytest.mark.parametrize("campus_filter", [None, "UCLA", "csu fullerton"])
+def test_vectorized_matches_row_loop_on_fixtures(
+    fixture_name: str, cohort: str, focus_kind: str, source_school_kind: str | None, campus_filter: str | None
+) -> None:
+    _assert_parity(
+        pd.read_csv(FIXTURE_DIR / fixture_name),
+        cohort=cohort,
+        default_campus=campus_filter or "All CCCs",
+        default_focus=None,
+        source_url="https://example.edu/export.csv",
+        publisher="Example Publisher",
+        dataset_year=2022,
+        campus_filter=campus_filter,
+        focus_filter=None,
+        focus_kind=focus_kind,
+        source_school_kind=source_school_kind,
+    )
+
+
+def test_vectorized_matches_row_loop_on_messy_values() -> None:
+    frame = pd.DataFrame(
+        {
+            "Campus Name": ["UCLA", " UC Irvine ", "", None, float("nan"), "UCLA"],
+            "Major": ["Math", "", "Math", "Math", "Math", "History"],
+            "Admit Year": ["2024", "1850", "n/a", "2023.7", "2021", "2030"],
+            "Term": ["Fall", "", "Winter", "Fall", "Fall", None],
+            "School Name": ["Walnut High", None, "", "IVC", "X", "Y"],
+            "Institution Type": ["public high school", "Community College", "HighSchool", "charter", "", None],
+            "Applicants": ["1,200", "45%", "nan", "", "n/a", 7],
+            "Admit Rate": ["25.5%", "inf", None, "  12 ", "1e2", "abc"],
+            "Enrolled": [1, 2, 3, 4, 5, 6],
+        }
+    )
+    for focus_filter in (None, "math"):
+        _assert_parity(
+            frame,
+            cohort="freshman",
+            default_campus="Fallback",
+            default_focus="Undeclared",
+            source_url="https://example.edu/export.csv",
+            publisher="Example Publisher",
+            dataset_year=2022,
+            campus_filter=None,
+            focus_filter=focus_filter,
+            focus_kind="major",
+            source_school_kind="HighSchool",
+        )
+
+
+def test_column_mapping_is_cached_by_header_fingerprint(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    frame = pd.read_csv(FIXTURE_DIR / "uc_transfers.csv")
+    kwargs = {
+        "cohort": "transfer",
+        "default_campus": None,
+        "default_focus": None,
+        "source_url": "https://example.edu/export.csv",
+        "publisher": "Example Publisher",
+        "dataset_year": 2022,
+        "campus_filter": None,
+        "focus_filter": None,
+        "focus_kind": "major",
+        "adapter_name": "uc_info_center_transfers_major",
+    }
+    with caplog.at_level("WARNING", logger="scholarharvester.adapters.official"):
+        expected, _ = build_metrics_from_frame(frame, **kwargs)
+    assert len(caplog.records) == 1
+
+    def fail(*_: object) -> None:
+        raise AssertionError("cached mapping should skip alias resolution")
+
+    monkeypatch.setattr(official, "_find_column", fail)
+    caplog.clear()
+    renamed = frame.rename(columns={"campus": " Campus ", "gpa_p50": "GPA P50"})
+    actual, _ = build_metrics_from_frame(renamed, **kwargs)
+    assert not caplog.records
+    assert list(actual) == list(expected)
+
+
+def test_json_array_export_streams_in_chunks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    frame = pd.read_csv(FIXTURE_DIR / "uc_transfers.csv")
+    path = tmp_path / "transfers.json"
+    frame.to_json(path, orient="records", indent=2)
+    export = FetchedExport(url="https://example.edu/t.json", path=str(path), sha256="", bytes=0, mime="", http_status=200)
+    monkeypatch.setattr(official, "_iter_json_array", partial(official._iter_json_array, read_size=7))
+
+    chunks = list(official.iter_table(export, 2, usecols=["campus", "major"]))
+
+    assert [len(chunk) for chunk in chunks[:-1]] == [2] * (len(chunks) - 1)
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, pd.read_json(path)[["campus", "major"]])
+
+    path.write_text('{"rows": [{"campus": "UCLA"}]}', encoding="utf-8")
+    assert official._iter_json_array(str(path), 2) is None
+    path.write_text('[{"campus": "UCLA"}, {"campus": "UC', encoding="utf-8")
+    with pytest.raises(ValueError, match="Truncated"):
+        list(official.iter_table(export, 2))
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import pytest
+
+from scholarharvester.ratelimit import HostRateLimiter
+
+
+def test_token_bucket_spaces_requests_per_host() -> None:
+    limiter = HostRateLimiter(lambda: {"www.calstate.edu": 2.0})
+
+    assert limiter.reserve("https://www.calstate.edu/data") == 0
+    assert limiter.reserve("https://www.calstate.edu/data/export.csv") == pytest.approx(2.0, abs=0.05)
+    assert limiter.reserve("https://www.calstate.edu/robots.txt") == pytest.approx(4.0, abs=0.05)
+    assert limiter.reserve("https://datamart.cccco.edu/robots.txt") == 0
+    assert limiter.reserve("https://datamart.cccco.edu/export.json") == 0
+
+
+def test_tighten_only_raises_the_interval() -> None:
+    limiter = HostRateLimiter(lambda: {"www.cccco.edu": 2.0})
+
+    limiter.tighten("https://www.cccco.edu", 5)
+    assert limiter.interval("https://www.cccco.edu/catalog") == 5
+    limiter.tighten("https://www.cccco.edu", 1)
+    assert limiter.interval("https://www.cccco.edu/catalog") == 5
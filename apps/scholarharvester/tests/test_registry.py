@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from scholarharvester import registry
+
+REGISTRY_YAML = """
+sources:
+  - name: UC Info Center Transfers
+    adapter: uc_info_center_transfers_major
+    base_url: https://www.universityofcalifornia.edu/infocenter
+    allowed_mime: ["text/csv"]
+  - name: CSU Transfers Dashboard
+    adapter: csu_system_dashboards_transfer
+    base_url: https://www.calstate.edu/data
+"""
+
+
+def _write(path: Path, text: str, mtime_ns: int) -> None:
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_registry_indexes_and_reloads_on_mtime(tmp_path: Path) -> None:
+    path = tmp_path / "SOURCE_REGISTRY.yaml"
+    _write(path, REGISTRY_YAML, 1_000_000_000)
+    sources = registry.SourceRegistry(path)
+
+    transfers = sources.by_adapter("uc_info_center_transfers_major")
+    assert transfers is not None and transfers["name"] == "UC Info Center Transfers"
+    assert sources.by_name("CSU Transfers Dashboard") is sources.by_adapter("csu_system_dashboards_transfer")
+    assert sources.by_adapter("missing") is None
+    assert transfers["allowed_mime"] == ("text/csv",)
+    with pytest.raises(TypeError):
+        transfers["name"] = "changed"  # type: ignore[index]
+    assert sources.sources() is sources.sources()
+
+    _write(path, REGISTRY_YAML.replace("CSU Transfers Dashboard", "CSU Transfers"), 2_000_000_000)
+    assert sources.by_name("CSU Transfers Dashboard") is None
+    assert sources.by_adapter("csu_system_dashboards_transfer")["name"] == "CSU Transfers"  # type: ignore[index]
+
+
+def test_registry_reuses_compiled_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "SOURCE_REGISTRY.yaml"
+    compiled = tmp_path / "cache" / "source_registry.json"
+    _write(path, REGISTRY_YAML, 1_000_000_000)
+    first = registry.SourceRegistry(path, compiled).sources()
+    assert compiled.exists()
+
+    def fail(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("YAML should not be parsed when the compiled cache is current")
+
+    monkeypatch.setattr(registry.yaml, "load", fail)
+    assert registry.SourceRegistry(path, compiled).sources() == first
+
+    _write(path, REGISTRY_YAML, 2_000_000_000)
+    with pytest.raises(AssertionError):
+        registry.SourceRegistry(path, compiled).sources()
+
+
+def test_failed_compiled_cache_write_leaves_no_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "SOURCE_REGISTRY.yaml"
+    compiled = tmp_path / "cache" / "source_registry.json"
+    _write(path, REGISTRY_YAML + "    last_reviewed: 2024-05-01\n", 1_000_000_000)
+
+    sources = registry.SourceRegistry(path, compiled)
+
+    assert str(sources.by_name("CSU Transfers Dashboard")["last_reviewed"]) == "2024-05-01"  # type: ignore[index]
+    assert list(compiled.parent.iterdir()) == []
+
+    def fail(*_args: object) -> None:
+        raise PermissionError("read-only cache")
+
+    _write(path, REGISTRY_YAML, 2_000_000_000)
+    monkeypatch.setattr(registry.os, "replace", fail)
+    assert registry.SourceRegistry(path, compiled).by_adapter("csu_system_dashboards_transfer") is not None
+    assert list(compiled.parent.iterdir()) == []
+
+
+def test_column_mappings_merge_concurrent_writers(tmp_path: Path) -> None:
+    path = tmp_path / "columns.json"
+    first = registry.ColumnMappingCache(path)
+    second = registry.ColumnMappingCache(path)
+    assert first.get("uc", "aaa") is None
+    assert second.get("csu", "bbb") is None
+
+    first.put("uc", "aaa", {"row": {}, "stats": {}})
+    second.put("csu", "bbb", {"row": {}, "stats": {"gpa_p50": "gpa"}})
+
+    assert registry.ColumnMappingCache(path).get("uc", "aaa") == {"row": {}, "stats": {}}
+    assert first.get("csu", "bbb") == {"row": {}, "stats": {"gpa_p50": "gpa"}}
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+
+from scholarharvester.robots import RobotsCache
+
+ROBOTS = "User-agent: *\nCrawl-delay: 5\nDisallow: /private\n"
+
+
+def test_robots_fetched_once_per_host_and_persisted(tmp_path: Path) -> None:
+    seen: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, text=ROBOTS)
+
+    path = tmp_path / "robots.json"
+
+    async def run() -> None:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        cache = RobotsCache(path, ttl_seconds=3600, user_agent="ScholarHarvester/1.0", client=client)
+        first, second = await asyncio.gather(
+            cache.ensure("https://www.calstate.edu/data"),
+            cache.ensure("https://www.calstate.edu/data/freshman"),
+        )
+        assert first is second
+        assert first.crawl_delay(cache.agent) == 5
+        assert await cache.allowed("https://www.calstate.edu/data/export.csv")
+        assert not await cache.allowed("https://www.calstate.edu/private/export.csv")
+        assert await cache.allowed("tests/fixtures/csu_transfer.csv")
+        await client.aclose()
+
+    asyncio.run(run())
+    assert seen == ["https://www.calstate.edu/robots.txt"]
+    stamp = path.stat().st_mtime_ns
+
+    restarted = RobotsCache(path, ttl_seconds=3600, user_agent="ScholarHarvester/1.0")
+    assert not restarted.can_fetch("https://www.calstate.edu/private/x.csv")
+    assert asyncio.run(restarted.ensure("https://www.calstate.edu/")).text == ROBOTS
+    assert path.stat().st_mtime_ns == stamp
+    assert list(json.loads(path.read_text())) == ["https://www.calstate.edu"]
+
+
+def test_concurrent_caches_merge_into_one_file(tmp_path: Path) -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=f"# {request.url.host}\n")
+
+    path = tmp_path / "robots.json"
+
+    async def run() -> None:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        first = RobotsCache(path, ttl_seconds=3600, user_agent="ScholarHarvester/1.0", client=client)
+        second = RobotsCache(path, ttl_seconds=3600, user_agent="ScholarHarvester/1.0", client=client)
+        first.cached("https://www.calstate.edu/")
+        second.cached("https://www.calstate.edu/")
+        await first.ensure("https://www.calstate.edu/data")
+        await second.ensure("https://www.universityofcalifornia.edu/infocenter")
+        await first.ensure("https://www.cccco.edu/")
+        await client.aclose()
+
+    asyncio.run(run())
+    assert list(json.loads(path.read_text())) == [
+        "https://www.calstate.edu",
+        "https://www.cccco.edu",
+        "https://www.universityofcalifornia.edu",
+    ]
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == ["robots.json", "robots.json.lock"]
@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import pytest
+
+from scholarharvester.adapters.export_cache import FetchedExport
+from scholarharvester.adapters.utils import AdapterResult, CitationPayload, DatasetPayload, MetricBatch, MetricPayload
+from scholarharvester.models import Dataset, FileIngest, Metric, MetricCitation, Runlog, Source
+from scholarharvester.robots import RobotsCache
+from scholarharvester.services import runner
+from scholarharvester.staging import (
+    CITATION_STAGE,
+    LINK_STAGE,
+    METRIC_STAGE,
+    DeltaStats,
+    merge_with_dedupe_sql,
+    staging_ddl,
+)
+
+ADAPTER = "uc_info_center_transfers_major"
+EXPORT_URL = "https://www.universityofcalifornia.edu/infocenter/transfers-by-major.csv"
+METRIC_COLUMNS = [column.key for column in Metric.__table__.columns if column.key != "id"]
+
+
+class _Result:
+    def __init__(self, row: object) -> None:
+        self.row = row
+
+    def first(self) -> object:
+        return self.row
+
+
+class _Session:
+    def __init__(self, row: object = None) -> None:
+        self.row = row
+        self.added: list[object] = []
+        self.statements: list[object] = []
+        self.commits = 0
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    def add(self, obj: object) -> None:
+        self.added.append(obj)
+
+    async def flush(self) -> None:
+        for obj in self.added:
+            if isinstance(obj, Runlog) and obj.id is None:
+                obj.id = 41
+
+    async def execute(self, statement: object) -> _Result:
+        self.statements.append(statement)
+        return _Result(self.row)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+def _export(sha256: str = "abc123") -> FetchedExport:
+    return FetchedExport(
+        url=EXPORT_URL, path="tests/fixtures/uc_transfers.csv", sha256=sha256, bytes=10, mime="text/csv", http_status=200
+    )
+
+
+def _patch_run(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, session: _Session, previous: object | None
+) -> list[str]:
+    written: list[str] = []
+
+    async def ensure_source(_session: _Session, adapter_name: str, source_conf: Any) -> Source:
+        return Source(name=source_conf["name"], base_url=source_conf["base_url"], adapter=adapter_name)
+
+    async def last_completed(_session: _Session, adapter_name: str, params: dict[str, str]) -> object | None:
+        return previous
+
+    async def write_result(_session: _Session, *, runlog: Runlog, export: FetchedExport, **_kwargs: Any) -> FileIngest:
+        written.append(export.sha256)
+        runlog.status = "completed"
+        runlog.new_records = 3
+        return FileIngest(url=export.url, sha256=export.sha256)
+
+    def robots_handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="User-agent: *\nAllow: /\n")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(robots_handler))
+    monkeypatch.setattr(runner, "robots", RobotsCache(tmp_path / "robots.json", 3600, "ScholarHarvester/1.0", client))
+    monkeypatch.setattr(runner, "get_session", lambda: session)
+    monkeypatch.setattr(runner, "_ensure_source", ensure_source)
+    monkeypatch.setattr(runner, "_last_completed_ingest", last_completed)
+    monkeypatch.setattr(runner, "_write_result", write_result)
+    monkeypatch.setattr(runner, "resolve_official_data_url", lambda _source: EXPORT_URL)
+    monkeypatch.setattr(runner, "fetch_export", lambda _url: _export())
+    monkeypatch.setattr(runner, "update_provenance", lambda *_args, **_kwargs: None)
+    return written
+
+
+def _ingest(sha256: str, archive_key: str | None = None, params: dict[str, str] | None = None) -> SimpleNamespace:
+    return SimpleNamespace(id=7, sha256=sha256, archive_key=archive_key, params_jsonb=params)
+
+
+def test_last_completed_ingest_requires_matching_params() -> None:
+    row = _ingest("abc123", params={"year": "2024"})
+
+    session = _Session(row)
+    assert asyncio.run(runner._last_completed_ingest(session, ADAPTER, {"year": "2024"})) is row
+    statement = session.statements[0].compile()
+    assert "runlog.status" in str(statement) and "completed" in statement.params.values()
+
+    assert asyncio.run(runner._last_completed_ingest(_Session(row), ADAPTER, {"year": "2023"})) is None
+    assert asyncio.run(runner._last_completed_ingest(_Session(None), ADAPTER, {})) is None
+    legacy = _ingest("abc123")
+    assert asyncio.run(runner._last_completed_ingest(_Session(legacy), ADAPTER, {})) is legacy
+
+
+def test_unchanged_export_skips_parsing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    session = _Session()
+    written = _patch_run(monkeypatch, tmp_path, session, previous=_ingest("abc123"))
+
+    runlog = asyncio.run(runner.run_adapter(ADAPTER, {"chunk_size": "500"}, save_raw=False, parse_workers=0))
+
+    assert runlog.status == "unchanged"
+    assert runlog.params_jsonb == {}
+    assert (runlog.new_records, runlog.updated_records, runlog.unchanged_records) == (0, 0, 0)
+    assert runlog.finished_at is not None
+    assert session.commits == 1
+    assert session.statements == []
+    assert written == []
+
+
+@pytest.mark.parametrize(("previous", "force"), [(_ingest("abc123"), True), (_ingest("older"), False), (None, False)])
+def test_changed_or_forced_export_is_ingested(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, previous: object | None, force: bool
+) -> None:
+    session = _Session()
+    written = _patch_run(monkeypatch, tmp_path, session, previous=previous)
+
+    runlog = asyncio.run(runner.run_adapter(ADAPTER, {}, save_raw=False, force=force, parse_workers=0))
+
+    assert runlog.status == "completed"
+    assert runlog.new_records == 3
+    assert written == ["abc123"]
+
+
+def test_save_raw_archives_an_unchanged_export(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    session = _Session()
+    written = _patch_run(monkeypatch, tmp_path, session, previous=_ingest("abc123"))
+    archived: list[str] = []
+
+    def save(export: FetchedExport) -> str:
+        archived.append(export.sha256)
+        return f"ab/{export.sha256}.zst"
+
+    monkeypatch.setattr(runner.raw_archive, "save", save)
+    runlog = asyncio.run(runner.run_adapter(ADAPTER, {}, save_raw=True, parse_workers=0))
+
+    assert runlog.status == "unchanged"
+    assert written == []
+    assert archived == ["abc123"]
+    (statement,) = session.statements
+    compiled = statement.compile()
+    assert str(compiled).startswith("UPDATE file_ingest SET archive_key")
+    assert sorted(compiled.params.values(), key=str) == [7, "ab/abc123.zst"]
+
+
+def test_run_all_caps_concurrency_and_keeps_input_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    running = peak = 0
+    delays = {"a": 0.03, "b": 0.01, "broken": 0.0, "c": 0.02, "d": 0.0}
+
+    async def run_adapter(adapter_name: str, params: dict[str, str], save_raw: bool, **kwargs: Any) -> Runlog:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(delays[adapter_name])
+            if adapter_name == "broken":
+                raise RuntimeError("export missing")
+            return Runlog(id=len(adapter_name), status="completed", new_records=2, updated_records=1)
+        finally:
+            running -= 1
+
+    shutdowns: list[bool] = []
+    monkeypatch.setattr(runner, "run_adapter", run_adapter)
+    monkeypatch.setattr(runner, "shutdown_pools", lambda: shutdowns.append(True))
+    summaries = asyncio.run(runner.run_all(list(delays), {}, save_raw=False, concurrency=2))
+
+    assert peak == 2
+    assert shutdowns == [True]
+    assert [summary.adapter for summary in summaries] == list(delays)
+    assert [summary.status for summary in summaries] == ["completed", "completed", "failed", "completed", "completed"]
+    failed = summaries[2]
+    assert failed.error == "export missing" and failed.runlog_id is None
+    assert (summaries[0].metrics, summaries[0].updated, summaries[0].unchanged) == (2, 1, 0)
+
+
+class _Database:
+    """Fake session that hands out metric ids in insertion order, like a sequence."""
+
+    def __init__(self) -> None:
+        self.pending: list[object] = []
+        self.metrics: dict[int, dict[str, Any]] = {}
+        self.links: list[tuple[int, int]] = []
+        self.bulk_chunks: list[int] = []
+        self.commits = 0
+
+    def _store_metric(self, values: dict[str, Any]) -> int:
+        metric_id = 501 + len(self.metrics)
+        self.metrics[metric_id] = {column: values.get(column) for column in METRIC_COLUMNS}
+        return metric_id
+
+    def add(self, obj: object) -> None:
+        self.pending.append(obj)
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        for obj in pending:
+            if isinstance(obj, Metric):
+                obj.id = self._store_metric({column: getattr(obj, column) for column in METRIC_COLUMNS})
+            elif isinstance(obj, MetricCitation):
+                self.links.append((obj.metric_id, obj.citation_id))
+
+    async def scalars(self, statement: Any, params: list[dict[str, Any]]) -> _Result:
+        assert statement.table.name == "metric"
+        self.bulk_chunks.append(len(params))
+        ids = [self._store_metric(values) for values in params]
+        # Without sort_by_parameter_order Postgres may return RETURNING rows in any order.
+        return _Scalars(ids if statement._sort_by_parameter_order else ids[::-1])
+
+    async def execute(self, statement: Any, params: list[dict[str, Any]]) -> None:
+        assert statement.table.name == "metric_citation"
+        self.links.extend((values["metric_id"], values["citation_id"]) for values in params)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+class _Scalars:
+    def __init__(self, values: list[int]) -> None:
+        self.values = values
+
+    def all(self) -> list[int]:
+        return self.values
+
+
+def _write(monkeypatch: pytest.MonkeyPatch, threshold: int, batch_size: int) -> _Database:
+    export = CitationPayload(title="Export", publisher="UC", year=2024, source_url=EXPORT_URL, interpretation_note=None)
+    dashboard = CitationPayload(
+        title="Dashboard", publisher="UC", year=2024, source_url="https://example.edu/d", interpretation_note=None
+    )
+    batches = [
+        MetricBatch.from_payloads(
+            MetricPayload(
+                campus="UCLA",
+                major=f"Major {offset + index}",
+                cohort="transfer",
+                stat_name="admit_rate",
+                stat_value_numeric=float(offset + index),
+                year=2024,
+                citations=[export, dashboard][: (offset + index) % 3],
+            )
+            for index in range(size)
+        )
+        for offset, size in ((0, 2), (2, 5))
+    ]
+
+    async def citation_ids(_session: _Database, citations: tuple[CitationPayload, ...]) -> list[int]:
+        return [900 + [export, dashboard].index(citation) for citation in citations]
+
+    async def ensure_dataset(*_args: Any) -> Dataset:
+        return Dataset(id=5)
+
+    async def existing_metrics(*_args: Any) -> dict[Any, Any]:
+        return {}
+
+    monkeypatch.setattr(runner.config, "bulk_write_threshold", threshold)
+    monkeypatch.setattr(runner.config, "write_batch_size", batch_size)
+    monkeypatch.setattr(runner, "_citation_ids", citation_ids)
+    monkeypatch.setattr(runner, "_ensure_dataset", ensure_dataset)
+    monkeypatch.setattr(runner, "_existing_metrics", existing_metrics)
+    database = _Database()
+    dataset = DatasetPayload(title="t", year=2024, term="Fall", cohort="transfer")
+    result = AdapterResult(dataset, MetricBatch.empty(), iter(batches))
+    asyncio.run(
+        runner._write_result(
+            database,
+            source=Source(name="uc"),
+            runlog=Runlog(id=41, adapter=ADAPTER),
+            result=result,
+            export=_export(),
+            archive_key=None,
+            ingest_mode="insert",
+        )
+    )
+    return database
+
+
+def test_bulk_metric_writes_match_the_orm_path(monkeypatch: pytest.MonkeyPatch) -> None:
+    orm = _write(monkeypatch, threshold=100, batch_size=1000)
+    mixed = _write(monkeypatch, threshold=3, batch_size=2)
+
+    assert orm.bulk_chunks == []
+    assert mixed.bulk_chunks == [2, 2, 1]
+    assert mixed.metrics == orm.metrics
+    assert [metric["major"] for metric in mixed.metrics.values()] == [f"Major {index}" for index in range(7)]
+    assert sorted(mixed.links) == sorted(orm.links)
+    assert sorted(mixed.links) == [(502, 900), (503, 900), (503, 901), (505, 900), (506, 900), (506, 901)]
+    assert mixed.commits == orm.commits == 1
+
+
+class _CopyConnection:
+    def __init__(self, dialect: str = "postgresql") -> None:
+        self.dialect = SimpleNamespace(name=dialect)
+        self.statements: list[str] = []
+        self.copied: list[tuple[str, list[tuple[Any, ...]], tuple[str, ...]]] = []
+
+    async def get_raw_connection(self) -> SimpleNamespace:
+        return SimpleNamespace(driver_connection=self)
+
+    async def copy_records_to_table(
+        self, table: str, *, records: list[tuple[Any, ...]], columns: tuple[str, ...]
+    ) -> None:
+        self.copied.append((table, records, columns))
+
+    async def exec_driver_sql(self, statement: str) -> _Result:
+        self.statements.append(statement)
+        return SimpleNamespace(one=lambda: (2, 1, 0))
+
+
+def test_copy_metrics_stages_records_through_the_driver() -> None:
+    export = CitationPayload(title="Export", publisher="UC", year=2024, source_url=EXPORT_URL, interpretation_note=None)
+    batches = [
+        MetricBatch.from_payloads(
+            MetricPayload(campus="UCLA", stat_name=stat_name, stat_value_numeric=1.0, year=2024, citations=citations)
+            for stat_name, citations in (("admits", [export]), ("applicants", []))
+        ),
+        MetricBatch.from_payloads([MetricPayload(campus="UCLA", stat_name="admits", year=2024, citations=[export])]),
+    ]
+    connection = _CopyConnection()
+
+    async def session_connection() -> _CopyConnection:
+        return connection
+
+    stats = asyncio.run(runner._copy_metrics(SimpleNamespace(connection=session_connection), 5, iter(batches)))
+
+    *ddl, merge = connection.statements
+    assert ddl == staging_ddl()
+    assert merge == merge_with_dedupe_sql(
+        cohort_type="cohort", school_type_type="schooltype", retrieved_at="now() at time zone 'utc'"
+    )
+    assert [(table, len(records)) for table, records, _ in connection.copied] == [
+        (METRIC_STAGE, 2),
+        (CITATION_STAGE, 1),
+        (LINK_STAGE, 1),
+        (METRIC_STAGE, 1),
+        (CITATION_STAGE, 1),
+        (LINK_STAGE, 1),
+    ]
+    metric_records = [record for table, records, _ in connection.copied if table == METRIC_STAGE for record in records]
+    assert [(record[0], record[1], record[10]) for record in metric_records] == [
+        (0, 5, "admits"),
+        (1, 5, "applicants"),
+        (2, 5, "admits"),
+    ]
+    links = [record for table, records, _ in connection.copied if table == LINK_STAGE for record in records]
+    assert links == [(0, 0), (2, 1)]
+    assert (stats.metrics, stats.citations, stats.delta) == (3, 2, DeltaStats(new=2, updated=1))
+
+    with pytest.raises(RuntimeError, match="PostgreSQL"):
+        sqlite = _CopyConnection("sqlite")
+
+        async def sqlite_connection() -> _CopyConnection:
+            return sqlite
+
+        asyncio.run(runner._copy_metrics(SimpleNamespace(connection=sqlite_connection), 5, iter(batches)))
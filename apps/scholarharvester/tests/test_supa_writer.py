@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import astuple
+from typing import Any, Iterator
+
+from scholarharvester import supa_writer
+from scholarharvester.adapters.utils import CitationPayload, MetricBatch, MetricPayload
+from scholarharvester.delta import MetricDelta
+from scholarharvester.staging import DeltaStats, merge_with_dedupe_sql, staging_ddl
+
+EXPORT = CitationPayload(
+    title="Transfers by major", publisher="UC", year=2024, source_url="https://example.edu/t.csv", interpretation_note="n"
+)
+DASHBOARD = CitationPayload(
+    title="Dashboard", publisher="UC", year=2024, source_url="https://example.edu/d", interpretation_note=None
+)
+
+
+class _Cursor:
+    def __init__(self, connection: "_Connection") -> None:
+        self.connection = connection
+        self._sets: list[list[tuple[int]]] = []
+        self._index = 0
+
+    def __enter__(self) -> "_Cursor":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, query: str, params: tuple[Any, ...]) -> None:
+        self.connection.log.append(("execute", query.split()[0], params))
+
+    def executemany(self, query: str, params_seq: list[Any], returning: bool = False) -> None:
+        params_seq = list(params_seq)
+        self.connection.log.append(("executemany", query.split()[0] + " " + query.split()[2], params_seq))
+        if not returning:
+            return
+        self._sets = [self.connection.returned(query, params) for params in params_seq]
+        self._index = 0
+
+    def fetchone(self) -> tuple[int] | None:
+        rows = self._sets[self._index]
+        return rows[0] if rows else None
+
+    def nextset(self) -> bool | None:
+        self._index += 1
+        return True if self._index < len(self._sets) else None
+
+
+class _Connection:
+    def __init__(self) -> None:
+        self.log: list[tuple[str, str, Any]] = []
+        self.transactions = 0
+        self.citation_ids: dict[tuple[Any, ...], int] = {}
+        self.next_metric_id = 100
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        self.transactions += 1
+        self.log.append(("begin", "", None))
+        yield
+        self.log.append(("commit", "", None))
+
+    def cursor(self) -> _Cursor:
+        return _Cursor(self)
+
+    def returned(self, query: str, params: Any) -> list[tuple[int]]:
+        if "into citation" in query:
+            return [(self.citation_ids.setdefault(tuple(params), 900 + len(self.citation_ids)),)]
+        # Rows whose stat is "unchanged" stand in for upserts skipped by the IS DISTINCT FROM guard.
+        if params[supa_writer.METRIC_COLUMNS.index("stat_name")] == "unchanged":
+            return []
+        self.next_metric_id += 1
+        return [(self.next_metric_id,)]
+
+
+def _rows(*specs: tuple[str, list[CitationPayload]]) -> tuple[list[dict[str, Any]], tuple[CitationPayload, ...]]:
+    batch = MetricBatch.from_payloads(
+        MetricPayload(campus="UCLA", stat_name=stat_name, stat_value_numeric=1.0, year=2024, citations=citations)
+        for stat_name, citations in specs
+    )
+    return list(batch.rows()), batch.citations
+
+
+def test_upsert_metric_batch_maps_ids_across_result_sets() -> None:
+    connection = _Connection()
+    rows, citations = _rows(
+        ("admits", [EXPORT]), ("unchanged", [EXPORT]), ("applicants", [EXPORT, DASHBOARD]), ("enrolled", [])
+    )
+
+    metric_ids = supa_writer.upsert_metric_batch(connection, 7, rows, citations, batch_size=2)
+
+    assert metric_ids == [101, None, 102, 103]
+    assert connection.transactions == 2
+    export_id, dashboard_id = connection.citation_ids[astuple(EXPORT)], connection.citation_ids[astuple(DASHBOARD)]
+    steps = [(kind, statement) for kind, statement, _ in connection.log]
+    assert steps == [
+        ("begin", ""),
+        ("executemany", "insert metric"),
+        ("execute", "delete"),
+        ("executemany", "insert citation"),
+        ("executemany", "insert metric_citation"),
+        ("commit", ""),
+        ("begin", ""),
+        ("executemany", "insert metric"),
+        ("execute", "delete"),
+        ("executemany", "insert citation"),
+        ("executemany", "insert metric_citation"),
+        ("commit", ""),
+    ]
+    unlinked = [params for kind, statement, params in connection.log if statement == "delete"]
+    assert unlinked == [([101],), ([102, 103],)]
+    links = [params for _, statement, params in connection.log if statement == "insert metric_citation"]
+    assert links == [[(101, export_id)], [(102, export_id), (102, dashboard_id)]]
+
+
+def test_upsert_citations_dedupes_within_a_batch() -> None:
+    connection = _Connection()
+    supa_writer.upsert_citations(connection, [(1, EXPORT), (2, EXPORT), (2, DASHBOARD), (3, EXPORT)])
+    supa_writer.upsert_citations(connection, [])
+
+    (citations, links) = [params for _, _, params in connection.log]
+    assert citations == [astuple(EXPORT), astuple(DASHBOARD)]
+    assert links == [(1, 900), (2, 900), (2, 901), (3, 900)]
+
+
+def test_returned_ids_walks_every_result_set() -> None:
+    connection = _Connection()
+    rows, _ = _rows(("unchanged", []), ("admits", []), ("unchanged", []))
+    assert supa_writer.upsert_metrics(connection, 7, rows) == [None, 101, None]
+
+
+class _Copy:
+    def __init__(self, rows: list[dict[str, Any]], columns: list[str]) -> None:
+        self.rows = rows
+        self.columns = columns
+
+    def __enter__(self) -> "_Copy":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def write_row(self, record: tuple[Any, ...]) -> None:
+        self.rows.append(dict(zip(self.columns, record)))
+
+
+class _TableCursor(_Cursor):
+    """Runs the statements supa_writer issues against the in-memory tables of a _Database."""
+
+    connection: "_Database"
+
+    def execute(self, query: str, params: tuple[Any, ...] | None = None) -> None:
+        database = self.connection
+        if query.startswith("create temp table"):
+            database.ddl.append(query)
+            database.stages[query.split()[3]] = []
+        elif "with winners as" in query:
+            database.merges.append(query)
+            self._sets, self._index = [[database.merge()]], 0
+        elif query.startswith("delete from metric_citation"):
+            (metric_ids,) = params
+            database.links = {link for link in database.links if link[0] not in metric_ids}
+        elif query.startswith("select id,"):
+            columns = [column.split("::")[0] for column in query.split("select ")[1].split(" from")[0].split(", ")]
+            self._rows = [
+                {column: {"id": metric_id, **values}[column] for column in columns}
+                for metric_id, values in database.metrics.items()
+                if values["dataset_id"] == params[0]
+            ]
+        else:
+            raise AssertionError(f"unexpected statement: {query}")
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self._rows)
+
+    def returned(self, query: str, params: Any) -> list[tuple[int]]:
+        database = self.connection
+        if "into citation" in query:
+            return [(database.upsert_citation(tuple(params)),)]
+        written = database.upsert_metric(dict(zip(supa_writer.METRIC_COLUMNS, params)))
+        return [(written[0],)] if written else []
+
+    def executemany(self, query: str, params_seq: list[Any], returning: bool = False) -> None:
+        params_seq = list(params_seq)
+        if "into metric_citation" in query:
+            self.connection.links.update(params_seq)
+        else:
+            self._sets, self._index = [self.returned(query, params) for params in params_seq], 0
+
+    def copy(self, statement: str) -> _Copy:
+        table, columns = statement.split()[1], statement.split("(")[1].split(")")[0].split(", ")
+        return _Copy(self.connection.stages[table], columns)
+
+
+class _Database(_Connection):
+    """Fake Postgres: metric and citation upserts, link rows and the staged COPY merge."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.metrics: dict[int, dict[str, Any]] = {}
+        self.links: set[tuple[int, int]] = set()
+        self.stages: dict[str, list[dict[str, Any]]] = {}
+        self.ddl: list[str] = []
+        self.merges: list[str] = []
+
+    def cursor(self, row_factory: object = None) -> _TableCursor:
+        return _TableCursor(self)
+
+    def upsert_metric(self, values: dict[str, Any]) -> tuple[int, bool] | None:
+        key = tuple(values[column] for column in supa_writer.METRIC_DEDUPE_KEY)
+        for metric_id, stored in self.metrics.items():
+            if tuple(stored[column] for column in supa_writer.METRIC_DEDUPE_KEY) == key:
+                if all(stored[column] == values[column] for column in supa_writer.METRIC_VALUE_COLUMNS):
+                    return None
+                stored.update(values)
+                return metric_id, False
+        self.next_metric_id += 1
+        self.metrics[self.next_metric_id] = dict(values)
+        return self.next_metric_id, True
+
+    def upsert_citation(self, values: tuple[Any, ...]) -> int:
+        return self.citation_ids.setdefault(values, 900 + len(self.citation_ids))
+
+    def merge(self) -> tuple[int, int, int]:
+        winners: dict[tuple[Any, ...], dict[str, Any]] = {}
+        for row in sorted(self.stages[supa_writer.METRIC_STAGE], key=lambda row: row["row_no"]):
+            winners[tuple(row[column] for column in supa_writer.METRIC_DEDUPE_KEY)] = row
+        staged_citations = {
+            row["citation_no"]: tuple(row[column] for column in supa_writer.CITATION_COLUMNS)
+            for row in self.stages[supa_writer.CITATION_STAGE]
+        }
+        cited = {values: self.upsert_citation(values) for values in dict.fromkeys(staged_citations.values())}
+        inserted = updated = 0
+        for row in winners.values():
+            written = self.upsert_metric({column: row[column] for column in supa_writer.METRIC_COLUMNS})
+            if written is None:
+                continue
+            metric_id, is_new = written
+            links = {
+                (metric_id, cited[staged_citations[link["citation_no"]]])
+                for link in self.stages[supa_writer.LINK_STAGE]
+                if link["row_no"] == row["row_no"]
+            }
+            if not is_new:
+                self.links = {link for link in self.links if link[0] != metric_id or link in links}
+            self.links |= links
+            inserted, updated = inserted + is_new, updated + (not is_new)
+        return inserted, updated, len(winners) - inserted - updated
+
+    def snapshot(self) -> tuple[dict[tuple[Any, ...], dict[str, Any]], set[tuple[tuple[Any, ...], int]]]:
+        keys = {
+            metric_id: tuple(values[column] for column in supa_writer.METRIC_DEDUPE_KEY)
+            for metric_id, values in self.metrics.items()
+        }
+        return {keys[metric_id]: values for metric_id, values in self.metrics.items()}, {
+            (keys[metric_id], citation_id) for metric_id, citation_id in self.links
+        }
+
+
+def _batch(*specs: tuple[str, float, list[CitationPayload]]) -> MetricBatch:
+    return MetricBatch.from_payloads(
+        MetricPayload(campus="UCLA", stat_name=stat_name, stat_value_numeric=value, year=2024, citations=citations)
+        for stat_name, value, citations in specs
+    )
+
+
+FIRST_RUN = [
+    _batch(("admits", 1.0, [EXPORT]), ("applicants", 2.0, [EXPORT, DASHBOARD])),
+    # A later row for the same key wins, citations included.
+    _batch(("admits", 3.0, [DASHBOARD]), ("enrolled", 4.0, [])),
+]
+SECOND_RUN = [
+    _batch(("admits", 3.0, [DASHBOARD]), ("applicants", 5.0, [DASHBOARD]), ("enrolled", 4.5, [EXPORT])),
+    _batch(("yield", 0.5, [EXPORT])),
+]
+
+
+def _insert_mode(connection: _Database, batches: list[MetricBatch]) -> DeltaStats:
+    delta = MetricDelta(supa_writer.load_metric_states(connection, 7))
+    for batch in batches:
+        fresh, changed = delta.classify(batch.rows())
+        rows = fresh + [row for _, row in changed]
+        delta.remember(rows, supa_writer.upsert_metric_batch(connection, 7, rows, batch.citations, 2))
+    return delta.stats
+
+
+def test_copy_metrics_stages_rows_and_merges() -> None:
+    connection = _Database()
+
+    stats = supa_writer.copy_metrics(connection, 7, FIRST_RUN)
+
+    assert connection.transactions == 1
+    assert connection.ddl == staging_ddl() and all(ddl.endswith("on commit drop") for ddl in connection.ddl)
+    staged = connection.stages[supa_writer.METRIC_STAGE]
+    assert [(row["row_no"], row["dataset_id"], row["stat_name"]) for row in staged] == [
+        (0, 7, "admits"),
+        (1, 7, "applicants"),
+        (2, 7, "admits"),
+        (3, 7, "enrolled"),
+    ]
+    assert [tuple(row.values()) for row in connection.stages[supa_writer.CITATION_STAGE]] == [
+        (0, *astuple(EXPORT)),
+        (1, *astuple(DASHBOARD)),
+        (2, *astuple(DASHBOARD)),
+    ]
+    assert [tuple(row.values()) for row in connection.stages[supa_writer.LINK_STAGE]] == [
+        (0, 0),
+        (1, 0),
+        (1, 1),
+        (2, 2),
+    ]
+    (merge,) = connection.merges
+    assert merge == merge_with_dedupe_sql(cohort_type="cohort", school_type_type="school_type")
+    key = ", ".join(supa_writer.METRIC_DEDUPE_KEY)
+    assert f"select distinct on ({key}) *" in merge and f"order by {key}, row_no desc" in merge
+    assert "join winners s on" in merge and "and not merged.inserted" in merge
+    assert (stats.metrics, stats.citations, stats.delta) == (4, 4, DeltaStats(new=3))
+
+    stats = supa_writer.copy_metrics(connection, 7, SECOND_RUN)
+
+    assert (stats.metrics, stats.citations, stats.delta) == (4, 4, DeltaStats(new=1, updated=2, unchanged=1))
+    metrics, links = connection.snapshot()
+    dashboard_id = connection.citation_ids[astuple(DASHBOARD)]
+    assert sorted((key[5], citation_id) for key, citation_id in links) == [
+        ("admits", dashboard_id),
+        ("applicants", dashboard_id),
+        ("enrolled", connection.citation_ids[astuple(EXPORT)]),
+        ("yield", connection.citation_ids[astuple(EXPORT)]),
+    ]
+
+
+def test_copy_and_insert_modes_store_the_same_rows() -> None:
+    copied, inserted = _Database(), _Database()
+
+    supa_writer.copy_metrics(copied, 7, FIRST_RUN)
+    _insert_mode(inserted, FIRST_RUN)
+    assert copied.snapshot() == inserted.snapshot()
+
+    assert supa_writer.copy_metrics(copied, 7, SECOND_RUN).delta == _insert_mode(inserted, SECOND_RUN)
+    assert copied.snapshot() == inserted.snapshot()
+    assert len(copied.metrics) == 4
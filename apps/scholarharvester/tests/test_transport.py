@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scholarharvester.transport import Transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+def test_pool_reuses_keep_alive_connections() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = Transport(max_connections=4, max_keepalive=4, http2=False, timeout=5, user_agent="test")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/robots.txt"
+        for _ in range(5):
+            assert transport.client.get(url).text == "ok"
+        stats = transport.stats()
+        assert stats.requests == 5
+        assert stats.connections_opened == 1
+        assert stats.open_connections == 1
+        assert stats.reuse_ratio == 0.8
+    finally:
+        transport.close()
+        server.shutdown()
+
+
+def test_async_client_is_closed_when_the_run_ends() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = Transport(max_connections=4, max_keepalive=4, http2=False, timeout=5, user_agent="test")
+    url = f"http://127.0.0.1:{server.server_address[1]}/robots.txt"
+    clients = []
+
+    async def fetch_twice() -> int:
+        client = transport.async_client()
+        clients.append(client)
+        for _ in range(2):
+            assert (await client.get(url)).text == "ok"
+        assert transport.async_client() is client
+        return transport.stats().open_connections
+
+    try:
+        assert transport.run(fetch_twice()) == 1
+        assert transport.run(fetch_twice()) == 1
+        assert [client.is_closed for client in clients] == [True, True]
+        stats = transport.stats()
+        assert (stats.requests, stats.connections_opened, stats.open_connections) == (4, 2, 0)
+    finally:
+        server.shutdown()
@@ -65,7 +65,7 @@ async function persistToSupabase(extraction: IngestResponse['extraction']): Prom
           percentile: metric.percentile ?? null,
           notes: metric.notes ?? null
         },
-        { onConflict: 'dataset_id,campus,major,discipline,stat_name,year,term' }
+        { onConflict: 'dataset_id,campus,major,discipline,source_school,stat_name,year,term' }
       )
       .select('id')
       .single()
@@ -79,20 +79,33 @@ async function persistToSupabase(extraction: IngestResponse['extraction']): Prom
       continue
     }
 
-    const { error: citationsError } = await supabase.from('citation').upsert(
-      metric.citations.map((citation) => ({
-        metric_id: metricRow.id,
-        title: citation.title,
-        publisher: citation.publisher,
-        year: citation.year,
-        source_url: citation.source_url,
-        interpretation_note: citation.interpretation_note ?? null
-      })),
-      { onConflict: 'metric_id,source_url' }
+    const { data: citationRows, error: citationsError } = await supabase
+      .from('citation')
+      .upsert(
+        metric.citations.map((citation) => ({
+          title: citation.title,
+          publisher: citation.publisher,
+          year: citation.year,
+          source_url: citation.source_url,
+          interpretation_note: citation.interpretation_note ?? null
+        })),
+        { onConflict: 'title,publisher,year,source_url,interpretation_note' }
+      )
+      .select('id')
+
+    if (citationsError || !citationRows) {
+      throw new Error(
+        `Unable to persist citations for "${metric.stat_name}": ${citationsError?.message ?? 'insert failed'}`
+      )
+    }
+
+    const { error: linkError } = await supabase.from('metric_citation').upsert(
+      citationRows.map((citation) => ({ metric_id: metricRow.id, citation_id: citation.id })),
+      { onConflict: 'metric_id,citation_id', ignoreDuplicates: true }
     )
 
-    if (citationsError) {
-      throw new Error(`Unable to persist citations for "${metric.stat_name}": ${citationsError.message}`)
+    if (linkError) {
+      throw new Error(`Unable to link citations for "${metric.stat_name}": ${linkError.message}`)
     }
 
     persistedCitations += metric.citations.length
@@ -136,7 +136,11 @@ async function fetchLiveBundleFromSupabase(): Promise<ScholarDataBundle> {
       'id,dataset_id,campus,major,discipline,source_school,school_type,cohort,stat_name,stat_value_numeric,stat_value_text,unit,percentile,year,term,notes',
       'id'
     ),
-    fetchAllRows<CitationRow>('citation', 'metric_id,title,publisher,year,source_url,interpretation_note', 'metric_id'),
+    fetchAllRows<CitationRow>(
+      'metric_citation_detail',
+      'metric_id,title,publisher,year,source_url,interpretation_note',
+      'metric_id'
+    ),
     fetchAllRows<SourceSchoolRow>('source_school', 'name,school_type,city,state', 'name')
   ])
 
@@ -0,0 +1,36 @@
+-- Store identical citations once and link them to metrics through metric_citation.
+-- Every metric keeps pointing at a citation with the same text, so reads are unchanged.
+
+begin;
+
+create table if not exists metric_citation(
+  metric_id bigint references metric(id) on delete cascade,
+  citation_id bigint references citation(id) on delete cascade,
+  primary key (metric_id, citation_id)
+);
+create index if not exists metric_citation_citation_idx on metric_citation(citation_id);
+
+insert into metric_citation (metric_id, citation_id)
+select metric_id, min(id) over (partition by title, publisher, year, source_url, interpretation_note)
+from citation
+where metric_id is not null
+on conflict do nothing;
+
+delete from citation
+where id not in (
+  select min(id) from citation group by title, publisher, year, source_url, interpretation_note
+);
+
+drop index if exists citation_unique_idx;
+alter table citation drop column if exists metric_id;
+create unique index if not exists citation_dedupe_idx on citation(title, publisher, year, source_url, interpretation_note) nulls not distinct;
+
+create or replace view metric_citation_detail with (security_invoker = true) as
+  select l.metric_id, c.id as citation_id, c.title, c.publisher, c.year, c.source_url, c.retrieved_at, c.interpretation_note
+  from metric_citation l
+  join citation c on c.id = l.citation_id;
+
+alter table metric_citation enable row level security;
+create policy "public read metric citations" on metric_citation for select using (true);
+
+commit;
@@ -26,9 +26,12 @@ create table if not exists institution(
   median_earnings_10yr int,
   latitude double precision,
   longitude double precision,
+  content_hash text,
   updated_at timestamptz not null default now()
 );
 
+alter table institution add column if not exists content_hash text;
+
 create index if not exists institution_name_idx on institution using gin ((to_tsvector('english', coalesce(name,''))));
 create index if not exists institution_state_idx on institution(state);
 create index if not exists institution_control_idx on institution(control);
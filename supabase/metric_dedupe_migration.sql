@@ -0,0 +1,24 @@
+-- Deduplicate metrics on the full metric_dedupe_idx key, treating a missing major, discipline,
+-- source_school or term as equal (Postgres 15+). Re-ingesting a dataset then updates rows
+-- instead of duplicating them, and per-school rows of the same campus/major/stat stay apart.
+-- Citation links are removed with their metric by the on delete cascade foreign key.
+
+begin;
+
+delete from metric
+where id in (
+  select id
+  from (
+    select id, row_number() over (
+      partition by dataset_id, campus, major, discipline, source_school, stat_name, year, term
+      order by id desc
+    ) as rn
+    from metric
+  ) ranked
+  where rn > 1
+);
+
+drop index if exists metric_dedupe_idx;
+create unique index metric_dedupe_idx on metric(dataset_id, campus, major, discipline, source_school, stat_name, year, term) nulls not distinct;
+
+commit;
@@ -44,11 +44,11 @@ create table if not exists metric(
   notes text
 );
 create index if not exists metric_idx on metric (campus, major, discipline, cohort, year, stat_name);
-create unique index if not exists metric_dedupe_idx on metric(dataset_id, campus, major, discipline, stat_name, year, term);
+create unique index if not exists metric_dedupe_idx on metric(dataset_id, campus, major, discipline, source_school, stat_name, year, term) nulls not distinct;
 
+-- Identical citations are stored once; metric_citation links them to every metric they support.
 create table if not exists citation(
   id bigserial primary key,
-  metric_id bigint references metric(id) on delete cascade,
   title text not null,
   publisher text not null,
   year int not null,
@@ -56,7 +56,19 @@ create table if not exists citation(
   retrieved_at timestamptz default now(),
   interpretation_note text
 );
-create unique index if not exists citation_unique_idx on citation(metric_id, source_url);
+create unique index if not exists citation_dedupe_idx on citation(title, publisher, year, source_url, interpretation_note) nulls not distinct;
+
+create table if not exists metric_citation(
+  metric_id bigint references metric(id) on delete cascade,
+  citation_id bigint references citation(id) on delete cascade,
+  primary key (metric_id, citation_id)
+);
+create index if not exists metric_citation_citation_idx on metric_citation(citation_id);
+
+create or replace view metric_citation_detail with (security_invoker = true) as
+  select l.metric_id, c.id as citation_id, c.title, c.publisher, c.year, c.source_url, c.retrieved_at, c.interpretation_note
+  from metric_citation l
+  join citation c on c.id = l.citation_id;
 
 -- Optional seed rows for demo KPIs (safe placeholders)
 insert into campus(name, system)
@@ -101,6 +113,7 @@ create table if not exists institution(
   median_earnings_10yr int,
   latitude double precision,
   longitude double precision,
+  content_hash text,
   updated_at timestamptz not null default now()
 );
 create index if not exists institution_name_idx on institution using gin ((to_tsvector('english', coalesce(name,''))));
@@ -110,11 +123,13 @@ create index if not exists institution_control_idx on institution(control);
 -- RLS: public read-only, service role writes
 alter table metric enable row level security;
 alter table citation enable row level security;
+alter table metric_citation enable row level security;
 alter table source_school enable row level security;
 alter table institution enable row level security;
 
 create policy "public read metrics" on metric for select using (true);
 create policy "public read citations" on citation for select using (true);
+create policy "public read metric citations" on metric_citation for select using (true);
 create policy "public read source schools" on source_school for select using (true);
 create policy "public read institutions" on institution for select using (true);
 